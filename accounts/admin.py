@@ -2,6 +2,7 @@
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin
 from django.utils.html import format_html
+from core.images import url_derivee
 from django.utils.translation import gettext_lazy as _
 from accounts.models import User
 from accounts.forms import CustomUserCreationForm, CustomUserChangeForm
@@ -58,7 +59,7 @@ class CustomUserAdmin(UserAdmin):
         if obj.avatar:
             return format_html(
                 '<img src="{}" style="width: 100px; height: 100px; object-fit: cover; border-radius: 50%;">',
-                obj.avatar.url
+                url_derivee(obj.avatar, 'miniature')
             )
         return "(Aucun avatar)"
     avatar_preview.short_description = 'Aperçu Avatar'
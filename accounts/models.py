@@ -3,6 +3,7 @@ from django.db import models
 from django.db.models.signals import post_save
 from django.dispatch import receiver
 from django.utils import timezone
+from core.images import suivre_images
 
 class User(AbstractUser):
     """Modèle utilisateur personnalisé"""
@@ -30,6 +31,8 @@ class User(AbstractUser):
     def __str__(self):
         return f"{self.username} - {self.get_role_display()}"
 
+suivre_images(User, 'avatar')
+
 @receiver(post_save, sender=User)
 def create_employe(sender, instance, created, **kwargs):
     """Crée un Employe pour les rôles liés au personnel si nécessaire"""
@@ -1,6 +1,6 @@
 # chambres/admin.py
 from django.contrib import admin
-from .models import TypeChambre
+from .models import Equipement, TypeChambre, RegleTarifaire
 
 
 @admin.register(TypeChambre)
@@ -31,3 +31,17 @@ class TypeChambreAdmin(admin.ModelAdmin):
 
     # Ajout rapide : permet de créer/modifier directement depuis la liste (optionnel)
     list_editable = ('prix_base', 'capacite_adultes', 'capacite_enfants')
+
+
+@admin.register(RegleTarifaire)
+class RegleTarifaireAdmin(admin.ModelAdmin):
+    list_display = ('nom', 'type_regle', 'type_chambre', 'date_debut', 'date_fin', 'jours_semaine', 'nuits_minimum', 'coefficient', 'actif')
+    list_filter = ('type_regle', 'type_chambre', 'actif')
+    search_fields = ('nom',)
+    list_editable = ('coefficient', 'actif')
+
+
+@admin.register(Equipement)
+class EquipementAdmin(admin.ModelAdmin):
+    list_display = ('nom', 'code')
+    search_fields = ('nom', 'code')
@@ -0,0 +1,238 @@
+# chambres/maintenance.py
+"""
+File de travail des maintenances et indicateurs SLA.
+
+Les techniciens se servent dans la file avec `prendre_prochaine_intervention` :
+la demande la plus prioritaire, puis la plus ancienne, est verrouillée avec
+``FOR UPDATE SKIP LOCKED``. Deux techniciens qui se servent au même instant
+obtiennent donc deux demandes différentes, sans attente ni double affectation.
+
+Les délais de prise en charge et de résolution par priorité, ainsi que le coût
+par chambre, sont cumulés au fil de l'eau (voir les receivers de
+chambres.models) : le tableau de bord lit quelques lignes d'agrégats au lieu de
+parcourir tout l'historique.
+"""
+from collections import namedtuple
+
+from django.db import connection, transaction
+from django.db.models import Case, Count, DecimalField, F, IntegerField, Q, Sum, Value, When
+from django.db.models.functions import Coalesce, Extract, Floor
+from django.utils import timezone
+
+from .models import CoutMaintenanceChambre, MaintenanceChambre, StatistiqueMaintenance
+
+# Rang de traitement : les plus urgentes d'abord
+RANG_PRIORITE = {'urgente': 0, 'haute': 1, 'normale': 2, 'basse': 3}
+
+MONTANT = DecimalField(max_digits=12, decimal_places=2)
+
+Contributions = namedtuple('Contributions', ['priorite', 'chambre_id', 'par_priorite', 'par_chambre'])
+
+
+def rang_priorite():
+    return Case(
+        *[When(priorite=priorite, then=Value(rang)) for priorite, rang in RANG_PRIORITE.items()],
+        default=Value(len(RANG_PRIORITE)),
+        output_field=IntegerField(),
+    )
+
+
+def prendre_prochaine_intervention(technicien):
+    """
+    Attribue au technicien la prochaine demande signalée (priorité, puis
+    ancienneté) et la passe « en cours ». Retourne None si la file est vide.
+    """
+    with transaction.atomic():
+        maintenance = (
+            MaintenanceChambre.objects
+            .select_for_update(skip_locked=True, of=('self',))
+            .filter(statut='signale')
+            .order_by(rang_priorite(), 'date_signalement', 'pk')
+            .first()
+        )
+        if maintenance is None:
+            return None
+        maintenance.statut = 'en_cours'
+        maintenance.technicien = technicien
+        maintenance.date_debut = timezone.now()
+        maintenance.save()
+    return maintenance
+
+
+def terminer_intervention(maintenance, cout=None, notes=''):
+    """Clôture une intervention en cours"""
+    maintenance.statut = 'termine'
+    maintenance.date_fin = timezone.now()
+    if cout is not None:
+        maintenance.cout = cout
+    if notes:
+        maintenance.notes = f"{maintenance.notes}\n{notes}".strip()
+    maintenance.save()
+    return maintenance
+
+
+def _secondes(debut, fin):
+    return int((fin - debut).total_seconds())
+
+
+def contributions(maintenance):
+    """
+    Part d'une maintenance dans les agrégats, calculée à partir des seules
+    valeurs déjà chargées (aucune requête, même sur un objet partiellement
+    chargé).
+    """
+    valeurs = maintenance.__dict__
+    signalement = valeurs.get('date_signalement')
+    debut = valeurs.get('date_debut')
+    fin = valeurs.get('date_fin')
+    termine = valeurs.get('statut') == 'termine'
+    cout = (valeurs.get('cout') or 0) if termine else 0
+
+    demarree = signalement is not None and debut is not None
+    resolue = termine and signalement is not None and fin is not None
+    return Contributions(
+        priorite=valeurs.get('priorite'),
+        chambre_id=valeurs.get('chambre_id'),
+        par_priorite=(
+            int(demarree),
+            _secondes(signalement, debut) if demarree else 0,
+            int(resolue),
+            _secondes(signalement, fin) if resolue else 0,
+            cout,
+        ),
+        par_chambre=(int(termine), cout),
+    )
+
+
+def _cumuler(cursor, table, cle, colonnes, valeur_cle, ecart):
+    """Ajoute `ecart` aux colonnes de la ligne `valeur_cle`, en la créant au besoin"""
+    if not any(ecart):
+        return
+    if any(valeur > 0 for valeur in ecart):
+        cursor.execute(
+            f"""
+            INSERT INTO {table} AS t ({cle}, {', '.join(colonnes)})
+            VALUES (%s, {', '.join(['%s'] * len(colonnes))})
+            ON CONFLICT ({cle}) DO UPDATE SET
+            {', '.join(f'{colonne} = t.{colonne} + EXCLUDED.{colonne}' for colonne in colonnes)}
+            """,
+            [valeur_cle, *ecart],
+        )
+    else:
+        # Retrait pur : la ligne existe déjà (ou a disparu avec sa chambre)
+        cursor.execute(
+            f"""
+            UPDATE {table} SET {', '.join(f'{colonne} = {colonne} + %s' for colonne in colonnes)}
+            WHERE {cle} = %s
+            """,
+            [*ecart, valeur_cle],
+        )
+
+
+def appliquer_ecart(avant, apres):
+    """Reporte dans les agrégats le passage de la contribution `avant` à `apres`"""
+    par_priorite, par_chambre = {}, {}
+    for contribution, signe in ((avant, -1), (apres, 1)):
+        if contribution is None:
+            continue
+        if contribution.priorite:
+            cumul = par_priorite.setdefault(contribution.priorite, [0] * 5)
+            for i, valeur in enumerate(contribution.par_priorite):
+                cumul[i] += signe * valeur
+        if contribution.chambre_id:
+            cumul = par_chambre.setdefault(contribution.chambre_id, [0, 0])
+            for i, valeur in enumerate(contribution.par_chambre):
+                cumul[i] += signe * valeur
+
+    with connection.cursor() as cursor:
+        for priorite, ecart in par_priorite.items():
+            _cumuler(
+                cursor, StatistiqueMaintenance._meta.db_table, 'priorite',
+                ['nombre_demarrees', 'duree_prise_en_charge', 'nombre_terminees', 'duree_resolution', 'cout_total'],
+                priorite, ecart,
+            )
+        for chambre_id, ecart in par_chambre.items():
+            _cumuler(
+                cursor, CoutMaintenanceChambre._meta.db_table, 'chambre_id',
+                ['nombre_interventions', 'cout_total'],
+                chambre_id, ecart,
+            )
+
+
+def reconstruire_statistiques():
+    """Recalcule entièrement les agrégats à partir de l'historique (deux GROUP BY)"""
+    termine = Q(statut='termine', date_fin__isnull=False)
+    demarree = Q(date_debut__isnull=False)
+    par_priorite = (
+        MaintenanceChambre.objects
+        .order_by()
+        .values('priorite')
+        .annotate(
+            nombre_demarrees=Count('pk', filter=demarree),
+            duree_prise_en_charge=Coalesce(
+                Sum(Floor(Extract(F('date_debut') - F('date_signalement'), 'epoch')), filter=demarree), 0
+            ),
+            nombre_terminees=Count('pk', filter=termine),
+            duree_resolution=Coalesce(
+                Sum(Floor(Extract(F('date_fin') - F('date_signalement'), 'epoch')), filter=termine), 0
+            ),
+            cout=Coalesce(Sum('cout', filter=Q(statut='termine')), 0, output_field=MONTANT),
+        )
+    )
+    par_chambre = (
+        MaintenanceChambre.objects
+        .filter(statut='termine')
+        .order_by()
+        .values('chambre_id')
+        .annotate(
+            nombre=Count('pk'),
+            cout=Coalesce(Sum('cout'), 0, output_field=MONTANT),
+        )
+    )
+
+    with transaction.atomic():
+        StatistiqueMaintenance.objects.all().delete()
+        CoutMaintenanceChambre.objects.all().delete()
+        StatistiqueMaintenance.objects.bulk_create([
+            StatistiqueMaintenance(
+                priorite=ligne['priorite'],
+                nombre_demarrees=ligne['nombre_demarrees'],
+                duree_prise_en_charge=int(ligne['duree_prise_en_charge']),
+                nombre_terminees=ligne['nombre_terminees'],
+                duree_resolution=int(ligne['duree_resolution']),
+                cout_total=ligne['cout'],
+            )
+            for ligne in par_priorite
+        ])
+        chambres = CoutMaintenanceChambre.objects.bulk_create([
+            CoutMaintenanceChambre(chambre_id=ligne['chambre_id'], nombre_interventions=ligne['nombre'], cout_total=ligne['cout'])
+            for ligne in par_chambre
+        ])
+    return len(chambres)
+
+
+def indicateurs_sla(nombre_chambres=10):
+    """Données du tableau de bord SLA : délais moyens par priorité et chambres les plus coûteuses"""
+    en_attente = dict(
+        MaintenanceChambre.objects
+        .filter(statut='signale')
+        .order_by()
+        .values_list('priorite')
+        .annotate(nombre=Count('pk'))
+    )
+    statistiques = {statistique.priorite: statistique for statistique in StatistiqueMaintenance.objects.all()}
+    priorites = []
+    for priorite, libelle in sorted(MaintenanceChambre.PRIORITE_CHOICES, key=lambda choix: RANG_PRIORITE[choix[0]]):
+        statistique = statistiques.get(priorite) or StatistiqueMaintenance(priorite=priorite)
+        priorites.append({
+            'priorite': priorite,
+            'libelle': libelle,
+            'en_attente': en_attente.get(priorite, 0),
+            'demarrees': statistique.nombre_demarrees,
+            'terminees': statistique.nombre_terminees,
+            'delai_moyen_prise_en_charge': statistique.delai_moyen_prise_en_charge,
+            'delai_moyen_resolution': statistique.delai_moyen_resolution,
+            'cout_total': statistique.cout_total,
+        })
+    chambres = CoutMaintenanceChambre.objects.select_related('chambre').filter(nombre_interventions__gt=0)[:nombre_chambres]
+    return {'priorites': priorites, 'chambres': list(chambres)}
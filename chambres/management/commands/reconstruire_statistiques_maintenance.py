@@ -0,0 +1,10 @@
+from django.core.management.base import BaseCommand
+from chambres.maintenance import reconstruire_statistiques
+
+
+class Command(BaseCommand):
+    help = "Recalcule les agrégats SLA et les coûts de maintenance à partir de l'historique"
+
+    def handle(self, *args, **options):
+        nombre = reconstruire_statistiques()
+        self.stdout.write(self.style.SUCCESS(f"Statistiques reconstruites ({nombre} chambres avec coûts)."))
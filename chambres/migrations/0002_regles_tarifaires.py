@@ -0,0 +1,35 @@
+# Generated by Django 5.2.5 on 2026-10-18 18:31
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chambres', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RegleTarifaire',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('nom', models.CharField(max_length=100)),
+                ('type_regle', models.CharField(choices=[('saison', 'Saison'), ('jour_semaine', 'Jour de la semaine'), ('duree', 'Durée de séjour')], max_length=20)),
+                ('date_debut', models.DateField(blank=True, help_text='Saison : première nuit concernée', null=True)),
+                ('date_fin', models.DateField(blank=True, help_text='Saison : dernière nuit concernée', null=True)),
+                ('jours_semaine', models.CharField(blank=True, help_text='Jours séparés par des virgules, 0 = lundi ... 6 = dimanche', max_length=20)),
+                ('nuits_minimum', models.IntegerField(blank=True, help_text="Durée : nombre de nuits à partir duquel la règle s'applique", null=True)),
+                ('coefficient', models.DecimalField(decimal_places=3, default=1, help_text='Multiplicateur du prix (ex : 1.200 = +20 %)', max_digits=5)),
+                ('actif', models.BooleanField(default=True)),
+                ('type_chambre', models.ForeignKey(blank=True, help_text='Laisser vide pour appliquer la règle à tous les types', null=True, on_delete=django.db.models.deletion.CASCADE, related_name='regles_tarifaires', to='chambres.typechambre')),
+            ],
+            options={
+                'verbose_name': 'Règle tarifaire',
+                'verbose_name_plural': 'Règles tarifaires',
+                'db_table': 'regles_tarifaires',
+                'ordering': ['type_regle', 'nom'],
+            },
+        ),
+    ]
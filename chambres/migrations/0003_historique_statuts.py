@@ -0,0 +1,33 @@
+# Generated by Django 5.2.5 on 2026-10-18 18:35
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chambres', '0002_regles_tarifaires'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='HistoriqueStatutChambre',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('ancien_statut', models.CharField(choices=[('disponible', 'Disponible'), ('reservee', 'Réservée'), ('occupee', 'Occupée'), ('sale', 'Sale (à nettoyer)'), ('en_nettoyage', 'En cours de nettoyage'), ('propre', 'Propre'), ('en_maintenance', 'En maintenance'), ('hors_service', 'Hors service')], max_length=20)),
+                ('nouveau_statut', models.CharField(choices=[('disponible', 'Disponible'), ('reservee', 'Réservée'), ('occupee', 'Occupée'), ('sale', 'Sale (à nettoyer)'), ('en_nettoyage', 'En cours de nettoyage'), ('propre', 'Propre'), ('en_maintenance', 'En maintenance'), ('hors_service', 'Hors service')], max_length=20)),
+                ('motif', models.CharField(blank=True, max_length=255)),
+                ('date', models.DateTimeField(auto_now_add=True)),
+                ('chambre', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='historique_statuts', to='chambres.chambre')),
+                ('utilisateur', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='changements_statut_chambres', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'db_table': 'historique_statuts_chambres',
+                'ordering': ['-date'],
+                'indexes': [models.Index(fields=['chambre', '-date'], name='hist_statut_chambre_idx')],
+            },
+        ),
+    ]
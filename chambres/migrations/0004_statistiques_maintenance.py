@@ -0,0 +1,48 @@
+# Generated by Django 5.2.5 on 2026-10-18 18:39
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chambres', '0003_historique_statuts'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CoutMaintenanceChambre',
+            fields=[
+                ('chambre', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='cout_maintenance', serialize=False, to='chambres.chambre')),
+                ('nombre_interventions', models.IntegerField(default=0)),
+                ('cout_total', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+            ],
+            options={
+                'db_table': 'couts_maintenances_chambres',
+                'ordering': ['-cout_total'],
+            },
+        ),
+        migrations.CreateModel(
+            name='StatistiqueMaintenance',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('priorite', models.CharField(choices=[('basse', 'Basse'), ('normale', 'Normale'), ('haute', 'Haute'), ('urgente', 'Urgente')], max_length=10, unique=True)),
+                ('nombre_demarrees', models.IntegerField(default=0)),
+                ('duree_prise_en_charge', models.BigIntegerField(default=0, help_text='Secondes cumulées entre signalement et début')),
+                ('nombre_terminees', models.IntegerField(default=0)),
+                ('duree_resolution', models.BigIntegerField(default=0, help_text='Secondes cumulées entre signalement et fin')),
+                ('cout_total', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+            ],
+            options={
+                'db_table': 'statistiques_maintenances',
+                'ordering': ['priorite'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='maintenancechambre',
+            index=models.Index(condition=models.Q(('statut', 'signale')), fields=['date_signalement'], name='maintenances_a_traiter_idx'),
+        ),
+    ]
@@ -0,0 +1,55 @@
+# Generated by Django 5.2.5 on 2026-10-18 18:40
+
+import django.contrib.postgres.fields
+import django.contrib.postgres.indexes
+from django.db import migrations, models
+from django.utils.text import slugify
+
+
+def normaliser_equipements(apps, schema_editor):
+    TypeChambre = apps.get_model('chambres', 'TypeChambre')
+    Equipement = apps.get_model('chambres', 'Equipement')
+    catalogue = {}
+    for type_chambre in TypeChambre.objects.all():
+        codes = set()
+        for nom in type_chambre.equipements.split(','):
+            nom = ' '.join(nom.split())
+            code = slugify(nom)[:50]
+            if code:
+                codes.add(code)
+                catalogue.setdefault(code, nom)
+        type_chambre.codes_equipements = sorted(codes)
+        type_chambre.save(update_fields=['codes_equipements'])
+    Equipement.objects.bulk_create([Equipement(code=code, nom=nom) for code, nom in catalogue.items()])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chambres', '0004_statistiques_maintenance'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Equipement',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('code', models.SlugField(unique=True)),
+                ('nom', models.CharField(max_length=100)),
+            ],
+            options={
+                'db_table': 'equipements',
+                'ordering': ['nom'],
+            },
+        ),
+        migrations.AddField(
+            model_name='typechambre',
+            name='codes_equipements',
+            field=django.contrib.postgres.fields.ArrayField(base_field=models.SlugField(), blank=True, default=list, editable=False, size=None),
+        ),
+        migrations.AddIndex(
+            model_name='typechambre',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['codes_equipements'], name='types_chambres_equip_gin'),
+        ),
+        migrations.RunPython(normaliser_equipements, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.5 on 2026-10-18 19:04
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chambres', '0005_equipements_normalises'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='VersionTableau',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('version', models.BigIntegerField(default=0)),
+            ],
+            options={
+                'db_table': 'chambres_tableau_version',
+            },
+        ),
+    ]
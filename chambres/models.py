@@ -1,8 +1,38 @@
+from datetime import timedelta
+from django.contrib.postgres.fields import ArrayField
+from django.contrib.postgres.indexes import GinIndex
 from django.db import models
-from django.db.models.signals import post_save
+from django.db.models.signals import post_delete, post_init, post_save
 from django.dispatch import receiver
 from django.utils import timezone
+from django.utils.text import slugify
 from accounts.models import User  # Importation pour les relations avec User
+from core.images import suivre_images
+
+class Equipement(models.Model):
+    """Catalogue normalisé des équipements (alimenté depuis les types de chambres)"""
+    code = models.SlugField(max_length=50, unique=True)
+    nom = models.CharField(max_length=100)
+    
+    class Meta:
+        db_table = 'equipements'
+        ordering = ['nom']
+    
+    def __str__(self):
+        return self.nom
+    
+    @staticmethod
+    def normaliser(noms):
+        """``{code: nom}`` pour une liste de noms libres ("Wi-Fi", " wi-fi " -> {"wi-fi": "Wi-Fi"})"""
+        if isinstance(noms, str):
+            noms = noms.split(',')
+        codes = {}
+        for nom in noms:
+            nom = ' '.join(nom.split())
+            code = slugify(nom)[:50]
+            if code:
+                codes.setdefault(code, nom)
+        return codes
 
 class TypeChambre(models.Model):
     """Types de chambres disponibles"""
@@ -13,15 +43,67 @@ class TypeChambre(models.Model):
     superficie = models.DecimalField(max_digits=6, decimal_places=2, null=True, blank=True)
     prix_base = models.DecimalField(max_digits=10, decimal_places=2)
     equipements = models.TextField(blank=True, help_text="Liste des équipements séparés par des virgules")
+    # Forme normalisée de `equipements`, tenue à jour par save() : filtrable par index GIN
+    codes_equipements = ArrayField(models.SlugField(max_length=50), default=list, blank=True, editable=False)
     image = models.ImageField(upload_to='types_chambres/', blank=True, null=True)
     
     class Meta:
         db_table = 'types_chambres'
         verbose_name = 'Type de chambre'
         verbose_name_plural = 'Types de chambres'
+        indexes = [
+            GinIndex(fields=['codes_equipements'], name='types_chambres_equip_gin'),
+        ]
     
     def __str__(self):
         return self.nom
+    
+    def save(self, *args, **kwargs):
+        equipements = Equipement.normaliser(self.equipements)
+        self.codes_equipements = sorted(equipements)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'equipements' in update_fields:
+            kwargs['update_fields'] = {*update_fields, 'codes_equipements'}
+        if equipements:
+            Equipement.objects.bulk_create(
+                [Equipement(code=code, nom=nom) for code, nom in equipements.items()],
+                ignore_conflicts=True,
+            )
+        super().save(*args, **kwargs)
+
+suivre_images(TypeChambre, 'image')
+
+class RegleTarifaire(models.Model):
+    """Règles de modulation du prix de base (saison, jour de semaine, durée de séjour)"""
+    TYPE_CHOICES = [
+        ('saison', 'Saison'),
+        ('jour_semaine', 'Jour de la semaine'),
+        ('duree', 'Durée de séjour'),
+    ]
+    
+    nom = models.CharField(max_length=100)
+    type_regle = models.CharField(max_length=20, choices=TYPE_CHOICES)
+    type_chambre = models.ForeignKey(TypeChambre, on_delete=models.CASCADE, null=True, blank=True, related_name='regles_tarifaires',
+                                     help_text="Laisser vide pour appliquer la règle à tous les types")
+    date_debut = models.DateField(null=True, blank=True, help_text="Saison : première nuit concernée")
+    date_fin = models.DateField(null=True, blank=True, help_text="Saison : dernière nuit concernée")
+    jours_semaine = models.CharField(max_length=20, blank=True, help_text="Jours séparés par des virgules, 0 = lundi ... 6 = dimanche")
+    nuits_minimum = models.IntegerField(null=True, blank=True, help_text="Durée : nombre de nuits à partir duquel la règle s'applique")
+    coefficient = models.DecimalField(max_digits=5, decimal_places=3, default=1, help_text="Multiplicateur du prix (ex : 1.200 = +20 %)")
+    actif = models.BooleanField(default=True)
+    
+    class Meta:
+        db_table = 'regles_tarifaires'
+        ordering = ['type_regle', 'nom']
+        verbose_name = 'Règle tarifaire'
+        verbose_name_plural = 'Règles tarifaires'
+    
+    def __str__(self):
+        return f"{self.nom} ({self.get_type_regle_display()} x{self.coefficient})"
+    
+    @property
+    def jours(self):
+        return [int(jour) for jour in self.jours_semaine.split(',') if jour.strip().isdigit()]
 
 class Chambre(models.Model):
     """Chambres de l'hôtel"""
@@ -84,13 +166,119 @@ class MaintenanceChambre(models.Model):
     class Meta:
         db_table = 'maintenances_chambres'
         ordering = ['-date_signalement']
+        indexes = [
+            # File de travail : seules les demandes en attente sont parcourues
+            models.Index(fields=['date_signalement'], condition=models.Q(statut='signale'), name='maintenances_a_traiter_idx'),
+        ]
+
+class VersionTableau(models.Model):
+    """
+    Version du tableau du ménage (une seule ligne), incrémentée après le
+    COMMIT de chaque changement de statut : tous les processus lisent la même
+    valeur, et jamais avant que le changement soit visible.
+    """
+    version = models.BigIntegerField(default=0)
+
+    class Meta:
+        db_table = 'chambres_tableau_version'
+
+@receiver(post_save, sender=Chambre)
+@receiver(post_delete, sender=Chambre)
+def invalider_tableau(sender, instance, **kwargs):
+    """Toute modification directe d'une chambre périme le tableau de bord"""
+    from .tableau import incrementer_version  # Import différé (tableau importe ce module)
+    incrementer_version()
+
+class HistoriqueStatutChambre(models.Model):
+    """Journal des changements de statut des chambres"""
+    chambre = models.ForeignKey(Chambre, on_delete=models.CASCADE, related_name='historique_statuts')
+    ancien_statut = models.CharField(max_length=20, choices=Chambre.STATUT_CHOICES)
+    nouveau_statut = models.CharField(max_length=20, choices=Chambre.STATUT_CHOICES)
+    motif = models.CharField(max_length=255, blank=True)
+    utilisateur = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='changements_statut_chambres')
+    date = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        db_table = 'historique_statuts_chambres'
+        ordering = ['-date']
+        indexes = [
+            models.Index(fields=['chambre', '-date'], name='hist_statut_chambre_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.chambre_id} : {self.ancien_statut} -> {self.nouveau_statut}"
+
+class StatistiqueMaintenance(models.Model):
+    """Agrégats cumulés des maintenances par priorité (tableau de bord SLA)"""
+    priorite = models.CharField(max_length=10, choices=MaintenanceChambre.PRIORITE_CHOICES, unique=True)
+    nombre_demarrees = models.IntegerField(default=0)
+    duree_prise_en_charge = models.BigIntegerField(default=0, help_text="Secondes cumulées entre signalement et début")
+    nombre_terminees = models.IntegerField(default=0)
+    duree_resolution = models.BigIntegerField(default=0, help_text="Secondes cumulées entre signalement et fin")
+    cout_total = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    
+    class Meta:
+        db_table = 'statistiques_maintenances'
+        ordering = ['priorite']
+    
+    def __str__(self):
+        return f"Maintenances {self.get_priorite_display()}"
+    
+    @property
+    def delai_moyen_prise_en_charge(self):
+        if self.nombre_demarrees:
+            return timedelta(seconds=self.duree_prise_en_charge / self.nombre_demarrees)
+        return None
+    
+    @property
+    def delai_moyen_resolution(self):
+        if self.nombre_terminees:
+            return timedelta(seconds=self.duree_resolution / self.nombre_terminees)
+        return None
+
+class CoutMaintenanceChambre(models.Model):
+    """Coût cumulé des maintenances terminées, par chambre"""
+    chambre = models.OneToOneField(Chambre, on_delete=models.CASCADE, primary_key=True, related_name='cout_maintenance')
+    nombre_interventions = models.IntegerField(default=0)
+    cout_total = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    
+    class Meta:
+        db_table = 'couts_maintenances_chambres'
+        ordering = ['-cout_total']
+    
+    def __str__(self):
+        return f"{self.chambre} : {self.cout_total}"
+
+@receiver(post_init, sender=MaintenanceChambre)
+def memoriser_maintenance(sender, instance, **kwargs):
+    """Conserve la contribution de la maintenance aux agrégats telle que chargée"""
+    from .maintenance import contributions  # Import différé (maintenance importe ce module)
+    instance._contributions_initiales = contributions(instance) if instance.pk else None
+
+@receiver(post_save, sender=MaintenanceChambre)
+def cumuler_statistiques_maintenance(sender, instance, **kwargs):
+    """Reporte dans les agrégats l'écart entre l'ancienne et la nouvelle contribution"""
+    from .maintenance import appliquer_ecart, contributions
+    nouvelles = contributions(instance)
+    appliquer_ecart(instance._contributions_initiales, nouvelles)
+    instance._contributions_initiales = nouvelles
+
+@receiver(post_delete, sender=MaintenanceChambre)
+def retirer_statistiques_maintenance(sender, instance, **kwargs):
+    from .maintenance import appliquer_ecart, contributions
+    appliquer_ecart(contributions(instance), None)
 
 @receiver(post_save, sender=MaintenanceChambre)
 def update_chambre_maintenance(sender, instance, **kwargs):
     """Met à jour le statut de la chambre en fonction de la maintenance"""
+    from .statuts import changer_statut  # Import différé (statuts importe ce module)
+    motif = f"Maintenance #{instance.pk} ({instance.get_statut_display()})"
     if instance.statut in ['signale', 'en_cours']:
-        instance.chambre.statut = 'en_maintenance'
+        changer_statut([instance.chambre_id], 'en_maintenance', motif=motif, utilisateur=instance.technicien or instance.signale_par)
     elif instance.statut in ['termine', 'annule']:
-        instance.chambre.statut = 'propre' if instance.chambre.statut != 'occupee' else instance.chambre.statut
-    instance.chambre.date_derniere_maintenance = instance.date_fin or timezone.now()
-    instance.chambre.save()
\ No newline at end of file
+        # Une chambre occupée entre-temps n'est pas concernée : la transition est refusée
+        changer_statut([instance.chambre_id], 'propre', motif=motif, utilisateur=instance.technicien,
+                       depuis=['en_maintenance', 'hors_service'])
+    Chambre.objects.filter(pk=instance.chambre_id).update(
+        date_derniere_maintenance=instance.date_fin or timezone.now()
+    )
@@ -0,0 +1,92 @@
+# chambres/statuts.py
+"""
+Machine à états du statut des chambres.
+
+Tous les changements de statut passent par `changer_statut`, qui applique un
+UPDATE conditionnel : la ligne n'est modifiée que si son statut *actuel* fait
+partie des statuts sources autorisés pour la cible. Deux acteurs concurrents
+(réception, gouvernante, maintenance) ne peuvent donc plus écraser l'état
+posé par l'autre à partir d'une instance périmée.
+"""
+from django.db import connection, transaction
+
+from core.evenements import publier
+from .models import Chambre, HistoriqueStatutChambre
+from .tableau import incrementer_version
+
+TOUS_LES_STATUTS = {statut for statut, _ in Chambre.STATUT_CHOICES}
+
+# Statut cible -> statuts depuis lesquels on peut l'atteindre
+TRANSITIONS = {
+    'disponible': {'reservee', 'propre'},
+    'reservee': {'disponible', 'propre'},
+    'occupee': {'disponible', 'reservee', 'propre'},
+    'sale': {'occupee'},
+    'en_nettoyage': {'sale'},
+    'propre': {'sale', 'en_nettoyage', 'en_maintenance', 'hors_service'},
+    'en_maintenance': {'disponible', 'reservee', 'sale', 'en_nettoyage', 'propre', 'hors_service'},
+    'hors_service': TOUS_LES_STATUTS - {'occupee', 'hors_service'},
+}
+
+
+def transition_autorisee(ancien_statut, nouveau_statut):
+    return ancien_statut in TRANSITIONS.get(nouveau_statut, ())
+
+
+def changer_statut(chambres, nouveau_statut, motif='', utilisateur=None, depuis=None):
+    """
+    Fait passer des chambres (instances ou identifiants) au statut demandé.
+
+    Seules les chambres dont le statut actuel autorise la transition (et,
+    si `depuis` est fourni, fait partie de `depuis`) sont modifiées, en une
+    seule instruction ; chaque changement est historisé. Retourne
+    ``{chambre_id: ancien_statut}`` pour les chambres effectivement modifiées.
+    """
+    if nouveau_statut not in TRANSITIONS:
+        raise ValueError(f"Statut de chambre inconnu : {nouveau_statut}")
+
+    sources = TRANSITIONS[nouveau_statut]
+    if depuis is not None:
+        sources = sources & set(depuis)
+    ids = list({getattr(chambre, 'pk', chambre) for chambre in chambres})
+    if not ids or not sources:
+        return {}
+
+    table = Chambre._meta.db_table
+    with transaction.atomic():
+        with connection.cursor() as cursor:
+            # Le CTE verrouille les lignes et relit leur statut le plus récent :
+            # l'ancien statut retourné est exact même en cas de concurrence
+            cursor.execute(
+                f"""
+                WITH avant AS (
+                    SELECT id, statut FROM {table}
+                    WHERE id = ANY(%s) AND statut = ANY(%s)
+                    FOR UPDATE
+                )
+                UPDATE {table} AS c SET statut = %s
+                FROM avant WHERE c.id = avant.id
+                RETURNING c.id, avant.statut
+                """,
+                [ids, sorted(sources), nouveau_statut],
+            )
+            modifiees = dict(cursor.fetchall())
+
+        if modifiees:
+            HistoriqueStatutChambre.objects.bulk_create([
+                HistoriqueStatutChambre(
+                    chambre_id=chambre_id,
+                    ancien_statut=ancien_statut,
+                    nouveau_statut=nouveau_statut,
+                    motif=motif,
+                    utilisateur=utilisateur,
+                )
+                for chambre_id, ancien_statut in modifiees.items()
+            ])
+            incrementer_version()
+            publier('chambre', {
+                'statut': nouveau_statut,
+                'chambres': list(modifiees),
+                'motif': motif,
+            })
+    return modifiees
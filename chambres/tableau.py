@@ -0,0 +1,88 @@
+# chambres/tableau.py
+"""
+Tableau de bord du ménage et de la réception : statut de chaque chambre et
+compteurs par étage.
+
+Chaque changement de statut incrémente, juste après son COMMIT, le compteur
+`VersionTableau` : la version lue par un processus (serveur web, commande
+planifiée, autre worker) est donc toujours celle de la base. L'incrément est
+une instruction isolée, en autocommit : le verrou de la ligne n'est jamais
+gardé jusqu'à la fin d'une transaction de changement de statut.
+L'instantané est mis en cache sous ce numéro de version. Un écran qui
+interroge le tableau en boucle reçoit un 304 tant que la version n'a pas
+bougé, et sinon le contenu déjà calculé : le GROUP BY n'est exécuté qu'une
+fois par changement (et par processus si le cache n'est pas partagé), pas
+une fois par écran.
+"""
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.db.models import Count
+
+from .models import Chambre, VersionTableau
+
+CLE_INSTANTANE = 'chambres:tableau:{version}'
+DUREE_CACHE = 24 * 60 * 60
+ID_VERSION = 1
+
+
+def version_tableau():
+    """Version courante du tableau (lecture d'une ligne par clé primaire)"""
+    return VersionTableau.objects.filter(pk=ID_VERSION).values_list('version', flat=True).first() or 0
+
+
+def incrementer_version():
+    """
+    À appeler lors de tout changement visible sur le tableau ; dans une
+    transaction, l'incrément a lieu après son COMMIT (jamais avant que le
+    changement soit visible, sans sérialiser les transactions entre elles).
+    """
+    transaction.on_commit(_incrementer)
+
+
+def _incrementer():
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"""
+            INSERT INTO {VersionTableau._meta.db_table} AS v (id, version) VALUES (%s, 1)
+            ON CONFLICT (id) DO UPDATE SET version = v.version + 1
+            """,
+            [ID_VERSION],
+        )
+
+
+def construire_instantane():
+    """Compteurs par (étage, statut) en un GROUP BY, plus la liste des chambres"""
+    etages = {}
+    compteurs = (
+        Chambre.objects
+        .order_by()
+        .values('etage', 'statut')
+        .annotate(nombre=Count('id'))
+    )
+    for ligne in compteurs:
+        etages.setdefault(ligne['etage'], {})[ligne['statut']] = ligne['nombre']
+
+    chambres = Chambre.objects.order_by('etage', 'numero').values_list(
+        'pk', 'numero', 'etage', 'statut', 'type_chambre__nom'
+    )
+    return {
+        'etages': [
+            {'etage': etage, 'statuts': statuts, 'total': sum(statuts.values())}
+            for etage, statuts in sorted(etages.items())
+        ],
+        'chambres': [
+            {'id': pk, 'numero': numero, 'etage': etage, 'statut': statut, 'type': type_nom}
+            for pk, numero, etage, statut, type_nom in chambres
+        ],
+    }
+
+
+def instantane_tableau():
+    """Retourne (version, instantané), en ne recalculant qu'une fois par version"""
+    version = version_tableau()
+    cle = CLE_INSTANTANE.format(version=version)
+    instantane = cache.get(cle)
+    if instantane is None:
+        instantane = construire_instantane()
+        cache.set(cle, instantane, DUREE_CACHE)
+    return version, instantane
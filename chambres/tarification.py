@@ -0,0 +1,103 @@
+# chambres/tarification.py
+"""
+Calcul des prix par nuit à partir de ``TypeChambre.prix_base`` et des
+``RegleTarifaire`` actives.
+
+Toutes les nuits de tous les types sont cotées en une seule passe NumPy :
+une matrice (types x nuits) de coefficients est construite règle par règle
+à coups de masques booléens, puis multipliée par le vecteur des prix de base.
+Le coût ne dépend que du nombre de règles, pas du nombre de nuits.
+"""
+import datetime
+from collections import namedtuple
+from decimal import Decimal
+
+import numpy as np
+from django.db.models import Q
+
+from .models import RegleTarifaire, TypeChambre
+
+Devis = namedtuple('Devis', ['type_chambre', 'nuits', 'prix_nuits', 'total', 'prix_moyen'])
+
+CENTIME = Decimal('0.01')
+
+
+def _decimal(valeur):
+    return Decimal(str(valeur)).quantize(CENTIME)
+
+
+def _regles_applicables(date_arrivee, date_depart):
+    """Règles actives pouvant toucher au moins une nuit de la période"""
+    derniere_nuit = date_depart - datetime.timedelta(days=1)
+    return RegleTarifaire.objects.filter(actif=True).filter(
+        ~Q(type_regle='saison')
+        | (Q(date_debut__lte=derniere_nuit) | Q(date_debut__isnull=True))
+        & (Q(date_fin__gte=date_arrivee) | Q(date_fin__isnull=True))
+    )
+
+
+def matrice_prix(date_arrivee, date_depart, types, regles):
+    """
+    Matrice (len(types) x nuits) des prix par nuit, en float64.
+
+    Les coefficients de règles de même nature se cumulent par multiplication.
+    """
+    nuits = np.arange(
+        np.datetime64(date_arrivee, 'D'), np.datetime64(date_depart, 'D'), dtype='datetime64[D]'
+    )
+    # 1970-01-01 était un jeudi : (jours + 3) % 7 donne 0 = lundi ... 6 = dimanche
+    jours_semaine = (nuits.astype('int64') + 3) % 7
+    index_types = {type_chambre.pk: i for i, type_chambre in enumerate(types)}
+
+    prix_base = np.array([float(type_chambre.prix_base) for type_chambre in types], dtype=np.float64)
+    coefficients = np.ones((len(types), len(nuits)), dtype=np.float64)
+
+    for regle in regles:
+        if regle.type_regle == 'saison':
+            masque = np.ones(len(nuits), dtype=bool)
+            if regle.date_debut:
+                masque &= nuits >= np.datetime64(regle.date_debut, 'D')
+            if regle.date_fin:
+                masque &= nuits <= np.datetime64(regle.date_fin, 'D')
+        elif regle.type_regle == 'jour_semaine':
+            masque = np.isin(jours_semaine, regle.jours)
+        else:  # duree : s'applique à tout le séjour au-delà du minimum de nuits
+            masque = np.full(len(nuits), len(nuits) >= (regle.nuits_minimum or 0))
+
+        facteur = np.where(masque, float(regle.coefficient), 1.0)
+        if regle.type_chambre_id is None:
+            coefficients *= facteur
+        elif regle.type_chambre_id in index_types:
+            coefficients[index_types[regle.type_chambre_id]] *= facteur
+
+    return nuits, np.round(prix_base[:, np.newaxis] * coefficients, 2)
+
+
+def coter_sejour(date_arrivee, date_depart, types=None):
+    """
+    Devis de chaque type de chambre pour le séjour [date_arrivee, date_depart).
+
+    Retourne ``{type_chambre_id: Devis}``. Deux requêtes au total (types et
+    règles), quel que soit le nombre de nuits ou de types.
+    """
+    if types is None:
+        types = TypeChambre.objects.all()
+    types = list(types)
+    if date_depart <= date_arrivee or not types:
+        return {}
+
+    nuits, prix = matrice_prix(date_arrivee, date_depart, types, _regles_applicables(date_arrivee, date_depart))
+    dates = nuits.astype(datetime.date).tolist()
+
+    devis = {}
+    for i, type_chambre in enumerate(types):
+        prix_nuits = [_decimal(valeur) for valeur in prix[i].tolist()]
+        total = sum(prix_nuits, Decimal(0))
+        devis[type_chambre.pk] = Devis(
+            type_chambre=type_chambre,
+            nuits=dates,
+            prix_nuits=prix_nuits,
+            total=total,
+            prix_moyen=(total / len(dates)).quantize(CENTIME),
+        )
+    return devis
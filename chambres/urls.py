@@ -0,0 +1,11 @@
+# chambres/urls.py
+from django.urls import path
+from . import views
+
+app_name = 'chambres'
+
+urlpatterns = [
+    path('tableau/', views.TableauMenageView.as_view(), name='tableau'),
+    path('maintenances/prochaine/', views.ProchaineInterventionView.as_view(), name='maintenance_prochaine'),
+    path('maintenances/indicateurs/', views.IndicateursSLAView.as_view(), name='maintenance_indicateurs'),
+]
@@ -1,3 +1,74 @@
-from django.shortcuts import render
+# chambres/views.py
+from django.contrib.auth.mixins import LoginRequiredMixin
+from django.http import JsonResponse
+from django.utils.decorators import method_decorator
+from django.views import View
+from django.views.decorators.http import condition
+from .maintenance import indicateurs_sla, prendre_prochaine_intervention
+from .tableau import instantane_tableau, version_tableau
 
-# Create your views here.
+
+def _etag_tableau(request, *args, **kwargs):
+    return str(version_tableau())
+
+
+@method_decorator(condition(etag_func=_etag_tableau), name='get')
+class TableauMenageView(LoginRequiredMixin, View):
+    """
+    Statut des chambres par étage pour le ménage et la réception.
+
+    Répond 304 si l'en-tête If-None-Match porte la version courante.
+    """
+    raise_exception = True
+
+    def get(self, request):
+        version, instantane = instantane_tableau()
+        return JsonResponse({'version': version, **instantane})
+
+
+class ProchaineInterventionView(LoginRequiredMixin, View):
+    """Attribue à l'utilisateur connecté la prochaine maintenance de la file"""
+    raise_exception = True
+
+    def post(self, request):
+        maintenance = prendre_prochaine_intervention(request.user)
+        if maintenance is None:
+            return JsonResponse({'maintenance': None})
+        return JsonResponse({'maintenance': {
+            'id': maintenance.pk,
+            'chambre': maintenance.chambre_id,
+            'priorite': maintenance.priorite,
+            'probleme': maintenance.probleme,
+            'date_signalement': maintenance.date_signalement,
+            'date_debut': maintenance.date_debut,
+        }})
+
+
+class IndicateursSLAView(LoginRequiredMixin, View):
+    """Délais moyens par priorité et coût des maintenances par chambre"""
+    raise_exception = True
+
+    def get(self, request):
+        indicateurs = indicateurs_sla()
+        return JsonResponse({
+            'priorites': [
+                {
+                    **ligne,
+                    'delai_moyen_prise_en_charge': _secondes(ligne['delai_moyen_prise_en_charge']),
+                    'delai_moyen_resolution': _secondes(ligne['delai_moyen_resolution']),
+                }
+                for ligne in indicateurs['priorites']
+            ],
+            'chambres': [
+                {
+                    'chambre': cout.chambre.numero,
+                    'interventions': cout.nombre_interventions,
+                    'cout_total': cout.cout_total,
+                }
+                for cout in indicateurs['chambres']
+            ],
+        })
+
+
+def _secondes(duree):
+    return duree.total_seconds() if duree is not None else None
@@ -0,0 +1,196 @@
+# clients/dedoublonnage.py
+"""
+Détection et fusion des fiches clients en double.
+
+Comparer chaque client à tous les autres est quadratique. Les clients sont
+d'abord regroupés en « blocs » par clé exacte (téléphone, email, numéro de
+pièce normalisés), en SQL ; seuls les clients d'un même bloc sont ensuite
+comparés deux à deux sur leur nom. Les blocs trop grands (numéro fictif
+« 0000000000 », email générique de l'agence...) sont ignorés.
+
+La fusion rattache toutes les lignes liées (réservations, factures,
+commandes, historique...) à la fiche conservée par un UPDATE par table,
+dans une seule transaction.
+"""
+from collections import namedtuple
+from difflib import SequenceMatcher
+
+from django.contrib.postgres.aggregates import ArrayAgg
+from django.db import transaction
+from django.db.models import Count, Value
+from django.db.models.functions import Lower, Replace, Right, Upper
+
+from core.models import ActionLog
+from .models import Client, normaliser_texte
+from .statistiques import planifier_rafraichissement
+
+SEUIL_PAR_DEFAUT = 0.85
+TAILLE_BLOC_MAX = 20
+# Chiffres de fin comparés : ignore les préfixes internationaux (+33 / 0)
+CHIFFRES_TELEPHONE = 9
+
+Candidat = namedtuple('Candidat', ['principal_id', 'doublon_id', 'score', 'motifs'])
+
+# Clé de blocage -> (expression SQL, filtre des valeurs exploitables)
+CLES_BLOCAGE = {
+    'telephone': (Right('phone_chiffres', CHIFFRES_TELEPHONE), {'phone_chiffres__regex': r'^\d{6,}$'}),
+    'email': (Lower('email'), {'email__contains': '@'}),
+    'piece': (Upper(Replace('numero_piece', Value(' '), Value(''))), {'numero_piece__regex': r'\w{4,}'}),
+}
+
+
+def _blocs(cle):
+    expression, filtre = CLES_BLOCAGE[cle]
+    lignes = (
+        Client.objects
+        .filter(**filtre)
+        .annotate(cle=expression)
+        .order_by()
+        .values('cle')
+        .annotate(nombre=Count('pk'), ids=ArrayAgg('pk'))
+        .filter(nombre__gt=1, nombre__lte=TAILLE_BLOC_MAX)
+    )
+    return [ligne['ids'] for ligne in lignes]
+
+
+def similarite_noms(a, b):
+    """
+    Similarité (0 à 1) de deux noms complets normalisés, insensible à
+    l'ordre prénom / nom.
+    """
+    if not a or not b:
+        return 0.0
+    directe = SequenceMatcher(None, a, b).ratio()
+    triee = SequenceMatcher(None, ' '.join(sorted(a.split())), ' '.join(sorted(b.split()))).ratio()
+    return max(directe, triee)
+
+
+def detecter_doublons(seuil=SEUIL_PAR_DEFAUT):
+    """
+    Paires de fiches probablement identiques, de la plus sûre à la moins sûre.
+
+    Dans chaque `Candidat`, `principal_id` est la fiche la plus ancienne.
+    """
+    motifs_par_paire = {}
+    for cle in CLES_BLOCAGE:
+        for ids in _blocs(cle):
+            ids = sorted(ids)
+            for i, premier in enumerate(ids):
+                for second in ids[i + 1:]:
+                    motifs_par_paire.setdefault((premier, second), set()).add(cle)
+    if not motifs_par_paire:
+        return []
+
+    concernes = {pk for paire in motifs_par_paire for pk in paire}
+    fiches = {
+        pk: (normaliser_texte(f"{prenom} {nom}"), naissance)
+        for pk, prenom, nom, naissance in Client.objects.filter(pk__in=concernes).values_list(
+            'pk', 'prenom', 'nom', 'date_naissance'
+        )
+    }
+
+    candidats = []
+    for (premier, second), motifs in motifs_par_paire.items():
+        nom_a, naissance_a = fiches[premier]
+        nom_b, naissance_b = fiches[second]
+        if naissance_a and naissance_b and naissance_a != naissance_b:
+            continue
+        # Chaque clé exacte partagée en plus de la première renforce la présomption
+        score = min(1.0, similarite_noms(nom_a, nom_b) + 0.05 * (len(motifs) - 1))
+        if score >= seuil:
+            candidats.append(Candidat(premier, second, round(score, 3), sorted(motifs)))
+    candidats.sort(key=lambda candidat: (-candidat.score, candidat.principal_id, candidat.doublon_id))
+    return candidats
+
+
+def regrouper(candidats):
+    """
+    Regroupe les paires en groupes transitifs (A~B et B~C : A, B et C) ;
+    retourne ``{principal_id: [doublon_id, ...]}``, le principal étant la fiche
+    la plus ancienne du groupe.
+    """
+    parent = {}
+
+    def racine(pk):
+        parent.setdefault(pk, pk)
+        while parent[pk] != pk:
+            parent[pk] = parent[parent[pk]]
+            pk = parent[pk]
+        return pk
+
+    for candidat in candidats:
+        a, b = racine(candidat.principal_id), racine(candidat.doublon_id)
+        if a != b:
+            parent[max(a, b)] = min(a, b)
+
+    groupes = {}
+    for pk in list(parent):
+        principal = racine(pk)
+        if pk != principal:
+            groupes.setdefault(principal, []).append(pk)
+    return groupes
+
+
+# Champs recopiés depuis un doublon lorsqu'ils sont vides sur la fiche conservée
+CHAMPS_COMPLETABLES = [
+    'date_naissance', 'nationalite', 'adresse', 'ville', 'pays', 'email',
+    'type_piece', 'numero_piece', 'piece_identite', 'type_chambre_prefere', 'preferences_speciales',
+]
+
+
+def fusionner_clients(principal, doublons, utilisateur=None):
+    """
+    Fusionne les fiches `doublons` dans `principal` (instances ou identifiants).
+
+    Toutes les relations vers les doublons sont rattachées au principal (un
+    UPDATE par table liée), les champs vides du principal sont complétés,
+    puis les doublons sont supprimés. Retourne ``{table: lignes rattachées}``.
+    """
+    principal_id = getattr(principal, 'pk', principal)
+    doublon_ids = sorted({getattr(doublon, 'pk', doublon) for doublon in doublons} - {principal_id})
+    if not doublon_ids:
+        return {}
+
+    with transaction.atomic():
+        fiches = {
+            client.pk: client
+            for client in Client.objects.select_for_update().filter(pk__in=[principal_id, *doublon_ids]).order_by('pk')
+        }
+        principal = fiches[principal_id]
+
+        rattachements = {}
+        for relation in Client._meta.related_objects:
+            if not relation.one_to_many:
+                continue
+            nombre = relation.related_model._base_manager.filter(
+                **{f'{relation.field.name}__in': doublon_ids}
+            ).update(**{relation.field.name: principal_id})
+            if nombre:
+                rattachements[relation.related_model._meta.db_table] = nombre
+
+        completes = []
+        for doublon_id in doublon_ids:
+            doublon = fiches.get(doublon_id)
+            if doublon is None:
+                continue
+            for champ in CHAMPS_COMPLETABLES:
+                if not getattr(principal, champ) and getattr(doublon, champ):
+                    setattr(principal, champ, getattr(doublon, champ))
+                    completes.append(champ)
+            if doublon.notes and doublon.notes not in principal.notes:
+                principal.notes = f"{principal.notes}\n{doublon.notes}".strip()
+                completes.append('notes')
+        if completes:
+            principal.save()
+
+        Client.objects.filter(pk__in=doublon_ids).delete()
+        planifier_rafraichissement([principal_id])
+        ActionLog.objects.create(
+            utilisateur=utilisateur,
+            action="Fusion de clients",
+            details=f"Fiches {', '.join(map(str, doublon_ids))} fusionnées : "
+                    + (', '.join(f"{table} ({nombre})" for table, nombre in rattachements.items()) or "aucune relation"),
+            entite='Client',
+            entite_id=principal_id,
+        )
+    return rattachements
@@ -86,3 +86,17 @@ class HistoriqueClientForm(forms.ModelForm):
         if type_choice == 'sejour' and (montant is None or montant <= 0):
             self.add_error('montant', "Le montant est obligatoire pour les séjours.")
         return cleaned_data
+
+
+
+class ImportClientsForm(forms.Form):
+    fichier = forms.FileField(
+        label="Fichier CSV ou XLSX",
+        widget=forms.FileInput(attrs={'accept': '.csv,.xlsx', 'class': 'form-control form-control-sm'}),
+    )
+
+    def clean_fichier(self):
+        fichier = self.cleaned_data['fichier']
+        if not fichier.name.lower().endswith(('.csv', '.xlsx')):
+            raise forms.ValidationError("Seuls les fichiers .csv et .xlsx sont acceptés.")
+        return fichier
@@ -0,0 +1,251 @@
+# clients/importation.py
+"""
+Import en masse de clients depuis un fichier CSV ou XLSX (reprise de
+l'ancien logiciel de gestion hôtelière).
+
+Le fichier est lu ligne à ligne et traité par lots : chaque lot est validé
+en Python, puis confronté à la base en une seule requête (emails et
+téléphones déjà connus) avant d'être inséré par un ``bulk_create``. La
+mémoire utilisée ne dépend pas de la taille du fichier, et le nombre de
+requêtes ne dépend que du nombre de lots. Les lignes refusées sont
+transmises une à une, avec leur motif, à l'appelant (voir `RapportRejets`)
+au lieu d'être accumulées.
+"""
+import csv
+import io
+import re
+from collections import namedtuple
+from datetime import datetime
+from itertools import chain
+
+from django.core.exceptions import ValidationError
+from django.core.validators import validate_email
+from django.db import transaction
+from django.db.models import Q
+from django.db.models.functions import Lower
+
+from .models import Client, normaliser_texte
+
+TAILLE_LOT = 2000
+
+Rejet = namedtuple('Rejet', ['ligne', 'valeurs', 'motif'])
+ResultatImport = namedtuple('ResultatImport', ['importes', 'rejetes'])
+
+# En-tête normalisé -> champ du modèle
+COLONNES = {
+    'civilite': 'civilite',
+    'titre': 'civilite',
+    'nom': 'nom',
+    'prenom': 'prenom',
+    'date_naissance': 'date_naissance',
+    'date_de_naissance': 'date_naissance',
+    'naissance': 'date_naissance',
+    'nationalite': 'nationalite',
+    'adresse': 'adresse',
+    'ville': 'ville',
+    'pays': 'pays',
+    'phone': 'phone',
+    'telephone': 'phone',
+    'tel': 'phone',
+    'email': 'email',
+    'e_mail': 'email',
+    'courriel': 'email',
+    'type_piece': 'type_piece',
+    'numero_piece': 'numero_piece',
+    'n_piece': 'numero_piece',
+    'type_chambre_prefere': 'type_chambre_prefere',
+    'preferences_speciales': 'preferences_speciales',
+    'notes': 'notes',
+}
+CHAMPS_OBLIGATOIRES = ('nom', 'prenom', 'phone')
+CIVILITES = {
+    'm': 'M', 'mr': 'M', 'monsieur': 'M',
+    'mme': 'Mme', 'madame': 'Mme',
+    'mlle': 'Mlle', 'mademoiselle': 'Mlle',
+}
+FORMATS_DATE = ('%Y-%m-%d', '%d/%m/%Y', '%d-%m-%Y', '%d.%m.%Y')
+# Même règle que ClientForm.clean_phone, après suppression des séparateurs
+FORMAT_PHONE = re.compile(r'^\+\d{6,15}$')
+
+
+def _colonne(entete):
+    return re.sub(r'\W+', '_', normaliser_texte(str(entete or ''))).strip('_')
+
+
+def lire_csv(fichier):
+    """Lignes d'un CSV binaire (séparateur « ; » ou « , », UTF-8 avec ou sans BOM)"""
+    texte = io.TextIOWrapper(fichier, encoding='utf-8-sig', newline='')
+    debut = texte.readline()
+    try:
+        dialecte = csv.Sniffer().sniff(debut, delimiters=';,\t')
+    except csv.Error:
+        raise ValueError("Séparateur de colonnes introuvable : la première ligne doit contenir les en-têtes.")
+    lecteur = csv.reader(chain([debut], texte), dialecte)
+    try:
+        yield from lecteur
+    except csv.Error as erreur:
+        raise ValueError(f"CSV illisible à la ligne {lecteur.line_num} : {erreur}")
+
+
+def lire_xlsx(fichier):
+    """Lignes de la première feuille d'un classeur XLSX (nécessite openpyxl)"""
+    try:
+        from openpyxl import load_workbook
+    except ImportError:
+        raise ValueError("L'import XLSX nécessite le paquet openpyxl ; enregistrez le fichier en CSV.")
+    classeur = load_workbook(fichier, read_only=True, data_only=True)
+    try:
+        for ligne in classeur.worksheets[0].iter_rows(values_only=True):
+            yield ['' if valeur is None else valeur for valeur in ligne]
+    finally:
+        classeur.close()
+
+
+def lire_fichier(fichier, nom):
+    """Dictionnaires ``{champ: valeur}`` lus depuis un fichier CSV ou XLSX"""
+    lignes = lire_xlsx(fichier) if nom.lower().endswith('.xlsx') else lire_csv(fichier)
+    entetes = [COLONNES.get(_colonne(entete)) for entete in next(lignes, [])]
+    manquantes = set(CHAMPS_OBLIGATOIRES) - set(entetes)
+    if manquantes:
+        raise ValueError(f"Colonnes obligatoires absentes : {', '.join(sorted(manquantes))}")
+    for ligne in lignes:
+        yield {champ: valeur for champ, valeur in zip(entetes, ligne) if champ}
+
+
+def _date(valeur):
+    if hasattr(valeur, 'year'):
+        return valeur.date() if isinstance(valeur, datetime) else valeur
+    if not isinstance(valeur, str):
+        # Cellule XLSX numérique sans format de date : openpyxl convertit déjà
+        # les cellules au format date, un nombre brut n'est pas interprété
+        raise ValidationError(f"date de naissance illisible : {valeur}")
+    for format_date in FORMATS_DATE:
+        try:
+            return datetime.strptime(valeur, format_date).date()
+        except ValueError:
+            continue
+    raise ValidationError(f"date de naissance illisible : {valeur}")
+
+
+def construire_client(valeurs):
+    """Client non enregistré à partir d'une ligne ; lève ValidationError si elle est invalide"""
+    donnees = {champ: str(valeur).strip() for champ, valeur in valeurs.items() if champ != 'date_naissance'}
+    for champ in CHAMPS_OBLIGATOIRES:
+        if not donnees.get(champ):
+            raise ValidationError(f"{champ} manquant")
+
+    donnees['phone'] = re.sub(r'[\s.\-()]', '', donnees['phone'])
+    if donnees['phone'].startswith('00'):
+        donnees['phone'] = '+' + donnees['phone'][2:]
+    if not FORMAT_PHONE.match(donnees['phone']):
+        raise ValidationError(f"téléphone invalide : {donnees['phone']}")
+
+    if donnees.get('email'):
+        donnees['email'] = donnees['email'].lower()
+        validate_email(donnees['email'])
+
+    civilite = donnees.get('civilite', '')
+    donnees['civilite'] = CIVILITES.get(normaliser_texte(civilite).rstrip('.'), '')
+    if not donnees['civilite']:
+        raise ValidationError(f"civilité inconnue : {civilite or '(vide)'}")
+
+    naissance = valeurs.get('date_naissance')
+    if naissance not in (None, ''):
+        donnees['date_naissance'] = _date(naissance)
+
+    client = Client(**donnees)
+    client.clean_fields(exclude=['piece_identite'])
+    client.normaliser()
+    return client
+
+
+def _importer_lot(lot, emails_vus, phones_vus, simulation):
+    """Valide un lot contre la base (une requête) puis l'insère ; retourne (importés, rejets)"""
+    emails = {client.email for _, client, _ in lot if client.email}
+    phones = {client.phone_chiffres for _, client, _ in lot}
+    existants = (
+        Client.objects
+        .annotate(email_minuscule=Lower('email'))
+        .filter(Q(email_minuscule__in=emails) | Q(phone_chiffres__in=phones))
+        .values_list('email_minuscule', 'phone_chiffres')
+    )
+    emails_existants, phones_existants = set(), set()
+    for email, phone in existants:
+        emails_existants.add(email)
+        phones_existants.add(phone)
+
+    a_creer, rejets = [], []
+    for numero, client, valeurs in lot:
+        if client.email and (client.email in emails_existants or client.email in emails_vus):
+            rejets.append(Rejet(numero, valeurs, f"email déjà utilisé : {client.email}"))
+        elif client.phone_chiffres in phones_existants or client.phone_chiffres in phones_vus:
+            rejets.append(Rejet(numero, valeurs, f"téléphone déjà utilisé : {client.phone}"))
+        else:
+            if client.email:
+                emails_vus.add(client.email)
+            phones_vus.add(client.phone_chiffres)
+            a_creer.append(client)
+
+    if a_creer and not simulation:
+        with transaction.atomic():
+            Client.objects.bulk_create(a_creer, batch_size=TAILLE_LOT)
+    return len(a_creer), rejets
+
+
+def importer_clients(fichier, nom, taille_lot=TAILLE_LOT, simulation=False, sur_rejet=None):
+    """
+    Importe les clients d'un fichier CSV/XLSX ouvert en binaire.
+
+    Les emails et téléphones déjà présents en base, ou déjà vus plus haut
+    dans le fichier, sont rejetés ; chaque `Rejet` est passé à
+    `sur_rejet(rejet)` dès qu'il est connu. Chaque lot est validé puis inséré
+    dans sa propre transaction : une erreur n'annule pas les lots précédents.
+    Retourne un `ResultatImport` (nombre importé, nombre rejeté).
+    """
+    importes, rejetes = 0, 0
+    emails_vus, phones_vus = set(), set()
+    lot = []
+
+    def rejeter(rejet):
+        nonlocal rejetes
+        rejetes += 1
+        if sur_rejet is not None:
+            sur_rejet(rejet)
+
+    def importer_lot():
+        nonlocal importes
+        nombre, rejets_lot = _importer_lot(lot, emails_vus, phones_vus, simulation)
+        importes += nombre
+        for rejet in rejets_lot:
+            rejeter(rejet)
+
+    # Ligne 1 : en-têtes
+    for numero, valeurs in enumerate(lire_fichier(fichier, nom), start=2):
+        if not any(str(valeur).strip() for valeur in valeurs.values()):
+            continue
+        try:
+            lot.append((numero, construire_client(valeurs), valeurs))
+        except ValidationError as erreur:
+            rejeter(Rejet(numero, valeurs, '; '.join(erreur.messages)))
+        if len(lot) >= taille_lot:
+            importer_lot()
+            lot = []
+    if lot:
+        importer_lot()
+    return ResultatImport(importes, rejetes)
+
+
+class RapportRejets:
+    """
+    Rapport CSV des lignes rejetées (numéro de ligne, motif, valeurs
+    d'origine), écrit au fil de l'import : passer `ajouter` comme `sur_rejet`.
+    """
+    # Champs reconnus, dans l'ordre de COLONNES
+    CHAMPS = list(dict.fromkeys(COLONNES.values()))
+
+    def __init__(self, sortie):
+        self.ecrivain = csv.writer(sortie, delimiter=';')
+        self.ecrivain.writerow(['ligne', 'motif', *self.CHAMPS])
+
+    def ajouter(self, rejet):
+        self.ecrivain.writerow([rejet.ligne, rejet.motif, *(rejet.valeurs.get(champ, '') for champ in self.CHAMPS)])
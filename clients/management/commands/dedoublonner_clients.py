@@ -0,0 +1,36 @@
+from django.core.management.base import BaseCommand
+from clients.dedoublonnage import SEUIL_PAR_DEFAUT, detecter_doublons, fusionner_clients, regrouper
+from clients.models import Client
+
+
+class Command(BaseCommand):
+    help = "Liste les fiches clients en double et, avec --fusionner, les fusionne dans la plus ancienne"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--seuil', type=float, default=SEUIL_PAR_DEFAUT,
+                            help="Similarité minimale des noms (0 à 1)")
+        parser.add_argument('--fusionner', action='store_true', help="Fusionne les groupes détectés")
+
+    def handle(self, *args, **options):
+        candidats = detecter_doublons(seuil=options['seuil'])
+        noms = dict(
+            Client.objects
+            .filter(pk__in={pk for candidat in candidats for pk in candidat[:2]})
+            .values_list('pk', 'nom')
+        )
+        for candidat in candidats:
+            self.stdout.write(
+                f"{candidat.principal_id} {noms.get(candidat.principal_id)} <- "
+                f"{candidat.doublon_id} {noms.get(candidat.doublon_id)} "
+                f"(score {candidat.score}, {', '.join(candidat.motifs)})"
+            )
+
+        groupes = regrouper(candidats)
+        if options['fusionner']:
+            for principal_id, doublon_ids in groupes.items():
+                fusionner_clients(principal_id, doublon_ids)
+            self.stdout.write(self.style.SUCCESS(
+                f"{sum(map(len, groupes.values()))} fiche(s) fusionnée(s) dans {len(groupes)} client(s)."
+            ))
+        else:
+            self.stdout.write(self.style.SUCCESS(f"{len(groupes)} groupe(s) de doublons détecté(s)."))
@@ -0,0 +1,48 @@
+from contextlib import ExitStack
+from django.core.management.base import BaseCommand, CommandError
+from clients.importation import TAILLE_LOT, RapportRejets, importer_clients
+
+# Sans rapport, seules les premières lignes rejetées sont affichées
+REJETS_AFFICHES = 20
+
+
+class Command(BaseCommand):
+    help = "Importe des clients depuis un fichier CSV ou XLSX et produit un rapport des lignes rejetées"
+
+    def add_arguments(self, parser):
+        parser.add_argument('fichier', help="Fichier .csv (séparateur ; ou ,) ou .xlsx")
+        parser.add_argument('--rejets', help="Chemin du rapport CSV des lignes rejetées")
+        parser.add_argument('--taille-lot', type=int, default=TAILLE_LOT)
+        parser.add_argument('--simulation', action='store_true', help="Valide le fichier sans rien enregistrer")
+
+    def afficher_rejet(self, rejet):
+        self.affiches += 1
+        if self.affiches <= REJETS_AFFICHES:
+            self.stdout.write(f"Ligne {rejet.ligne} : {rejet.motif}")
+
+    def handle(self, *args, **options):
+        self.affiches = 0
+        try:
+            with ExitStack() as pile:
+                fichier = pile.enter_context(open(options['fichier'], 'rb'))
+                if options['rejets']:
+                    sortie = pile.enter_context(open(options['rejets'], 'w', encoding='utf-8-sig', newline=''))
+                    sur_rejet = RapportRejets(sortie).ajouter
+                else:
+                    sur_rejet = self.afficher_rejet
+                resultat = importer_clients(
+                    fichier, options['fichier'],
+                    taille_lot=options['taille_lot'],
+                    simulation=options['simulation'],
+                    sur_rejet=sur_rejet,
+                )
+        except (OSError, ValueError) as erreur:
+            raise CommandError(str(erreur))
+
+        if resultat.rejetes and options['rejets']:
+            self.stdout.write(f"Rapport des rejets : {options['rejets']}")
+
+        verbe = "valide(s)" if options['simulation'] else "importé(s)"
+        self.stdout.write(self.style.SUCCESS(
+            f"{resultat.importes} client(s) {verbe}, {resultat.rejetes} ligne(s) rejetée(s)."
+        ))
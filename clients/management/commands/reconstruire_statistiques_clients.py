@@ -0,0 +1,10 @@
+from django.core.management.base import BaseCommand
+from clients.statistiques import reconstruire_statistiques
+
+
+class Command(BaseCommand):
+    help = "Recalcule les statistiques cumulées de tous les clients"
+
+    def handle(self, *args, **options):
+        nombre = reconstruire_statistiques()
+        self.stdout.write(self.style.SUCCESS(f"Statistiques de {nombre} clients reconstruites."))
@@ -0,0 +1,61 @@
+# Generated by Django 5.2.5 on 2026-10-18 18:42
+
+import unicodedata
+
+import django.contrib.postgres.indexes
+from django.db import migrations, models
+
+# Copies figées de clients.models.normaliser_texte / chiffres à la date de la migration
+PONCTUATION = str.maketrans({"'": None, "’": None, '-': ' '})
+
+
+def normaliser_texte(texte):
+    decompose = unicodedata.normalize('NFKD', texte or '')
+    sans_accents = ''.join(caractere for caractere in decompose if not unicodedata.combining(caractere))
+    return ' '.join(sans_accents.translate(PONCTUATION).lower().split())
+
+
+def chiffres(texte):
+    return ''.join(caractere for caractere in texte or '' if caractere.isdigit())
+
+
+def remplir_recherche(apps, schema_editor):
+    Client = apps.get_model('clients', 'Client')
+    lot = []
+    for client in Client.objects.only('nom', 'prenom', 'email', 'numero_piece', 'phone').iterator(chunk_size=2000):
+        client.recherche = normaliser_texte(' '.join([client.nom, client.prenom, client.email, client.numero_piece]))
+        client.phone_chiffres = chiffres(client.phone)[:20]
+        lot.append(client)
+        if len(lot) == 2000:
+            Client.objects.bulk_update(lot, ['recherche', 'phone_chiffres'])
+            lot = []
+    Client.objects.bulk_update(lot, ['recherche', 'phone_chiffres'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('clients', '0002_index_recherche'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='client',
+            name='phone_chiffres',
+            field=models.CharField(blank=True, editable=False, max_length=20),
+        ),
+        migrations.AddField(
+            model_name='client',
+            name='recherche',
+            field=models.TextField(blank=True, editable=False, help_text='Nom, prénom, email et n° de pièce sans accents, en minuscules'),
+        ),
+        migrations.AddIndex(
+            model_name='client',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass('recherche', name='gin_trgm_ops'), name='clients_recherche_trgm'),
+        ),
+        migrations.AddIndex(
+            model_name='client',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass('phone_chiffres', name='gin_trgm_ops'), name='clients_phone_chiffres_trgm'),
+        ),
+        migrations.RunPython(remplir_recherche, migrations.RunPython.noop),
+    ]
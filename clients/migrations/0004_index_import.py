@@ -0,0 +1,22 @@
+# Generated by Django 5.2.5 on 2026-10-18 18:44
+
+import django.db.models.functions.text
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('clients', '0003_recherche_normalisee'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='client',
+            index=models.Index(django.db.models.functions.text.Lower('email'), name='clients_email_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='client',
+            index=models.Index(fields=['phone_chiffres'], name='clients_phone_chiffres_idx'),
+        ),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 5.2.5 on 2026-10-18 18:46
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('clients', '0004_index_import'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StatistiqueClient',
+            fields=[
+                ('client', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='statistiques', serialize=False, to='clients.client')),
+                ('nombre_sejours', models.IntegerField(default=0)),
+                ('total_nuits', models.IntegerField(default=0)),
+                ('derniere_visite', models.DateField(blank=True, null=True)),
+                ('nombre_no_shows', models.IntegerField(default=0)),
+                ('chiffre_affaires', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('total_paye', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('solde', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('depense_moyenne', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('nombre_incidents', models.IntegerField(default=0)),
+                ('date_mise_a_jour', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Statistiques client',
+                'verbose_name_plural': 'Statistiques clients',
+                'db_table': 'statistiques_clients',
+                'indexes': [models.Index(fields=['-chiffre_affaires'], name='stats_clients_ca_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.5 on 2026-10-18 18:48
+
+import core.stockage
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('clients', '0005_statistiques_clients'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='client',
+            name='piece_identite',
+            field=models.FileField(blank=True, null=True, storage=core.stockage.get_stockage_documents, upload_to='pieces_identite/'),
+        ),
+    ]
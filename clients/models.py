@@ -1,5 +1,26 @@
+import unicodedata
+from django.contrib.postgres.indexes import GinIndex, OpClass
 from django.db import models
+from django.db.models.functions import Lower, Upper
 from django.utils import timezone
+from core.stockage import get_stockage_documents, suivre_documents
+from .statistiques import suivre_statistiques
+
+
+# Apostrophes supprimées (N'Diaye = NDiaye), traits d'union traités comme des espaces
+PONCTUATION = str.maketrans({"'": None, "’": None, '-': ' '})
+
+
+def normaliser_texte(texte):
+    """Minuscules sans accents ni ponctuation de nom : « Éloïse  N'Diaye-Sy » -> « eloise ndiaye sy »"""
+    decompose = unicodedata.normalize('NFKD', texte or '')
+    sans_accents = ''.join(caractere for caractere in decompose if not unicodedata.combining(caractere))
+    return ' '.join(sans_accents.translate(PONCTUATION).lower().split())
+
+
+def chiffres(texte):
+    """Seulement les chiffres : « +33 (0)6 12-34 » -> « 33061234 »"""
+    return ''.join(caractere for caractere in texte or '' if caractere.isdigit())
 
 class Client(models.Model):
     """Modèle pour les clients de l'hôtel"""
@@ -22,7 +43,7 @@ class Client(models.Model):
     
     type_piece = models.CharField(max_length=50, blank=True)
     numero_piece = models.CharField(max_length=50, blank=True)
-    piece_identite = models.FileField(upload_to='pieces_identite/', blank=True, null=True)
+    piece_identite = models.FileField(upload_to='pieces_identite/', storage=get_stockage_documents, blank=True, null=True)
     
     type_chambre_prefere = models.CharField(max_length=50, blank=True)
     preferences_speciales = models.TextField(blank=True)
@@ -31,19 +52,48 @@ class Client(models.Model):
     date_modification = models.DateTimeField(auto_now=True)
     notes = models.TextField(blank=True)
     
+    # Formes normalisées pour la recherche, tenues à jour par normaliser()
+    recherche = models.TextField(blank=True, editable=False, help_text="Nom, prénom, email et n° de pièce sans accents, en minuscules")
+    phone_chiffres = models.CharField(max_length=20, blank=True, editable=False)
+    
     class Meta:
         db_table = 'clients'
         ordering = ['-date_creation']
         verbose_name = 'Client'
         verbose_name_plural = 'Clients'
+        indexes = [
+            # Index trigrammes : accélèrent les recherches `icontains` (UPPER(...) LIKE ...)
+            GinIndex(OpClass(Upper('nom'), name='gin_trgm_ops'), name='clients_nom_trgm'),
+            GinIndex(OpClass(Upper('prenom'), name='gin_trgm_ops'), name='clients_prenom_trgm'),
+            GinIndex(OpClass(Upper('phone'), name='gin_trgm_ops'), name='clients_phone_trgm'),
+            GinIndex(OpClass('recherche', name='gin_trgm_ops'), name='clients_recherche_trgm'),
+            GinIndex(OpClass('phone_chiffres', name='gin_trgm_ops'), name='clients_phone_chiffres_trgm'),
+            # Recherche exacte (import en masse : contrôle des doublons par lot)
+            models.Index(Lower('email'), name='clients_email_idx'),
+            models.Index(fields=['phone_chiffres'], name='clients_phone_chiffres_idx'),
+        ]
     
     def __str__(self):
         return f"{self.civilite} {self.nom} {self.prenom}"
     
+    def normaliser(self):
+        """Recalcule les champs de recherche (à appeler avant un bulk_create)"""
+        self.recherche = normaliser_texte(' '.join([self.nom, self.prenom, self.email, self.numero_piece]))
+        self.phone_chiffres = chiffres(self.phone)[:20]
+    
+    def save(self, *args, **kwargs):
+        self.normaliser()
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None:
+            kwargs['update_fields'] = {*update_fields, 'recherche', 'phone_chiffres'}
+        super().save(*args, **kwargs)
+    
     @property
     def nom_complet(self):
         return f"{self.prenom} {self.nom}"
 
+suivre_documents(Client, 'piece_identite')
+
 class HistoriqueClient(models.Model):
     """Historique des séjours et interactions clients"""
     TYPE_CHOICES = [
@@ -61,4 +111,32 @@ class HistoriqueClient(models.Model):
     
     class Meta:
         db_table = 'historique_clients'
-        ordering = ['-date']
\ No newline at end of file
+        ordering = ['-date']
+
+suivre_statistiques(HistoriqueClient)
+
+class StatistiqueClient(models.Model):
+    """Statistiques cumulées d'un client, tenues à jour par clients.statistiques"""
+    client = models.OneToOneField(Client, on_delete=models.CASCADE, primary_key=True, related_name='statistiques')
+    nombre_sejours = models.IntegerField(default=0)
+    total_nuits = models.IntegerField(default=0)
+    derniere_visite = models.DateField(null=True, blank=True)
+    nombre_no_shows = models.IntegerField(default=0)
+    chiffre_affaires = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    total_paye = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    solde = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    depense_moyenne = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    nombre_incidents = models.IntegerField(default=0)
+    date_mise_a_jour = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        db_table = 'statistiques_clients'
+        verbose_name = 'Statistiques client'
+        verbose_name_plural = 'Statistiques clients'
+        indexes = [
+            # Liste des clients VIP
+            models.Index(fields=['-chiffre_affaires'], name='stats_clients_ca_idx'),
+        ]
+    
+    def __str__(self):
+        return f"Statistiques de {self.client_id}"
@@ -0,0 +1,72 @@
+# clients/recherche.py
+"""
+Recherche de clients par nom, prénom, téléphone, email ou numéro de pièce
+(saisie semi-automatique à l'accueil).
+
+La recherche porte sur les colonnes normalisées `recherche` (sans accents,
+en minuscules) et `phone_chiffres` (chiffres seuls), chacune couverte par
+un index trigramme GIN : « eloise », « Éloïse » et « ELOISE » trouvent la
+même fiche, « 06 12 34 » trouve « +33 6-12-34-56-78 ».
+"""
+from django.contrib.postgres.search import TrigramSimilarity
+from django.db import OperationalError, connection, transaction
+from django.db.models.functions import Greatest
+
+from .models import Client, chiffres, normaliser_texte
+
+LONGUEUR_MINIMALE = 3
+# Au-delà, la recherche est abandonnée plutôt que de bloquer l'écran d'accueil
+DELAI_MAXIMAL_MS = 300
+
+
+def requete_clients(terme):
+    """
+    QuerySet des clients correspondant au terme, classés par pertinence.
+
+    Chaque mot doit apparaître dans la forme normalisée ; un terme de trois
+    chiffres ou plus est aussi cherché dans le téléphone.
+    """
+    texte = normaliser_texte(terme)
+    # Sans le 0 initial : « 06 12 » retrouve aussi « +33 6 12 »
+    numero = chiffres(terme).lstrip('0')
+    if len(texte) < LONGUEUR_MINIMALE:
+        return Client.objects.none()
+
+    # Les mots de moins de trois lettres ne forment aucun trigramme : ils ne
+    # sont cherchés qu'au sein du terme complet
+    mots = [mot for mot in texte.split() if len(mot) >= LONGUEUR_MINIMALE] or [texte]
+    par_texte = Client.objects.all()
+    for mot in mots:
+        par_texte = par_texte.filter(recherche__contains=mot)
+    similarites = [TrigramSimilarity('recherche', texte)]
+
+    correspondances = par_texte.order_by().values('pk')
+    if len(numero) >= LONGUEUR_MINIMALE:
+        # UNION plutôt que OR : chaque branche reste servie par son propre index
+        correspondances = correspondances.union(
+            Client.objects.filter(phone_chiffres__contains=numero).order_by().values('pk')
+        )
+        similarites.append(TrigramSimilarity('phone_chiffres', numero))
+
+    return (
+        Client.objects
+        .filter(pk__in=correspondances)
+        .annotate(pertinence=Greatest(*similarites) if len(similarites) > 1 else similarites[0])
+        .order_by('-pertinence', '-date_creation')
+    )
+
+
+def rechercher_clients(terme, limite=10, delai_ms=DELAI_MAXIMAL_MS):
+    """
+    Les `limite` clients les plus pertinents, en au plus `delai_ms`
+    millisecondes côté base ; liste vide si le délai est dépassé.
+    """
+    requete = requete_clients(terme)[:limite]
+    try:
+        with transaction.atomic():
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT set_config('statement_timeout', %s, true)", [str(delai_ms)])
+            return list(requete)
+    except OperationalError:
+        # Annulée par statement_timeout : la saisie suivante relancera la recherche
+        return []
@@ -0,0 +1,168 @@
+# clients/statistiques.py
+"""
+Statistiques cumulées par client (séjours, nuits, chiffre d'affaires,
+dernière visite, panier moyen, solde dû).
+
+Elles sont stockées dans une ligne `StatistiqueClient` par client, que la
+fiche client et la liste des clients VIP lisent directement. Dès qu'une
+réservation, une facture, un paiement ou une entrée d'historique change, la
+ligne des seuls clients concernés est recalculée après le COMMIT, en une
+instruction ``INSERT ... SELECT ... ON CONFLICT`` : le coût dépend de
+l'historique de ces clients, pas de la taille des tables. Les traitements en
+masse (UPDATE ensemblistes sans signaux) appellent `rafraichir_statistiques`
+avec les clients qu'ils ont touchés.
+
+Ce module ne fait qu'importer des modèles via le registre d'applications :
+les models.py des autres applications peuvent donc l'importer directement.
+"""
+from django.apps import apps
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models.signals import post_delete, post_init, post_save
+
+# Statuts de réservation qui comptent comme un séjour effectif
+STATUTS_SEJOUR = ('en_cours', 'terminee')
+# Types d'historique comptés comme incidents
+TYPES_INCIDENT = ('incident', 'reclamation')
+
+
+def _table(modele):
+    return apps.get_model(modele)._meta.db_table
+
+
+# Départ réel : jour du check-out s'il a eu lieu (départ anticipé), sinon départ prévu
+DEPART_EFFECTIF = "COALESCE((date_checkout AT TIME ZONE %(fuseau)s)::date, date_depart)"
+
+
+def _parametres(**parametres):
+    return {
+        'sejour': list(STATUTS_SEJOUR),
+        'incident': list(TYPES_INCIDENT),
+        'fuseau': settings.TIME_ZONE,
+        **parametres,
+    }
+
+
+def _requete(filtre):
+    """INSERT ... SELECT des statistiques ; `filtre` restreint chaque sous-requête"""
+    return f"""
+        INSERT INTO {_table('clients.StatistiqueClient')} AS s (
+            client_id, nombre_sejours, total_nuits, derniere_visite, nombre_no_shows,
+            chiffre_affaires, total_paye, solde, depense_moyenne, nombre_incidents, date_mise_a_jour
+        )
+        SELECT
+            c.id,
+            COALESCE(r.sejours, 0),
+            COALESCE(r.nuits, 0),
+            r.derniere_visite,
+            COALESCE(r.no_shows, 0),
+            COALESCE(f.chiffre_affaires, 0),
+            COALESCE(f.total_paye, 0),
+            COALESCE(f.solde, 0),
+            CASE WHEN COALESCE(r.sejours, 0) > 0
+                 THEN ROUND(COALESCE(f.chiffre_affaires, 0) / r.sejours, 2) ELSE 0 END,
+            COALESCE(h.incidents, 0),
+            NOW()
+        FROM {_table('clients.Client')} c
+        LEFT JOIN (
+            SELECT client_id,
+                   COUNT(*) FILTER (WHERE statut = ANY(%(sejour)s)) AS sejours,
+                   SUM(GREATEST(LEAST(date_depart, {DEPART_EFFECTIF}) - date_arrivee, 0))
+                       FILTER (WHERE statut = ANY(%(sejour)s)) AS nuits,
+                   MAX({DEPART_EFFECTIF}) FILTER (WHERE statut = ANY(%(sejour)s)) AS derniere_visite,
+                   COUNT(*) FILTER (WHERE statut = 'no_show') AS no_shows
+            FROM {_table('reservations.Reservation')}
+            WHERE {filtre.format(colonne='client_id')}
+            GROUP BY client_id
+        ) r ON r.client_id = c.id
+        LEFT JOIN (
+            SELECT client_id,
+                   SUM(montant_total) AS chiffre_affaires,
+                   SUM(montant_paye) AS total_paye,
+                   SUM(solde) AS solde
+            FROM {_table('facturations.Facture')}
+            WHERE statut <> 'annulee' AND {filtre.format(colonne='client_id')}
+            GROUP BY client_id
+        ) f ON f.client_id = c.id
+        LEFT JOIN (
+            SELECT client_id, COUNT(*) FILTER (WHERE type = ANY(%(incident)s)) AS incidents
+            FROM {_table('clients.HistoriqueClient')}
+            WHERE {filtre.format(colonne='client_id')}
+            GROUP BY client_id
+        ) h ON h.client_id = c.id
+        WHERE {filtre.format(colonne='c.id')}
+        ON CONFLICT (client_id) DO UPDATE SET
+            nombre_sejours = EXCLUDED.nombre_sejours,
+            total_nuits = EXCLUDED.total_nuits,
+            derniere_visite = EXCLUDED.derniere_visite,
+            nombre_no_shows = EXCLUDED.nombre_no_shows,
+            chiffre_affaires = EXCLUDED.chiffre_affaires,
+            total_paye = EXCLUDED.total_paye,
+            solde = EXCLUDED.solde,
+            depense_moyenne = EXCLUDED.depense_moyenne,
+            nombre_incidents = EXCLUDED.nombre_incidents,
+            date_mise_a_jour = EXCLUDED.date_mise_a_jour
+    """
+
+
+def rafraichir_statistiques(client_ids):
+    """Recalcule les statistiques des clients donnés (une instruction)"""
+    ids = sorted({pk for pk in client_ids if pk})
+    if not ids:
+        return 0
+    with connection.cursor() as cursor:
+        cursor.execute(
+            _requete("{colonne} = ANY(%(ids)s)"),
+            _parametres(ids=ids),
+        )
+        return cursor.rowcount
+
+
+def reconstruire_statistiques():
+    """Recalcule les statistiques de tous les clients"""
+    with transaction.atomic():
+        with connection.cursor() as cursor:
+            cursor.execute(
+                _requete("TRUE"),
+                _parametres(),
+            )
+            return cursor.rowcount
+
+
+def planifier_rafraichissement(client_ids):
+    """Recalcule les statistiques des clients après le COMMIT de la transaction courante"""
+    ids = {pk for pk in client_ids if pk}
+    if ids:
+        transaction.on_commit(lambda: rafraichir_statistiques(ids))
+
+
+def suivre_statistiques(modele, client_de=None):
+    """
+    Tient à jour les statistiques des clients à chaque enregistrement ou
+    suppression d'une instance de `modele`.
+
+    Par défaut le client est `instance.client_id` ; en cas de changement de
+    client, l'ancien et le nouveau sont recalculés. `client_de(instance)`
+    permet de retrouver le client d'un modèle qui ne le porte pas directement.
+    """
+    if client_de is None:
+        def memoriser(sender, instance, **kwargs):
+            # __dict__ : ne pas provoquer de requête pour un champ différé
+            instance._client_initial = instance.__dict__.get('client_id')
+
+        def enregistre(sender, instance, **kwargs):
+            planifier_rafraichissement([instance._client_initial, instance.client_id])
+            instance._client_initial = instance.client_id
+
+        def supprime(sender, instance, **kwargs):
+            planifier_rafraichissement([instance.client_id])
+
+        post_init.connect(memoriser, sender=modele, weak=False)
+    else:
+        def enregistre(sender, instance, **kwargs):
+            planifier_rafraichissement([client_de(instance)])
+
+        supprime = enregistre
+
+    post_save.connect(enregistre, sender=modele, weak=False)
+    post_delete.connect(supprime, sender=modele, weak=False)
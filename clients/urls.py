@@ -0,0 +1,20 @@
+# clients/urls.py
+from django.urls import path
+from . import views
+
+app_name = 'clients'
+
+urlpatterns = [
+    path('', views.ClientListView.as_view(), name='client_list'),
+    path('<int:pk>/', views.ClientDetailView.as_view(), name='client_detail'),
+    path('nouveau/', views.ClientCreateView.as_view(), name='client_create'),
+    path('<int:pk>/modifier/', views.ClientUpdateView.as_view(), name='client_update'),
+    path('<int:pk>/supprimer/', views.ClientDeleteView.as_view(), name='client_delete'),
+    path('recherche/', views.ClientRechercheView.as_view(), name='client_recherche'),
+    path('import/', views.ClientImportView.as_view(), name='client_import'),
+    path('vip/', views.ClientVIPListView.as_view(), name='client_vip_list'),
+    path('historique/', views.HistoriqueListView.as_view(), name='historique_list'),
+    path('historique/nouveau/', views.HistoriqueCreateView.as_view(), name='historique_create'),
+    path('historique/<int:pk>/modifier/', views.HistoriqueUpdateView.as_view(), name='historique_update'),
+    path('historique/<int:pk>/supprimer/', views.HistoriqueDeleteView.as_view(), name='historique_delete'),
+]
@@ -1,66 +1,159 @@
 # clients/views.py
+import io
+import tempfile
+from django.contrib.auth.mixins import LoginRequiredMixin
+from django.http import FileResponse, JsonResponse
+from django.views import View
+from django.views.generic.edit import FormView
 from django.views.generic import ListView, DetailView, CreateView, UpdateView, DeleteView
 from django.urls import reverse_lazy
-from .models import Client, HistoriqueClient
-from .forms import ClientForm, HistoriqueClientForm
+from .models import Client, HistoriqueClient, StatistiqueClient
+from .recherche import rechercher_clients
+from .forms import ClientForm, HistoriqueClientForm, ImportClientsForm
+from .importation import RapportRejets, importer_clients
 
 
 # ==================== CLIENT ====================
-class ClientListView(ListView):
+class ClientListView(LoginRequiredMixin, ListView):
     model = Client
     template_name = 'clients/client_list.html'
     context_object_name = 'clients'
     ordering = ['-date_creation']
 
-
-class ClientDetailView(DetailView):
+    def get_queryset(self):
+        # ?q=... : résultats de la recherche, par pertinence
+        terme = self.request.GET.get('q', '').strip()
+        if terme:
+            return rechercher_clients(terme, limite=50)
+        return super().get_queryset()
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['q'] = self.request.GET.get('q', '')
+        return context
+
+
+class ClientRechercheView(LoginRequiredMixin, View):
+    """Saisie semi-automatique des clients à l'accueil"""
+    raise_exception = True
+
+    def get(self, request):
+        clients = rechercher_clients(request.GET.get('q', ''))
+        return JsonResponse({
+            'resultats': [
+                {
+                    'id': client.pk,
+                    'nom_complet': client.nom_complet,
+                    'phone': client.phone,
+                    'email': client.email,
+                    'numero_piece': client.numero_piece,
+                    'pertinence': round(client.pertinence, 3),
+                }
+                for client in clients
+            ],
+        })
+
+
+class ClientDetailView(LoginRequiredMixin, DetailView):
     model = Client
     template_name = 'clients/client_detail.html'
 
+    def get_queryset(self):
+        # Statistiques cumulées lues en une jointure (voir clients.statistiques)
+        return Client.objects.select_related('statistiques')
+
+
+class ClientVIPListView(LoginRequiredMixin, ListView):
+    """Meilleurs clients par chiffre d'affaires"""
+    template_name = 'clients/client_vip_list.html'
+    context_object_name = 'statistiques'
+    paginate_by = 50
+
+    def get_queryset(self):
+        return (
+            StatistiqueClient.objects
+            .select_related('client')
+            .filter(chiffre_affaires__gt=0)
+            .order_by('-chiffre_affaires')
+        )
 
-class ClientCreateView(CreateView):
+
+class ClientCreateView(LoginRequiredMixin, CreateView):
     model = Client
     form_class = ClientForm
     template_name = 'clients/client_form.html'
     success_url = reverse_lazy('clients:client_list')
 
 
-class ClientUpdateView(UpdateView):
+class ClientUpdateView(LoginRequiredMixin, UpdateView):
     model = Client
     form_class = ClientForm
     template_name = 'clients/client_form.html'
     success_url = reverse_lazy('clients:client_list')
 
 
-class ClientDeleteView(DeleteView):
+class ClientDeleteView(LoginRequiredMixin, DeleteView):
     model = Client
     template_name = 'clients/client_confirm_delete.html'
     success_url = reverse_lazy('clients:client_list')
 
 
+class ClientImportView(LoginRequiredMixin, FormView):
+    """
+    Import en masse depuis un fichier CSV/XLSX. Renvoie le rapport des
+    lignes rejetées en CSV s'il y en a, sinon le nombre de clients importés.
+    """
+    form_class = ImportClientsForm
+    template_name = 'clients/client_import.html'
+
+    def form_valid(self, form):
+        fichier = form.cleaned_data['fichier']
+        # Le rapport reste en mémoire tant qu'il est petit, puis passe sur disque
+        rapport = tempfile.SpooledTemporaryFile(max_size=1024 * 1024)
+        sortie = io.TextIOWrapper(rapport, encoding='utf-8-sig', newline='')
+        try:
+            resultat = importer_clients(fichier.file, fichier.name, sur_rejet=RapportRejets(sortie).ajouter)
+        except ValueError as erreur:
+            sortie.close()
+            form.add_error('fichier', str(erreur))
+            return self.form_invalid(form)
+
+        if not resultat.rejetes:
+            sortie.close()
+            return JsonResponse({'importes': resultat.importes, 'rejetes': 0})
+        sortie.flush()
+        sortie.detach()
+        rapport.seek(0)
+        response = FileResponse(rapport, as_attachment=True, filename='clients_rejetes.csv',
+                                content_type='text/csv; charset=utf-8')
+        response['X-Clients-Importes'] = resultat.importes
+        response['X-Clients-Rejetes'] = resultat.rejetes
+        return response
+
+
 # ==================== HISTORIQUE ====================
-class HistoriqueListView(ListView):
+class HistoriqueListView(LoginRequiredMixin, ListView):
     model = HistoriqueClient
     template_name = 'clients/historique_list.html'
     context_object_name = 'historiques'
     ordering = ['-date']
 
 
-class HistoriqueCreateView(CreateView):
+class HistoriqueCreateView(LoginRequiredMixin, CreateView):
     model = HistoriqueClient
     form_class = HistoriqueClientForm
     template_name = 'clients/historique_form.html'
     success_url = reverse_lazy('clients:historique_list')
 
 
-class HistoriqueUpdateView(UpdateView):
+class HistoriqueUpdateView(LoginRequiredMixin, UpdateView):
     model = HistoriqueClient
     form_class = HistoriqueClientForm
     template_name = 'clients/historique_form.html'
     success_url = reverse_lazy('clients:historique_list')
 
 
-class HistoriqueDeleteView(DeleteView):
+class HistoriqueDeleteView(LoginRequiredMixin, DeleteView):
     model = HistoriqueClient
     template_name = 'clients/historique_confirm_delete.html'
     success_url = reverse_lazy('clients:historique_list')
\ No newline at end of file
@@ -0,0 +1,88 @@
+# core/evenements.py
+"""
+Diffusion en temps réel des changements (statut des chambres, nouvelles
+réservations, statut des commandes) vers les écrans connectés.
+
+Côté émetteur, `publier` envoie un ``pg_notify`` une fois la transaction
+validée : tous les processus (WSGI, ASGI, commandes) peuvent publier.
+
+Côté ASGI, chaque processus ouvre une seule connexion ``LISTEN`` partagée
+par tous ses abonnés ; un écran inactif ne coûte qu'une file asyncio en
+attente, sans requête ni scrutation.
+"""
+import asyncio
+import json
+import logging
+
+import psycopg
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connection, transaction
+
+logger = logging.getLogger(__name__)
+
+CANAL = 'hotel_evenements'
+TAILLE_FILE = 100
+DELAI_RECONNEXION = 5
+
+
+def publier(type_evenement, donnees):
+    """Publie un événement après le COMMIT de la transaction courante"""
+    message = json.dumps({'type': type_evenement, 'donnees': donnees}, cls=DjangoJSONEncoder)
+
+    def envoyer():
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT pg_notify(%s, %s)", [CANAL, message])
+
+    transaction.on_commit(envoyer)
+
+
+class Diffuseur:
+    """Relaie les notifications PostgreSQL vers les abonnés du processus"""
+
+    def __init__(self):
+        self.abonnes = set()
+        self.tache = None
+
+    def _parametres_connexion(self):
+        base = settings.DATABASES['default']
+        return {
+            'dbname': base['NAME'],
+            'user': base.get('USER'),
+            'password': base.get('PASSWORD'),
+            'host': base.get('HOST'),
+            'port': base.get('PORT'),
+            'autocommit': True,
+        }
+
+    async def _ecouter(self):
+        while self.abonnes:
+            try:
+                async with await psycopg.AsyncConnection.connect(**self._parametres_connexion()) as conn:
+                    await conn.execute(f"LISTEN {CANAL}")
+                    async for notification in conn.notifies():
+                        for file in list(self.abonnes):
+                            try:
+                                file.put_nowait(notification.payload)
+                            except asyncio.QueueFull:
+                                # Un client trop lent perd des messages plutôt que de bloquer les autres
+                                pass
+                        if not self.abonnes:
+                            break
+            except psycopg.Error:
+                logger.exception("Écoute des événements interrompue, reconnexion dans %s s", DELAI_RECONNEXION)
+                await asyncio.sleep(DELAI_RECONNEXION)
+        self.tache = None
+
+    def abonner(self):
+        file = asyncio.Queue(maxsize=TAILLE_FILE)
+        self.abonnes.add(file)
+        if self.tache is None:
+            self.tache = asyncio.create_task(self._ecouter())
+        return file
+
+    def desabonner(self, file):
+        self.abonnes.discard(file)
+
+
+diffuseur = Diffuseur()
@@ -0,0 +1,159 @@
+# core/images.py
+"""
+Déclinaisons réduites des images téléversées (types de chambres, produits,
+menu, photos du personnel, avatars).
+
+Après chaque téléversement, les miniatures WebP et JPEG sont calculées dans
+un pool de threads, une fois la transaction validée : la requête qui
+enregistre l'image n'attend pas le redimensionnement. Chaque déclinaison est
+stockée sous une clé déduite du nom du fichier source
+(``derives/<source sans extension>/<taille>.<format>``), ce qui permet d'en
+connaître l'URL sans requête ; cette URL est gardée en cache une fois la
+déclinaison disponible. Tant qu'elle ne l'est pas, l'image d'origine est servie.
+"""
+import logging
+import posixpath
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.db.models.signals import post_init, post_save
+from PIL import Image, ImageOps
+
+logger = logging.getLogger(__name__)
+
+# Nom -> boîte englobante (largeur, hauteur) ; les proportions sont conservées
+TAILLES = {
+    'miniature': (200, 200),
+    'moyenne': (800, 800),
+}
+# Format -> (format Pillow, extension, options d'encodage)
+FORMATS = {
+    'webp': ('WEBP', 'webp', {'quality': 80, 'method': 4}),
+    'jpeg': ('JPEG', 'jpg', {'quality': 82, 'optimize': True, 'progressive': True}),
+}
+PREFIXE = 'derives'
+DUREE_CACHE_URL = 24 * 60 * 60
+
+_pool = None
+_verrou_pool = threading.Lock()
+
+
+def _executeur():
+    global _pool
+    with _verrou_pool:
+        if _pool is None:
+            _pool = ThreadPoolExecutor(
+                max_workers=getattr(settings, 'IMAGES_TRAITEMENTS_PARALLELES', 2),
+                thread_name_prefix='images',
+            )
+        return _pool
+
+
+def cle_derivee(nom_source, taille, format_image):
+    """Clé de stockage déterministe d'une déclinaison"""
+    racine, _ = posixpath.splitext(nom_source)
+    return f"{PREFIXE}/{racine}/{taille}.{FORMATS[format_image][1]}"
+
+
+def _cle_cache(cle):
+    return f"images:url:{cle}"
+
+
+def generer_derivees(nom_source, storage=None):
+    """Calcule et enregistre toutes les déclinaisons d'une image source"""
+    storage = storage or default_storage
+    with storage.open(nom_source, 'rb') as fichier:
+        image = ImageOps.exif_transpose(Image.open(fichier))
+        image.load()
+
+    for taille, boite in TAILLES.items():
+        reduite = image.copy()
+        reduite.thumbnail(boite, Image.Resampling.LANCZOS)
+        for format_image, (format_pillow, _, options) in FORMATS.items():
+            if format_pillow == 'JPEG' and reduite.mode not in ('RGB', 'L'):
+                contenu = reduite.convert('RGB')
+            else:
+                contenu = reduite
+            tampon = BytesIO()
+            contenu.save(tampon, format_pillow, **options)
+            cle = cle_derivee(nom_source, taille, format_image)
+            # Clé fixe : on remplace la déclinaison au lieu d'en créer une nouvelle
+            if storage.exists(cle):
+                storage.delete(cle)
+            storage.save(cle, ContentFile(tampon.getvalue()))
+            cache.set(_cle_cache(cle), storage.url(cle), DUREE_CACHE_URL)
+
+
+def supprimer_derivees(nom_source, storage=None):
+    storage = storage or default_storage
+    for taille in TAILLES:
+        for format_image in FORMATS:
+            cle = cle_derivee(nom_source, taille, format_image)
+            cache.delete(_cle_cache(cle))
+            if storage.exists(cle):
+                storage.delete(cle)
+
+
+def _traiter(nom_source, ancien_nom, storage):
+    try:
+        if ancien_nom:
+            supprimer_derivees(ancien_nom, storage)
+        generer_derivees(nom_source, storage)
+    except Exception:
+        logger.exception("Échec du calcul des miniatures de %s", nom_source)
+
+
+def planifier_derivees(fichier, ancien_nom=None):
+    """Confie le calcul des déclinaisons au pool, après le COMMIT"""
+    nom, storage = fichier.name, fichier.storage
+    transaction.on_commit(lambda: _executeur().submit(_traiter, nom, ancien_nom, storage))
+
+
+def url_derivee(fichier, taille='miniature', format_image='webp'):
+    """
+    URL de la déclinaison demandée, ou de l'image d'origine si elle n'est
+    pas encore prête. Chaîne vide si le champ est vide.
+    """
+    if not fichier:
+        return ''
+    cle = cle_derivee(fichier.name, taille, format_image)
+    url = cache.get(_cle_cache(cle))
+    if url is None:
+        if not fichier.storage.exists(cle):
+            return fichier.url
+        url = fichier.storage.url(cle)
+        cache.set(_cle_cache(cle), url, DUREE_CACHE_URL)
+    return url
+
+
+def suivre_images(modele, *champs):
+    """
+    Déclenche le calcul des déclinaisons lorsqu'un des `champs` image du
+    modèle reçoit un nouveau fichier.
+    """
+    def memoriser(sender, instance, **kwargs):
+        # __dict__ : ne pas provoquer de requête pour un champ différé
+        instance._images_initiales = {
+            champ: getattr(instance.__dict__.get(champ), 'name', instance.__dict__.get(champ))
+            for champ in champs
+        }
+
+    def planifier(sender, instance, **kwargs):
+        for champ in champs:
+            fichier = getattr(instance, champ)
+            ancien_nom = instance._images_initiales.get(champ)
+            if fichier and fichier.name != ancien_nom:
+                planifier_derivees(fichier, ancien_nom)
+            elif not fichier and ancien_nom:
+                storage = fichier.storage
+                transaction.on_commit(lambda nom=ancien_nom: _executeur().submit(supprimer_derivees, nom, storage))
+        memoriser(sender, instance)
+
+    post_init.connect(memoriser, sender=modele, weak=False)
+    post_save.connect(planifier, sender=modele, weak=False)
@@ -0,0 +1,23 @@
+from django.apps import apps
+from django.core.management.base import BaseCommand
+from django.db.models import ImageField
+from core.images import generer_derivees
+
+
+class Command(BaseCommand):
+    help = "Calcule les miniatures de toutes les images déjà téléversées"
+
+    def handle(self, *args, **options):
+        nombre = 0
+        for modele in apps.get_models():
+            champs = [champ.name for champ in modele._meta.get_fields() if isinstance(champ, ImageField)]
+            for champ in champs:
+                noms = modele.objects.exclude(**{champ: ''}).exclude(**{f'{champ}__isnull': True}).values_list(champ, flat=True)
+                storage = modele._meta.get_field(champ).storage
+                for nom in noms.iterator():
+                    try:
+                        generer_derivees(nom, storage)
+                        nombre += 1
+                    except (OSError, ValueError) as erreur:
+                        self.stderr.write(f"{modele.__name__}.{champ} {nom} : {erreur}")
+        self.stdout.write(self.style.SUCCESS(f"Miniatures calculées pour {nombre} images."))
@@ -0,0 +1,43 @@
+from django.apps import apps
+from django.core.management.base import BaseCommand
+from django.db.models import FileField
+from core.stockage import PREFIXE, StockageDedoublonne
+
+
+class Command(BaseCommand):
+    help = "Range les documents déjà téléversés dans le stockage par contenu (dédoublonné)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--supprimer-originaux', action='store_true',
+                            help="Supprime les anciens fichiers une fois recopiés")
+
+    def handle(self, *args, **options):
+        migres, economises = 0, 0
+        for modele in apps.get_models():
+            for champ in modele._meta.get_fields():
+                if not isinstance(champ, FileField) or not isinstance(champ.storage, StockageDedoublonne):
+                    continue
+                storage = champ.storage
+                anciens = (
+                    modele.objects
+                    .exclude(**{f'{champ.name}__startswith': f'{PREFIXE}/'})
+                    .exclude(**{champ.name: ''})
+                    .exclude(**{f'{champ.name}__isnull': True})
+                    .values_list('pk', champ.name)
+                )
+                for pk, ancien in anciens.iterator():
+                    if not storage.exists(ancien):
+                        self.stderr.write(f"{modele.__name__} {pk} : fichier absent ({ancien})")
+                        continue
+                    with storage.open(ancien, 'rb') as fichier:
+                        # save() prend la référence de la fiche sur le blob
+                        nouveau = storage.save(ancien, fichier)
+                    # update() : pas de signaux, la référence est déjà comptée
+                    modele.objects.filter(pk=pk).update(**{champ.name: nouveau})
+                    if options['supprimer_originaux']:
+                        economises += storage.size(ancien)
+                        super(StockageDedoublonne, storage).delete(ancien)
+                    migres += 1
+        self.stdout.write(self.style.SUCCESS(
+            f"{migres} document(s) migré(s), {economises} octet(s) d'originaux supprimé(s)."
+        ))
@@ -0,0 +1,27 @@
+# Generated by Django 5.2.5 on 2026-10-18 18:48
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Blob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('empreinte', models.CharField(help_text='SHA-256 du contenu', max_length=64, unique=True)),
+                ('nom', models.CharField(max_length=255, unique=True)),
+                ('taille', models.BigIntegerField()),
+                ('nombre_references', models.IntegerField(default=0)),
+                ('date_creation', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'db_table': 'blobs',
+            },
+        ),
+    ]
@@ -52,4 +52,18 @@ class Notification(models.Model):
         ordering = ['-date']
     
     def __str__(self):
-        return f"Notification {self.get_type_display()} - {self.message[:50]}"
\ No newline at end of file
+        return f"Notification {self.get_type_display()} - {self.message[:50]}"
+
+class Blob(models.Model):
+    """Contenu de document stocké une seule fois sous son empreinte (voir core.stockage)"""
+    empreinte = models.CharField(max_length=64, unique=True, help_text="SHA-256 du contenu")
+    nom = models.CharField(max_length=255, unique=True)
+    taille = models.BigIntegerField()
+    nombre_references = models.IntegerField(default=0)
+    date_creation = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        db_table = 'blobs'
+    
+    def __str__(self):
+        return f"{self.nom} ({self.nombre_references} réf.)"
@@ -0,0 +1,94 @@
+# core/numerotation.py
+"""
+Attribution des numéros de documents (réservations, factures, commandes...).
+
+Chaque couple (préfixe, année) dispose de sa propre séquence PostgreSQL.
+Les séquences ne sont pas transactionnelles : deux processus ne peuvent
+jamais obtenir la même valeur, même en pleine heure de pointe.
+
+Pour éviter un aller-retour vers la base à chaque document, chaque processus
+réserve un bloc de valeurs et les distribue ensuite depuis la mémoire. Les
+valeurs d'un bloc non consommé sont perdues à l'arrêt du processus : la
+numérotation est unique et croissante par processus, mais peut avoir des trous.
+"""
+import os
+import threading
+from collections import deque
+
+from django.conf import settings
+from django.db import connection
+from django.utils import timezone
+
+TAILLE_BLOC_DEFAUT = 50
+
+_verrou = threading.Lock()
+_blocs = {}
+_sequences_connues = set()
+_pid = os.getpid()
+
+
+def _taille_bloc():
+    return getattr(settings, 'NUMEROTATION_TAILLE_BLOC', TAILLE_BLOC_DEFAUT)
+
+
+def _nom_sequence(prefixe, annee):
+    return f"numerotation_{prefixe.lower()}_{annee}"
+
+
+def _creer_sequence(nom):
+    """
+    Crée la séquence si besoin, sur une connexion dédiée en autocommit.
+
+    Créée dans la transaction courante, la séquence disparaîtrait avec un
+    rollback alors que des valeurs déjà distribuées resteraient en mémoire.
+    """
+    if nom in _sequences_connues:
+        return
+    autre = connection.copy()
+    try:
+        with autre.cursor() as cursor:
+            cursor.execute(f'CREATE SEQUENCE IF NOT EXISTS "{nom}"')
+    finally:
+        autre.close()
+    _sequences_connues.add(nom)
+
+
+def _tirer_valeurs(nom, quantite):
+    """Réserve `quantite` valeurs de la séquence en un seul aller-retour"""
+    _creer_sequence(nom)
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT nextval(%s) FROM generate_series(1, %s)", [nom, quantite])
+        return [ligne[0] for ligne in cursor.fetchall()]
+
+
+def _reinitialiser_apres_fork():
+    """Un processus forké ne doit pas redistribuer les blocs de son parent"""
+    global _pid
+    if os.getpid() != _pid:
+        _pid = os.getpid()
+        _blocs.clear()
+
+
+def allouer_numeros(prefixe, quantite=1):
+    """
+    Retourne `quantite` numéros uniques pour le préfixe, sous la forme
+    ``<PREFIXE><ANNEE><COMPTEUR sur 7 chiffres>`` (ex : RES20260000042).
+    """
+    annee = timezone.localdate().year
+    nom = _nom_sequence(prefixe, annee)
+
+    with _verrou:
+        _reinitialiser_apres_fork()
+        bloc = _blocs.setdefault(nom, deque())
+        manquants = quantite - len(bloc)
+        if manquants > 0:
+            # On complète le bloc d'un coup pour la demande et les suivantes
+            bloc.extend(_tirer_valeurs(nom, manquants + _taille_bloc()))
+        valeurs = [bloc.popleft() for _ in range(quantite)]
+
+    return [f"{prefixe}{annee}{valeur:07d}" for valeur in valeurs]
+
+
+def prochain_numero(prefixe):
+    """Numéro unique suivant pour le préfixe donné"""
+    return allouer_numeros(prefixe, 1)[0]
@@ -0,0 +1,61 @@
+# core/pagination.py
+import datetime
+
+from django.db.models import Q
+from django.utils.http import urlsafe_base64_decode, urlsafe_base64_encode
+
+
+class KeysetPaginationMixin:
+    """
+    Pagination par clé (« seek ») pour les ListView, sur l'ordre décroissant
+    (`keyset_field`, id).
+
+    Au lieu d'un OFFSET qui relit toutes les lignes précédentes, chaque page
+    repart de la dernière ligne affichée : le coût d'une page reste constant
+    quelle que soit sa profondeur, à condition qu'un index couvre
+    (`keyset_field`, id).
+    """
+    keyset_field = 'date_creation'
+    page_size = 50
+    cursor_param = 'apres'
+
+    @staticmethod
+    def encode_cursor(valeur, pk):
+        return urlsafe_base64_encode(f"{valeur.isoformat()}|{pk}".encode())
+
+    @staticmethod
+    def decode_cursor(curseur):
+        try:
+            valeur, pk = urlsafe_base64_decode(curseur).decode().split('|')
+            return datetime.datetime.fromisoformat(valeur), int(pk)
+        except (ValueError, UnicodeDecodeError):
+            return None
+
+    def get_keyset_ordering(self):
+        return [f'-{self.keyset_field}', '-id']
+
+    def paginate_keyset(self, queryset):
+        """Retourne (lignes de la page, curseur de la page suivante ou None)"""
+        queryset = queryset.order_by(*self.get_keyset_ordering())
+        position = self.decode_cursor(self.request.GET.get(self.cursor_param, ''))
+        if position is not None:
+            valeur, pk = position
+            # La borne `<=` ouvre le parcours d'index à la bonne position ;
+            # l'exclusion départage les lignes de même valeur
+            queryset = queryset.filter(**{f'{self.keyset_field}__lte': valeur}).exclude(
+                Q(**{self.keyset_field: valeur}) & Q(id__gte=pk)
+            )
+
+        lignes = list(queryset[:self.page_size + 1])
+        curseur_suivant = None
+        if len(lignes) > self.page_size:
+            lignes = lignes[:self.page_size]
+            derniere = lignes[-1]
+            curseur_suivant = self.encode_cursor(getattr(derniere, self.keyset_field), derniere.pk)
+        return lignes, curseur_suivant
+
+    def get_context_data(self, **kwargs):
+        lignes, curseur_suivant = self.paginate_keyset(kwargs.pop('object_list', self.object_list))
+        context = super().get_context_data(object_list=lignes, **kwargs)
+        context['curseur_suivant'] = curseur_suivant
+        return context
@@ -0,0 +1,239 @@
+# core/stockage.py
+"""
+Stockage des documents téléversés (pièces d'identité, CV, contrats) par
+contenu.
+
+Chaque fichier est haché en SHA-256 au fil de la lecture, par blocs, sans
+jamais être chargé en entier en mémoire, puis rangé sous
+``blobs/<2 premiers caractères>/<empreinte><extension>``. Un même contenu
+n'est écrit qu'une fois : le téléverser à nouveau (la même pièce d'identité
+à chaque séjour) ne coûte que la lecture de ses octets. Chaque ligne `Blob`
+compte les fiches qui y font référence (voir `suivre_documents`) ; le
+fichier n'est supprimé qu'avec la dernière.
+
+L'enregistrement d'un contenu y prend aussitôt la référence de la fiche, et
+le retrait de la dernière référence verrouille la ligne : un blob ne peut
+pas disparaître entre l'écriture d'un fichier et son rattachement. L'écriture
+et la suppression d'un fichier sont en outre sérialisées par un verrou
+consultatif sur l'empreinte, la suppression n'ayant lieu que si aucune ligne
+ne désigne plus le fichier.
+
+`HachageUploadHandler` calcule l'empreinte pendant la réception des gros
+fichiers : le stockage n'a alors plus à les relire.
+"""
+import hashlib
+import os
+import tempfile
+
+from django.core.files import File
+from django.core.files.move import file_move_safe
+from django.core.files.storage import FileSystemStorage
+from django.core.files.uploadhandler import TemporaryFileUploadHandler
+from django.db import connection, transaction
+from django.db.models import F
+from django.db.models.signals import post_delete, post_init, post_save, pre_save
+from django.utils import timezone
+
+PREFIXE = 'blobs'
+TAILLE_BLOC = 64 * 1024
+
+
+class HachageUploadHandler(TemporaryFileUploadHandler):
+    """Écrit le fichier reçu sur disque (comme Django) en calculant son SHA-256"""
+
+    def new_file(self, *args, **kwargs):
+        super().new_file(*args, **kwargs)
+        self.hachage = hashlib.sha256()
+
+    def receive_data_chunk(self, raw_data, start):
+        self.hachage.update(raw_data)
+        return super().receive_data_chunk(raw_data, start)
+
+    def file_complete(self, file_size):
+        fichier = super().file_complete(file_size)
+        fichier.empreinte_sha256 = self.hachage.hexdigest()
+        return fichier
+
+
+class StockageDedoublonne(FileSystemStorage):
+    """FileSystemStorage adressé par contenu, avec compteur de références"""
+
+    def get_available_name(self, name, max_length=None):
+        # Le nom définitif dépend du contenu : il est choisi dans _save()
+        return name
+
+    def _hacher(self, content):
+        """
+        Retourne (empreinte, taille, chemin d'un fichier temporaire contenant
+        les données, True si ce fichier temporaire nous appartient).
+        """
+        if hasattr(content, 'temporary_file_path'):
+            chemin = content.temporary_file_path()
+            empreinte = getattr(content, 'empreinte_sha256', None)
+            if empreinte is None:
+                hachage = hashlib.sha256()
+                with open(chemin, 'rb') as source:
+                    for bloc in iter(lambda: source.read(TAILLE_BLOC), b''):
+                        hachage.update(bloc)
+                empreinte = hachage.hexdigest()
+            return empreinte, os.path.getsize(chemin), chemin, False
+
+        repertoire = self.path(os.path.join(PREFIXE, 'tmp'))
+        os.makedirs(repertoire, exist_ok=True)
+        hachage, taille = hashlib.sha256(), 0
+        with tempfile.NamedTemporaryFile(dir=repertoire, delete=False) as destination:
+            if hasattr(content, 'seek'):
+                content.seek(0)
+            for bloc in content.chunks(TAILLE_BLOC):
+                hachage.update(bloc)
+                destination.write(bloc)
+                taille += len(bloc)
+        return hachage.hexdigest(), taille, destination.name, True
+
+    def _enregistrer_blob(self, empreinte, nom_propose, taille):
+        """
+        Crée la ligne du blob si le contenu est nouveau et y ajoute une
+        référence ; retourne le nom du blob.
+        """
+        from .models import Blob  # Import différé (les models.py importent ce module)
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"""
+                INSERT INTO {Blob._meta.db_table} AS b (empreinte, nom, taille, nombre_references, date_creation)
+                VALUES (%s, %s, %s, 1, %s)
+                ON CONFLICT (empreinte) DO UPDATE SET nombre_references = b.nombre_references + 1
+                RETURNING nom
+                """,
+                [empreinte, nom_propose, taille, timezone.now()],
+            )
+            return cursor.fetchone()[0]
+
+    def _save(self, name, content):
+        empreinte, taille, temporaire, a_nous = self._hacher(content)
+        extension = os.path.splitext(name)[1].lower()[:10]
+        with transaction.atomic():
+            _verrouiller(empreinte)
+            nom = self._enregistrer_blob(empreinte, f"{PREFIXE}/{empreinte[:2]}/{empreinte}{extension}", taille)
+
+            chemin = self.path(nom)
+            if os.path.exists(chemin):
+                # Contenu déjà connu : rien à écrire. Le verrou garantit qu'une
+                # suppression en attente verra la ligne et gardera le fichier.
+                if a_nous:
+                    os.remove(temporaire)
+                return nom
+
+            # Contenu nouveau, ou blob recréé après la suppression de son fichier
+            os.makedirs(os.path.dirname(chemin), exist_ok=True)
+            if a_nous:
+                os.replace(temporaire, chemin)
+            else:
+                file_move_safe(temporaire, chemin, allow_overwrite=True)
+            if self.file_permissions_mode is not None:
+                os.chmod(chemin, self.file_permissions_mode)
+            return nom
+
+    def delete(self, name):
+        """Supprime le fichier seulement si plus aucune fiche n'y fait référence"""
+        from .models import Blob
+        with transaction.atomic():
+            blob = Blob.objects.select_for_update().filter(nom=name).first()
+            if blob is not None and blob.nombre_references > 0:
+                return
+            if blob is not None:
+                blob.delete()
+        _supprimer_fichier(self, name)
+
+
+def _verrouiller(empreinte):
+    """Verrou consultatif sur un contenu, jusqu'à la fin de la transaction"""
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT pg_advisory_xact_lock(hashtext(%s))", [empreinte])
+
+
+def _supprimer_fichier(storage, nom):
+    """Supprime le fichier d'un blob, sauf si une ligne le désigne de nouveau entre-temps"""
+    from .models import Blob
+    empreinte = os.path.splitext(os.path.basename(nom))[0]
+    with transaction.atomic():
+        _verrouiller(empreinte)
+        if not Blob.objects.filter(nom=nom).exists():
+            FileSystemStorage.delete(storage, nom)
+
+
+def referencer(nom):
+    """Ajoute une référence au blob `nom` (fichier déjà stocké, réaffecté à une autre fiche)"""
+    from .models import Blob
+    Blob.objects.filter(nom=nom).update(nombre_references=F('nombre_references') + 1)
+
+
+def liberer(nom, storage=None):
+    """Retire une référence au blob `nom` et supprime le fichier s'il n'est plus utilisé"""
+    from .models import Blob
+    storage = storage or stockage_documents
+    with transaction.atomic():
+        # Ligne verrouillée entre la décrémentation et la suppression
+        blob = Blob.objects.select_for_update().filter(nom=nom).first()
+        if blob is None:
+            return
+        blob.nombre_references -= 1
+        if blob.nombre_references > 0:
+            blob.save(update_fields=['nombre_references'])
+            return
+        blob.delete()
+        transaction.on_commit(lambda: _supprimer_fichier(storage, nom))
+
+
+stockage_documents = StockageDedoublonne()
+
+
+def get_stockage_documents():
+    """Callable pour `FileField(storage=...)` : garde les migrations indépendantes de l'instance"""
+    return stockage_documents
+
+
+def suivre_documents(modele, *champs):
+    """
+    Tient à jour le compteur de références des blobs : référence le nouveau
+    fichier d'un des `champs`, libère l'ancien, et libère le fichier courant
+    à la suppression de l'instance.
+    """
+    def a_stocker(sender, instance, **kwargs):
+        # Fichiers que save() va écrire : le stockage y prend alors lui-même la référence
+        instance._documents_stockes = {
+            champ for champ in champs
+            if isinstance(instance.__dict__.get(champ), File)
+            and not getattr(instance.__dict__[champ], '_committed', False)
+        }
+
+    def memoriser(sender, instance, **kwargs):
+        # __dict__ : ne pas provoquer de requête pour un champ différé
+        instance._documents_initiaux = {
+            champ: getattr(instance.__dict__.get(champ), 'name', instance.__dict__.get(champ))
+            for champ in champs
+        }
+
+    def enregistre(sender, instance, **kwargs):
+        stockes = getattr(instance, '_documents_stockes', ())
+        for champ in champs:
+            ancien = instance._documents_initiaux.get(champ)
+            fichier = getattr(instance, champ)
+            if (fichier.name or None) == (ancien or None) and champ not in stockes:
+                continue
+            if fichier and champ not in stockes:
+                referencer(fichier.name)
+            if ancien:
+                liberer(ancien, fichier.storage)
+        instance._documents_stockes = set()
+        memoriser(sender, instance)
+
+    def supprime(sender, instance, **kwargs):
+        for champ in champs:
+            fichier = getattr(instance, champ)
+            if fichier:
+                liberer(fichier.name, fichier.storage)
+
+    pre_save.connect(a_stocker, sender=modele, weak=False)
+    post_init.connect(memoriser, sender=modele, weak=False)
+    post_save.connect(enregistre, sender=modele, weak=False)
+    post_delete.connect(supprime, sender=modele, weak=False)
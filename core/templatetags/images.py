@@ -0,0 +1,16 @@
+# core/templatetags/images.py
+from django import template
+from core.images import url_derivee
+
+register = template.Library()
+
+
+@register.filter
+def miniature(fichier, format_image='webp'):
+    """{{ produit.image|miniature }} ou {{ produit.image|miniature:"jpeg" }}"""
+    return url_derivee(fichier, 'miniature', format_image)
+
+
+@register.filter
+def image_moyenne(fichier, format_image='webp'):
+    return url_derivee(fichier, 'moyenne', format_image)
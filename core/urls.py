@@ -0,0 +1,18 @@
+# core/urls.py
+from django.urls import path
+from . import views
+
+app_name = 'core'
+
+urlpatterns = [
+    path('configurations/', views.ConfigListView.as_view(), name='config_list'),
+    path('configurations/nouvelle/', views.ConfigCreateView.as_view(), name='config_create'),
+    path('configurations/<int:pk>/modifier/', views.ConfigUpdateView.as_view(), name='config_update'),
+    path('configurations/<int:pk>/supprimer/', views.ConfigDeleteView.as_view(), name='config_delete'),
+    path('journal/', views.LogListView.as_view(), name='log_list'),
+    path('notifications/', views.NotifListView.as_view(), name='notif_list'),
+    path('notifications/nouvelle/', views.NotifCreateView.as_view(), name='notif_create'),
+    path('notifications/<int:pk>/modifier/', views.NotifUpdateView.as_view(), name='notif_update'),
+    path('notifications/<int:pk>/supprimer/', views.NotifDeleteView.as_view(), name='notif_delete'),
+    path('evenements/', views.flux_evenements, name='evenements'),
+]
@@ -1,40 +1,46 @@
 # core/views.py
+import asyncio
+import json
+from django.contrib.auth.decorators import login_required
+from django.contrib.auth.mixins import LoginRequiredMixin
+from django.http import StreamingHttpResponse
 from django.views.generic import ListView, DetailView, CreateView, UpdateView, DeleteView
 from django.urls import reverse_lazy
+from .evenements import diffuseur
 from .models import SystemConfig, ActionLog, Notification
 from .forms import SystemConfigForm, ActionLogForm, NotificationForm
 
 
 # ==================== SYSTEM CONFIG ====================
-class ConfigListView(ListView):
+class ConfigListView(LoginRequiredMixin, ListView):
     model = SystemConfig
     template_name = 'core/config_list.html'
     context_object_name = 'configs'
     ordering = ['cle']
 
 
-class ConfigCreateView(CreateView):
+class ConfigCreateView(LoginRequiredMixin, CreateView):
     model = SystemConfig
     form_class = SystemConfigForm
     template_name = 'core/config_form.html'
     success_url = reverse_lazy('core:config_list')
 
 
-class ConfigUpdateView(UpdateView):
+class ConfigUpdateView(LoginRequiredMixin, UpdateView):
     model = SystemConfig
     form_class = SystemConfigForm
     template_name = 'core/config_form.html'
     success_url = reverse_lazy('core:config_list')
 
 
-class ConfigDeleteView(DeleteView):
+class ConfigDeleteView(LoginRequiredMixin, DeleteView):
     model = SystemConfig
     template_name = 'core/config_confirm_delete.html'
     success_url = reverse_lazy('core:config_list')
 
 
 # ==================== ACTION LOG ====================
-class LogListView(ListView):
+class LogListView(LoginRequiredMixin, ListView):
     model = ActionLog
     template_name = 'core/log_list.html'
     context_object_name = 'logs'
@@ -43,28 +49,63 @@ class LogListView(ListView):
 
 
 # ==================== NOTIFICATION ====================
-class NotifListView(ListView):
+class NotifListView(LoginRequiredMixin, ListView):
     model = Notification
     template_name = 'core/notif_list.html'
     context_object_name = 'notifications'
     ordering = ['-date']
 
 
-class NotifCreateView(CreateView):
+class NotifCreateView(LoginRequiredMixin, CreateView):
     model = Notification
     form_class = NotificationForm
     template_name = 'core/notif_form.html'
     success_url = reverse_lazy('core:notif_list')
 
 
-class NotifUpdateView(UpdateView):
+class NotifUpdateView(LoginRequiredMixin, UpdateView):
     model = Notification
     form_class = NotificationForm
     template_name = 'core/notif_form.html'
     success_url = reverse_lazy('core:notif_list')
 
 
-class NotifDeleteView(DeleteView):
+class NotifDeleteView(LoginRequiredMixin, DeleteView):
     model = Notification
     template_name = 'core/notif_confirm_delete.html'
-    success_url = reverse_lazy('core:notif_list')
\ No newline at end of file
+    success_url = reverse_lazy('core:notif_list')
+
+
+# ==================== ÉVÉNEMENTS (SSE) ====================
+INTERVALLE_PING = 15  # secondes : garde la connexion ouverte à travers les proxys
+
+
+@login_required
+async def flux_evenements(request):
+    """
+    Flux Server-Sent Events des changements (à servir en ASGI).
+
+    ``?types=chambre,reservation`` restreint les événements reçus.
+    """
+    types = {t for t in request.GET.get('types', '').split(',') if t}
+
+    async def evenements():
+        file = diffuseur.abonner()
+        try:
+            yield "retry: 3000\n\n"
+            while True:
+                try:
+                    message = await asyncio.wait_for(file.get(), timeout=INTERVALLE_PING)
+                except asyncio.TimeoutError:
+                    yield ": ping\n\n"
+                    continue
+                type_evenement = json.loads(message)['type']
+                if not types or type_evenement in types:
+                    yield f"event: {type_evenement}\ndata: {message}\n\n"
+        finally:
+            diffuseur.desabonner(file)
+
+    response = StreamingHttpResponse(evenements(), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
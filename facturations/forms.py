@@ -1,18 +1,18 @@
 from django import forms
-from .models import Facture
+from .models import Facture, Paiement
 
 class FactureForm(forms.ModelForm):
     class Meta:
         model = Facture
         fields = [
-            'client', 'reservation', 'commande_resto', 'commande_bar',
+            'client', 'reservation', 'commande_resto', 'commandes',
             'montant_total', 'statut', 'notes'
         ]
         labels = {
             'client': "Client",
             'reservation': "Réservation (optionnelle)",
             'commande_resto': "Commande restaurant (optionnelle)",
-            'commande_bar': "Commande bar (optionnelle)",
+            'commandes': "Commandes resto/bar reportées (optionnelles)",
             'montant_total': "Montant total",
             'statut': "Statut de la facture",
             'notes': "Notes",
@@ -26,10 +26,28 @@ class FactureForm(forms.ModelForm):
         cleaned_data = super().clean()
         reservation = cleaned_data.get('reservation')
         commande_resto = cleaned_data.get('commande_resto')
-        commande_bar = cleaned_data.get('commande_bar')
+        commandes = cleaned_data.get('commandes')
 
-        if not reservation and not commande_resto and not commande_bar:
+        if not reservation and not commande_resto and not commandes:
             raise forms.ValidationError(
                 "Vous devez lier la facture à une réservation, une commande restaurant ou une commande bar."
             )
         return cleaned_data
+
+
+class PaiementForm(forms.ModelForm):
+    class Meta:
+        model = Paiement
+        fields = ['facture', 'montant', 'mode_paiement', 'reference']
+        labels = {
+            'facture': "Facture",
+            'montant': "Montant",
+            'mode_paiement': "Mode de paiement",
+            'reference': "Référence (optionnelle)",
+        }
+
+    def clean_montant(self):
+        montant = self.cleaned_data['montant']
+        if montant <= 0:
+            raise forms.ValidationError("Le montant doit être positif.")
+        return montant
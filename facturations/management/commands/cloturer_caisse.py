@@ -0,0 +1,23 @@
+from datetime import timedelta
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+from facturations.rapports import cloturer_caisse
+
+
+class Command(BaseCommand):
+    help = "Clôture une journée de caisse (la veille par défaut) et fige ses totaux"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--jour', type=parse_date, help="Journée à clôturer (AAAA-MM-JJ), la veille par défaut")
+
+    def handle(self, *args, **options):
+        jour = options['jour'] or timezone.localdate() - timedelta(days=1)
+        try:
+            rapport = cloturer_caisse(jour)
+        except ValidationError as erreur:
+            raise CommandError(erreur.messages[0])
+        self.stdout.write(self.style.SUCCESS(
+            f"Caisse du {jour:%d/%m/%Y} clôturée : {rapport.nombre_paiements} paiement(s), {rapport.montant_total}."
+        ))
@@ -0,0 +1,27 @@
+from datetime import datetime
+from django.core.management.base import BaseCommand, CommandError
+from facturations.pdf import factures_du_mois, flux_zip
+
+
+def mois(valeur):
+    return datetime.strptime(valeur, '%Y-%m')
+
+
+class Command(BaseCommand):
+    help = "Exporte les factures PDF d'un mois dans une archive ZIP (rendu en parallèle, mis en cache)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('mois', type=mois, help="Mois à exporter (AAAA-MM)")
+        parser.add_argument('--sortie', help="Fichier ZIP produit, factures_AAAA_MM.zip par défaut")
+        parser.add_argument('--processus', type=int, help="Nombre de processus de rendu")
+
+    def handle(self, *args, **options):
+        debut = options['mois']
+        sortie = options['sortie'] or f"factures_{debut:%Y_%m}.zip"
+        factures = factures_du_mois(debut.year, debut.month)
+        if not factures.exists():
+            raise CommandError(f"Aucune facture en {debut:%m/%Y}.")
+        with open(sortie, 'wb') as fichier:
+            for morceau in flux_zip(factures, travailleurs=options['processus']):
+                fichier.write(morceau)
+        self.stdout.write(self.style.SUCCESS(f"{factures.count()} facture(s) exportée(s) dans {sortie}."))
@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+from django.utils.dateparse import parse_date
+from facturations.services import facturer_departs
+
+
+class Command(BaseCommand):
+    help = "Crée les factures de séjour des départs du jour (hébergement et consommations resto/bar)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--jour', type=parse_date, help="Date de départ (AAAA-MM-JJ), aujourd'hui par défaut")
+
+    def handle(self, *args, **options):
+        factures = facturer_departs(jour=options['jour'])
+        total = sum(facture.montant_total for facture in factures)
+        self.stdout.write(self.style.SUCCESS(f"{len(factures)} facture(s) créée(s), {total} au total."))
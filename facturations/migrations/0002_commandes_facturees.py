@@ -0,0 +1,19 @@
+# Generated by Django 5.2.5 on 2026-10-18 18:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('facturations', '0001_initial'),
+        ('resto', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='facture',
+            name='commandes',
+            field=models.ManyToManyField(blank=True, help_text='Consommations resto/bar reportées sur la facture', related_name='factures', to='resto.commande'),
+        ),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 5.2.5 on 2026-10-18 18:51
+
+import django.db.models.expressions
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('clients', '0006_stockage_documents'),
+        ('facturations', '0002_commandes_facturees'),
+        ('reservations', '0006_index_recherche'),
+        ('resto', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='facture',
+            name='montant_paye',
+            field=models.DecimalField(decimal_places=2, default=0, editable=False, max_digits=10),
+        ),
+        # Montants déjà encaissés avant l'ajout de la colonne
+        migrations.RunSQL(
+            """
+            UPDATE factures f SET montant_paye = p.total
+            FROM (SELECT facture_id, SUM(montant) AS total FROM paiements GROUP BY facture_id) p
+            WHERE p.facture_id = f.id
+            """,
+            migrations.RunSQL.noop,
+        ),
+        migrations.AddField(
+            model_name='facture',
+            name='solde',
+            field=models.GeneratedField(db_persist=True, expression=django.db.models.expressions.CombinedExpression(models.F('montant_total'), '-', models.F('montant_paye')), output_field=models.DecimalField(decimal_places=2, max_digits=10)),
+        ),
+        migrations.AddIndex(
+            model_name='facture',
+            index=models.Index(condition=models.Q(('solde__gt', 0), models.Q(('statut', 'annulee'), _negated=True)), fields=['date_creation'], name='factures_impayees_idx'),
+        ),
+    ]
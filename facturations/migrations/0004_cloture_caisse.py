@@ -0,0 +1,40 @@
+# Generated by Django 5.2.5 on 2026-10-18 18:55
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('facturations', '0003_montant_paye_solde'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ClotureCaisse',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('jour', models.DateField(unique=True)),
+                ('nombre_paiements', models.IntegerField(default=0)),
+                ('montant_total', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('lignes', models.JSONField(default=list)),
+                ('date_cloture', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'db_table': 'clotures_caisse',
+                'ordering': ['-jour'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='paiement',
+            index=models.Index(fields=['date_paiement'], include=('mode_paiement', 'effectue_par', 'montant'), name='paiements_date_idx'),
+        ),
+        migrations.AddField(
+            model_name='cloturecaisse',
+            name='cloture_par',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='clotures_caisse', to=settings.AUTH_USER_MODEL),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.5 on 2026-10-18 19:09
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('facturations', '0004_cloture_caisse'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='GenerationCaisse',
+            fields=[
+                ('jour', models.DateField(primary_key=True, serialize=False)),
+                ('generation', models.BigIntegerField(default=0)),
+            ],
+            options={
+                'db_table': 'caisse_generations',
+            },
+        ),
+    ]
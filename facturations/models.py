@@ -1,9 +1,15 @@
+from django.core.exceptions import ValidationError
 from django.db import models
+from django.db.models import F
+from django.db.models.signals import post_delete, post_init, post_save, pre_delete, pre_save
+from django.dispatch import receiver
 from django.utils import timezone
 from clients.models import Client
+from clients.statistiques import suivre_statistiques
 from reservations.models import Reservation
 from resto.models import Commande
 from accounts.models import User
+from core.numerotation import prochain_numero
 
 class Facture(models.Model):
     """Factures pour les clients"""
@@ -17,24 +23,48 @@ class Facture(models.Model):
     client = models.ForeignKey(Client, on_delete=models.PROTECT, related_name='factures')
     reservation = models.ForeignKey(Reservation, on_delete=models.SET_NULL, null=True, blank=True, related_name='factures')
     commande_resto = models.ForeignKey(Commande, on_delete=models.SET_NULL, null=True, blank=True, related_name='factures_resto')
+    commandes = models.ManyToManyField(Commande, blank=True, related_name='factures', help_text="Consommations resto/bar reportées sur la facture")
     date_creation = models.DateTimeField(auto_now_add=True)
     date_modification = models.DateTimeField(auto_now=True)
     montant_total = models.DecimalField(max_digits=10, decimal_places=2)
+    # Tenu à jour par les signaux de Paiement (voir appliquer_paiement), jamais par save()
+    montant_paye = models.DecimalField(max_digits=10, decimal_places=2, default=0, editable=False)
+    solde = models.GeneratedField(
+        expression=F('montant_total') - F('montant_paye'),
+        output_field=models.DecimalField(max_digits=10, decimal_places=2),
+        db_persist=True,
+    )
     statut = models.CharField(max_length=20, choices=STATUT_CHOICES, default='en_attente')
     notes = models.TextField(blank=True)
     
     class Meta:
         db_table = 'factures'
         ordering = ['-date_creation']
+        indexes = [
+            # Balance âgée : seules les factures avec un reste à payer sont lues
+            models.Index(
+                fields=['date_creation'],
+                name='factures_impayees_idx',
+                condition=models.Q(solde__gt=0) & ~models.Q(statut='annulee'),
+            ),
+        ]
     
     def save(self, *args, **kwargs):
         if not self.numero_facture:
-            self.numero_facture = f"FAC{timezone.now().strftime('%Y%m%d%H%M%S')}"
+            self.numero_facture = prochain_numero('FAC')
+        if not self._state.adding and kwargs.get('update_fields') is None:
+            # La valeur en mémoire peut dater d'avant un paiement : ne pas l'écraser
+            kwargs['update_fields'] = [
+                champ.name for champ in self._meta.concrete_fields
+                if not champ.primary_key and not champ.generated and champ.name != 'montant_paye'
+            ]
         super().save(*args, **kwargs)
     
     def __str__(self):
         return f"Facture {self.numero_facture} - {self.client.nom_complet}"
 
+suivre_statistiques(Facture)
+
 class Paiement(models.Model):
     """Paiements des factures"""
     MODE_CHOICES = [
@@ -53,4 +83,106 @@ class Paiement(models.Model):
     
     class Meta:
         db_table = 'paiements'
-        ordering = ['-date_paiement']
\ No newline at end of file
+        ordering = ['-date_paiement']
+        indexes = [
+            # Clôture de caisse : lecture d'une journée sans accès à la table
+            models.Index(
+                fields=['date_paiement'],
+                include=['mode_paiement', 'effectue_par', 'montant'],
+                name='paiements_date_idx',
+            ),
+        ]
+
+    @property
+    def jour_caisse(self):
+        """Journée de caisse du paiement (aujourd'hui s'il n'est pas encore enregistré)"""
+        return timezone.localdate(self.date_paiement or timezone.now())
+
+    def verifier_journee_ouverte(self):
+        """Lève ``ValidationError`` si la journée de caisse du paiement est clôturée"""
+        if ClotureCaisse.objects.filter(jour=self.jour_caisse).exists():
+            raise ValidationError(
+                f"La caisse du {self.jour_caisse:%d/%m/%Y} est clôturée : ses paiements ne peuvent plus être modifiés."
+            )
+
+    def clean(self):
+        self.verifier_journee_ouverte()
+
+def appliquer_paiement(facture_id, montant):
+    """Ajoute `montant` (négatif pour un retrait) au montant payé de la facture, sans la relire"""
+    if facture_id and montant:
+        # update() ne déclenche pas auto_now : date_modification sert de version
+        # aux PDF mis en cache (facturations.pdf.cle_pdf)
+        Facture.objects.filter(pk=facture_id).update(
+            montant_paye=F('montant_paye') + montant, date_modification=timezone.now()
+        )
+
+@receiver(pre_save, sender=Paiement)
+@receiver(pre_delete, sender=Paiement)
+def proteger_journee_cloturee(sender, instance, **kwargs):
+    """Les totaux figés d'une clôture ne doivent plus diverger des paiements"""
+    instance.verifier_journee_ouverte()
+
+@receiver(post_init, sender=Paiement)
+def memoriser_paiement(sender, instance, **kwargs):
+    """Conserve la facture et le montant chargés pour n'appliquer que l'écart"""
+    # __dict__ : ne pas provoquer de requête pour un champ différé
+    instance._paiement_initial = (instance.__dict__.get('facture_id'), instance.__dict__.get('montant'))
+
+@receiver(post_save, sender=Paiement)
+def cumuler_paiement(sender, instance, created, **kwargs):
+    """Reporte le paiement (ou sa modification) sur le montant payé des factures"""
+    facture_initiale, montant_initial = (None, None) if created else instance._paiement_initial
+    if facture_initiale == instance.facture_id:
+        appliquer_paiement(instance.facture_id, instance.montant - (montant_initial or 0))
+    else:
+        appliquer_paiement(facture_initiale, -(montant_initial or 0))
+        appliquer_paiement(instance.facture_id, instance.montant)
+    instance._paiement_initial = (instance.facture_id, instance.montant)
+
+@receiver(post_delete, sender=Paiement)
+def retirer_paiement(sender, instance, **kwargs):
+    """Retire le paiement supprimé du montant payé de sa facture"""
+    appliquer_paiement(instance.facture_id, -instance.montant)
+
+@receiver(post_save, sender=Paiement)
+@receiver(post_delete, sender=Paiement)
+def invalider_caisse(sender, instance, created=False, **kwargs):
+    """Un paiement modifié ou supprimé oblige à recalculer sa journée de caisse"""
+    if not created:
+        from .rapports import invalider_journee_caisse  # Import différé (rapports importe ce module)
+        invalider_journee_caisse(instance.jour_caisse)
+
+suivre_statistiques(
+    Paiement,
+    client_de=lambda paiement: Facture.objects.filter(pk=paiement.facture_id).values_list('client_id', flat=True).first(),
+)
+
+class ClotureCaisse(models.Model):
+    """Totaux figés d'une journée de caisse clôturée"""
+    jour = models.DateField(unique=True)
+    nombre_paiements = models.IntegerField(default=0)
+    montant_total = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    # Lignes du rapport (par mode et caissier, sous-totaux par mode), voir facturations.rapports
+    lignes = models.JSONField(default=list)
+    cloture_par = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='clotures_caisse')
+    date_cloture = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        db_table = 'clotures_caisse'
+        ordering = ['-jour']
+
+    def __str__(self):
+        return f"Clôture du {self.jour:%d/%m/%Y} - {self.montant_total}"
+
+class GenerationCaisse(models.Model):
+    """
+    Génération des totaux en cache d'une journée de caisse, incrémentée à
+    chaque paiement modifié ou supprimé : gardée en base pour que tous les
+    processus voient l'invalidation, quel que soit le cache configuré.
+    """
+    jour = models.DateField(primary_key=True)
+    generation = models.BigIntegerField(default=0)
+
+    class Meta:
+        db_table = 'caisse_generations'
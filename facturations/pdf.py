@@ -0,0 +1,271 @@
+# facturations/pdf.py
+"""
+Rendu des factures en PDF et export mensuel en archive ZIP.
+
+Le rendu (gabarit HTML puis conversion par WeasyPrint) est coûteux en CPU :
+pour l'export, il est confié à un pool de processus dont chaque travailleur compile le
+gabarit une seule fois, à son démarrage. Les travailleurs ne touchent pas à
+la base : le processus principal leur envoie des contextes déjà construits,
+par lots, avec les lignes de chaque facture chargées en quelques requêtes.
+
+Chaque PDF est gardé en stockage sous une clé dérivée de
+``(id de la facture, date_modification)`` : une facture inchangée n'est
+jamais rendue deux fois, une facture modifiée l'est à nouveau. L'archive du
+mois est produite au fil de l'eau, un PDF après l'autre, sans jamais être
+assemblée en mémoire.
+
+Le code exécuté par les travailleurs est dans facturations.rendu.
+WeasyPrint requiert en outre les bibliothèques système Pango.
+"""
+import multiprocessing
+import posixpath
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db.models import Prefetch
+from django.template.loader import get_template
+from django.utils import timezone
+
+from core.models import SystemConfig
+from resto.models import CommandeItem
+from .models import Facture, Paiement
+from .rendu import GABARIT, initialiser_travailleur, rendre, weasyprint
+from .services import depart_facture
+
+PREFIXE = 'factures_pdf'
+TAILLE_LOT = 50
+TAILLE_BLOC = 64 * 1024
+# Clés de SystemConfig reprises dans l'en-tête des factures
+CLES_HOTEL = ('nom_hotel', 'adresse_hotel', 'telephone_hotel', 'email_hotel')
+
+def cle_pdf(facture_id, date_modification):
+    """Clé de stockage du PDF d'une version de facture"""
+    return f"{PREFIXE}/{facture_id}/{date_modification:%Y%m%d%H%M%S%f}.pdf"
+
+
+def _memoriser(cle, contenu, storage):
+    """Enregistre le PDF rendu et supprime ceux des versions précédentes"""
+    storage.save(cle, ContentFile(contenu))
+    dossier = posixpath.dirname(cle)
+    for nom in storage.listdir(dossier)[1]:
+        if nom != posixpath.basename(cle):
+            storage.delete(f"{dossier}/{nom}")
+
+
+def _hotel():
+    valeurs = dict(SystemConfig.objects.filter(cle__in=CLES_HOTEL).values_list('cle', 'valeur'))
+    return {cle.removesuffix('_hotel'): valeurs.get(cle, '') for cle in CLES_HOTEL}
+
+
+def _factures():
+    """Factures avec tout ce que le gabarit affiche (requêtes par lot, pas par facture)"""
+    return (
+        Facture.objects
+        .select_related('client', 'reservation__chambre')
+        .prefetch_related(
+            Prefetch('commandes__items', queryset=CommandeItem.objects.select_related('produit')),
+            Prefetch('commande_resto__items', queryset=CommandeItem.objects.select_related('produit')),
+            Prefetch('paiements', queryset=Paiement.objects.order_by('date_paiement')),
+        )
+    )
+
+
+def contexte_facture(facture, hotel):
+    """Contexte du gabarit, en types simples (envoyé tel quel aux travailleurs)"""
+    reservation = facture.reservation
+    hebergement = None
+    if reservation is not None:
+        # Même période que celle facturée (facturations.services._facturer)
+        depart = depart_facture(reservation.date_depart, reservation.date_checkout)
+        nuits = max((depart - reservation.date_arrivee).days, 0)
+        hebergement = {
+            'chambre': reservation.chambre.numero,
+            'date_arrivee': reservation.date_arrivee,
+            'date_depart': depart,
+            'nuits': nuits,
+            'prix_par_nuit': reservation.prix_par_nuit,
+            'montant': reservation.prix_par_nuit * nuits,
+        }
+    commandes = list(facture.commandes.all())
+    if facture.commande_resto is not None and facture.commande_resto not in commandes:
+        commandes.append(facture.commande_resto)
+    return {
+        'hotel': hotel,
+        'facture': {
+            'numero': facture.numero_facture,
+            'date': timezone.localtime(facture.date_creation).date(),
+            'statut': facture.get_statut_display(),
+            'notes': facture.notes,
+            'montant_total': facture.montant_total,
+            'montant_paye': facture.montant_paye,
+            'solde': facture.solde,
+        },
+        'client': {
+            'nom': facture.client.nom_complet,
+            'adresse': facture.client.adresse,
+            'ville': facture.client.ville,
+            'pays': facture.client.pays,
+        },
+        'hebergement': hebergement,
+        'commandes': [
+            {
+                'numero': commande.numero_commande,
+                'date': timezone.localtime(commande.date_commande).date(),
+                'service': commande.get_type_service_display(),
+                'lignes': [
+                    {
+                        'produit': item.produit.nom,
+                        'quantite': item.quantite,
+                        'prix_unitaire': item.prix_unitaire,
+                        'montant': item.quantite * item.prix_unitaire,
+                    }
+                    for item in commande.items.all()
+                ],
+            }
+            for commande in commandes
+        ],
+        'paiements': [
+            {
+                'date': timezone.localtime(paiement.date_paiement).date(),
+                'mode': paiement.get_mode_paiement_display(),
+                'reference': paiement.reference,
+                'montant': paiement.montant,
+            }
+            for paiement in facture.paiements.all()
+        ],
+    }
+
+
+class RenduFactures:
+    """
+    Pool de processus de rendu, à utiliser comme gestionnaire de contexte ;
+    le pool n'est démarré qu'au premier PDF réellement à rendre.
+    """
+
+    def __init__(self, travailleurs=None, storage=None):
+        self.travailleurs = travailleurs or getattr(settings, 'FACTURES_PDF_PARALLELES', 2)
+        self.storage = storage or default_storage
+        self._pool = None
+        self._hotel = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        if self._pool is not None:
+            self._pool.shutdown(cancel_futures=True)
+
+    def _executeur(self):
+        if self._pool is None:
+            # Échoue ici, dans le processus appelant, plutôt que dans chaque travailleur
+            weasyprint()
+            # spawn : pas de fork d'un processus qui détient des connexions et des threads
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.travailleurs,
+                mp_context=multiprocessing.get_context('spawn'),
+                initializer=initialiser_travailleur,
+            )
+        return self._pool
+
+    def preparer(self, factures):
+        """
+        Garantit que le PDF de chaque facture du lot est en stockage ;
+        retourne ``[(facture, clé), ...]`` dans l'ordre du lot.
+        """
+        cles = [(facture, cle_pdf(facture.pk, facture.date_modification)) for facture in factures]
+        a_rendre = [(facture, cle) for facture, cle in cles if not self.storage.exists(cle)]
+        if a_rendre:
+            if self._hotel is None:
+                self._hotel = _hotel()
+            rendus = self._executeur().map(
+                rendre, [contexte_facture(facture, self._hotel) for facture, _ in a_rendre]
+            )
+            for (facture, cle), contenu in zip(a_rendre, rendus):
+                _memoriser(cle, contenu, self.storage)
+        return cles
+
+
+def pdf_facture(facture, storage=None):
+    """
+    Nom en stockage du PDF d'une facture (rendu si besoin) ; pour une seule
+    facture, le rendu a lieu dans le processus appelant, sans pool.
+    """
+    storage = storage or default_storage
+    facture = _factures().get(pk=getattr(facture, 'pk', facture))
+    cle = cle_pdf(facture.pk, facture.date_modification)
+    if not storage.exists(cle):
+        html = get_template(GABARIT).render(contexte_facture(facture, _hotel()))
+        _memoriser(cle, weasyprint().HTML(string=html).write_pdf(), storage)
+    return cle
+
+
+def factures_du_mois(annee, mois):
+    """Factures non annulées émises pendant le mois, dans l'ordre de numérotation"""
+    debut = date(annee, mois, 1)
+    fin = date(annee + mois // 12, mois % 12 + 1, 1)
+    return (
+        _factures()
+        .filter(date_creation__date__gte=debut, date_creation__date__lt=fin)
+        .exclude(statut='annulee')
+        .order_by('numero_facture')
+    )
+
+
+class _Flux:
+    """Fichier en écriture seule, non positionnable, vidé à chaque morceau produit"""
+
+    def __init__(self):
+        self._morceaux = []
+
+    def write(self, donnees):
+        self._morceaux.append(bytes(donnees))
+        return len(donnees)
+
+    def flush(self):
+        pass
+
+    def vider(self):
+        donnees = b''.join(self._morceaux)
+        self._morceaux = []
+        return donnees
+
+
+def flux_zip(factures, taille_lot=TAILLE_LOT, travailleurs=None, storage=None):
+    """
+    Archive ZIP des PDF des `factures`, produite morceau par morceau.
+
+    Les factures sont lues et rendues par lots de `taille_lot` : la mémoire
+    utilisée ne dépend ni du nombre de factures ni de la taille de l'archive.
+    Les PDF étant déjà compressés, ils sont stockés sans recompression.
+    """
+    storage = storage or default_storage
+    flux = _Flux()
+    with RenduFactures(travailleurs=travailleurs, storage=storage) as rendu, \
+            zipfile.ZipFile(flux, 'w', compression=zipfile.ZIP_STORED) as archive:
+        lot = []
+        for facture in factures.iterator(chunk_size=taille_lot):
+            lot.append(facture)
+            if len(lot) < taille_lot:
+                continue
+            yield from _archiver(rendu.preparer(lot), archive, flux, storage)
+            lot = []
+        if lot:
+            yield from _archiver(rendu.preparer(lot), archive, flux, storage)
+    yield flux.vider()
+
+
+def _archiver(cles, archive, flux, storage):
+    for facture, cle in cles:
+        entree = zipfile.ZipInfo(
+            f"{facture.numero_facture}.pdf",
+            date_time=timezone.localtime(facture.date_modification).timetuple()[:6],
+        )
+        with storage.open(cle, 'rb') as source, archive.open(entree, 'w') as destination:
+            for bloc in iter(lambda: source.read(TAILLE_BLOC), b''):
+                destination.write(bloc)
+                yield flux.vider()
+        yield flux.vider()
@@ -0,0 +1,255 @@
+# facturations/rapports.py
+"""
+Rapports de facturation.
+
+La balance âgée répartit le reste à payer des factures par ancienneté
+(0–30, 31–60, 61–90 et plus de 90 jours depuis l'émission). Elle est
+calculée en un seul GROUP BY par client, avec une somme filtrée par
+tranche, sur les seules factures avec un solde (index partiel
+`factures_impayees_idx`).
+
+La clôture de caisse totalise les paiements d'une journée par mode de
+paiement et par caissier, avec sous-totaux et total général, en une requête
+``GROUP BY ROLLUP`` servie par l'index couvrant `paiements_date_idx`. Une
+journée clôturée est figée dans `ClotureCaisse` : la consulter ensuite ne
+coûte que la lecture d'une ligne. Pour une journée ouverte, les totaux des
+paiements de plus de quelques minutes sont gardés en cache et seuls les
+paiements plus récents sont relus à chaque consultation ; la clé de cache
+porte la génération de la journée (`GenerationCaisse`), tenue en base.
+"""
+from collections import namedtuple
+from datetime import datetime, time, timedelta
+from decimal import Decimal
+
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.db import IntegrityError, connection, transaction
+from django.db.models import Count, Q, Sum
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from accounts.models import User
+from core.models import ActionLog
+from .models import ClotureCaisse, Facture, GenerationCaisse, Paiement
+
+# (clé, libellé, ancienneté minimale en jours, ancienneté maximale en jours)
+TRANCHES = [
+    ('j0_30', "0–30 jours", 0, 30),
+    ('j31_60', "31–60 jours", 31, 60),
+    ('j61_90', "61–90 jours", 61, 90),
+    ('plus_90', "Plus de 90 jours", 91, None),
+]
+
+LigneBalance = namedtuple('LigneBalance', ['client_id', 'client', 'nombre_factures', *(t[0] for t in TRANCHES), 'total'])
+
+
+def _filtre_tranche(reference, minimum, maximum):
+    """Factures émises il y a entre `minimum` et `maximum` jours (bornes incluses)"""
+    # Une facture émise le jour J a 0 jour d'ancienneté jusqu'à J+1 minuit
+    filtre = Q(date_creation__date__lte=reference - timedelta(days=minimum))
+    if maximum is not None:
+        filtre &= Q(date_creation__date__gte=reference - timedelta(days=maximum))
+    return filtre
+
+
+def balance_agee(date_reference=None):
+    """
+    Reste à payer par client et par tranche d'ancienneté au `date_reference`
+    (aujourd'hui par défaut), des plus gros encours aux plus petits.
+    """
+    reference = date_reference or timezone.localdate()
+    zero = Decimal('0')
+    lignes = (
+        Facture.objects
+        .filter(solde__gt=0, date_creation__date__lte=reference)
+        .exclude(statut='annulee')
+        .order_by()
+        .values('client_id', 'client__prenom', 'client__nom')
+        .annotate(
+            nombre_factures=Count('pk'),
+            total=Sum('solde'),
+            **{
+                cle: Coalesce(Sum('solde', filter=_filtre_tranche(reference, minimum, maximum)), zero)
+                for cle, _, minimum, maximum in TRANCHES
+            },
+        )
+        .order_by('-total', 'client_id')
+    )
+    return [
+        LigneBalance(
+            client_id=ligne['client_id'],
+            client=f"{ligne['client__prenom']} {ligne['client__nom']}",
+            nombre_factures=ligne['nombre_factures'],
+            total=ligne['total'],
+            **{cle: ligne[cle] for cle, *_ in TRANCHES},
+        )
+        for ligne in lignes
+    ]
+
+
+def totaux_balance(lignes):
+    """Totaux par tranche (et général) d'une balance âgée"""
+    cles = [cle for cle, *_ in TRANCHES] + ['total']
+    return {cle: sum((getattr(ligne, cle) for ligne in lignes), Decimal('0')) for cle in cles}
+
+
+# ==================== CLÔTURE DE CAISSE ====================
+# Un paiement plus récent peut appartenir à une transaction pas encore
+# validée : il est relu à chaque consultation au lieu d'être mis en cache
+MARGE_CAISSE = timedelta(minutes=5)
+DUREE_CACHE_CAISSE = 2 * 24 * 60 * 60
+# Valeur de GROUPING(mode_paiement, effectue_par_id) -> niveau de la ligne
+NIVEAUX_CAISSE = {0: 'caissier', 1: 'mode', 3: 'total'}
+
+LigneCaisse = namedtuple('LigneCaisse', ['niveau', 'mode_paiement', 'effectue_par_id', 'effectue_par', 'nombre', 'montant'])
+RapportCaisse = namedtuple('RapportCaisse', ['jour', 'lignes', 'nombre_paiements', 'montant_total', 'cloture'])
+
+
+def _bornes(jour):
+    """Début et fin (exclue) de la journée locale"""
+    debut = timezone.make_aware(datetime.combine(jour, time.min))
+    return debut, timezone.make_aware(datetime.combine(jour + timedelta(days=1), time.min))
+
+
+def _agreger_caisse(debut, fin, limite):
+    """
+    Totaux ROLLUP des paiements de [debut, fin), séparés entre ceux
+    antérieurs à `limite` (stables) et les autres ; chaque partie est un
+    dictionnaire ``{(niveau, mode, caissier): [nom, nombre, montant]}``.
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"""
+            SELECT p.stable,
+                   GROUPING(p.mode_paiement, p.effectue_par_id),
+                   p.mode_paiement, p.effectue_par_id, u.username,
+                   COUNT(*), SUM(p.montant)
+            FROM (
+                SELECT mode_paiement, effectue_par_id, montant, date_paiement < %(limite)s AS stable
+                FROM {Paiement._meta.db_table}
+                WHERE date_paiement >= %(debut)s AND date_paiement < %(fin)s
+            ) p
+            LEFT JOIN {User._meta.db_table} u ON u.id = p.effectue_par_id
+            GROUP BY p.stable, ROLLUP(p.mode_paiement, (p.effectue_par_id, u.username))
+            """,
+            {'debut': debut, 'fin': fin, 'limite': limite},
+        )
+        stables, recents = {}, {}
+        for stable, grouping, mode, caissier, nom, nombre, montant in cursor.fetchall():
+            (stables if stable else recents)[(NIVEAUX_CAISSE[grouping], mode, caissier)] = [nom, nombre, montant]
+    return stables, recents
+
+
+def _fusionner(groupes, ajouts):
+    """Somme de deux résultats de `_agreger_caisse` (les lignes ROLLUP s'additionnent)"""
+    resultat = {cle: list(valeurs) for cle, valeurs in groupes.items()}
+    for cle, (nom, nombre, montant) in ajouts.items():
+        if cle in resultat:
+            resultat[cle][1] += nombre
+            resultat[cle][2] += montant
+        else:
+            resultat[cle] = [nom, nombre, montant]
+    return resultat
+
+
+def _rapport(jour, groupes, cloture=None):
+    modes = dict(Paiement.MODE_CHOICES)
+    lignes = sorted(
+        (
+            LigneCaisse(niveau, mode, caissier, nom or '', nombre, montant)
+            for (niveau, mode, caissier), (nom, nombre, montant) in groupes.items()
+            if niveau != 'total'
+        ),
+        # Chaque mode : ses caissiers, puis son sous-total
+        key=lambda ligne: (modes.get(ligne.mode_paiement, ligne.mode_paiement), ligne.niveau == 'mode', ligne.effectue_par),
+    )
+    _, nombre, montant = groupes.get(('total', None, None), [None, 0, Decimal('0')])
+    return RapportCaisse(jour, lignes, nombre, montant, cloture)
+
+
+def _cle_cache_caisse(jour):
+    """Clé de l'état en cache de la journée ; change à chaque invalidation"""
+    generation = GenerationCaisse.objects.filter(pk=jour).values_list('generation', flat=True).first() or 0
+    return f"facturations:caisse:{jour}:{generation}"
+
+
+def invalider_journee_caisse(jour):
+    """Oublie les totaux en cache de la journée (paiement modifié ou supprimé)"""
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"""
+            INSERT INTO {GenerationCaisse._meta.db_table} AS g (jour, generation) VALUES (%s, 1)
+            ON CONFLICT (jour) DO UPDATE SET generation = g.generation + 1
+            """,
+            [jour],
+        )
+
+
+def journee_caisse(jour=None):
+    """
+    Rapport de caisse du `jour` (aujourd'hui par défaut) : une ligne par
+    mode de paiement et caissier, un sous-total par mode, le total général.
+
+    Journée clôturée : lu depuis `ClotureCaisse`. Sinon, seuls les paiements
+    postérieurs à l'état en cache sont agrégés (tous au premier appel).
+    """
+    jour = jour or timezone.localdate()
+    cloture = ClotureCaisse.objects.filter(jour=jour).first()
+    if cloture is not None:
+        return _depuis_cloture(cloture)
+
+    debut, fin = _bornes(jour)
+    cle = _cle_cache_caisse(jour)
+    etat = cache.get(cle) or {'stable_jusqu_a': debut, 'groupes': {}}
+    if etat['stable_jusqu_a'] >= fin:
+        # Journée passée entièrement en cache
+        return _rapport(jour, etat['groupes'])
+
+    limite = max(min(timezone.now() - MARGE_CAISSE, fin), etat['stable_jusqu_a'])
+    stables, recents = _agreger_caisse(etat['stable_jusqu_a'], fin, limite)
+    groupes = _fusionner(etat['groupes'], stables)
+    cache.set(cle, {'stable_jusqu_a': limite, 'groupes': groupes}, DUREE_CACHE_CAISSE)
+    return _rapport(jour, _fusionner(groupes, recents))
+
+
+def _depuis_cloture(cloture):
+    lignes = [
+        LigneCaisse(**{**ligne, 'montant': Decimal(ligne['montant'])})
+        for ligne in cloture.lignes
+    ]
+    return RapportCaisse(cloture.jour, lignes, cloture.nombre_paiements, cloture.montant_total, cloture)
+
+
+def cloturer_caisse(jour=None, utilisateur=None):
+    """
+    Clôture la journée (la veille par défaut) : ses totaux sont recalculés
+    en une requête puis figés dans `ClotureCaisse`. Lève ``ValidationError``
+    si elle n'est pas encore terminée ou déjà clôturée ; une fois clôturée,
+    ses paiements ne peuvent plus être modifiés (`Paiement.verifier_journee_ouverte`).
+    """
+    jour = jour or timezone.localdate() - timedelta(days=1)
+    if jour >= timezone.localdate():
+        raise ValidationError(f"La journée du {jour:%d/%m/%Y} n'est pas terminée : elle ne peut pas être clôturée.")
+    debut, fin = _bornes(jour)
+    try:
+        with transaction.atomic():
+            groupes, _ = _agreger_caisse(debut, fin, fin)
+            rapport = _rapport(jour, groupes)
+            cloture = ClotureCaisse.objects.create(
+                jour=jour,
+                nombre_paiements=rapport.nombre_paiements,
+                montant_total=rapport.montant_total,
+                lignes=[{**ligne._asdict(), 'montant': str(ligne.montant)} for ligne in rapport.lignes],
+                cloture_par=utilisateur,
+            )
+            ActionLog.objects.create(
+                utilisateur=utilisateur,
+                action="Clôture de caisse",
+                details=f"Journée du {jour:%d/%m/%Y} : {rapport.nombre_paiements} paiement(s), {rapport.montant_total}",
+                entite='ClotureCaisse',
+                entite_id=cloture.pk,
+            )
+    except IntegrityError:
+        raise ValidationError(f"La caisse du {jour:%d/%m/%Y} est déjà clôturée.")
+    return rapport._replace(cloture=cloture)
+
@@ -0,0 +1,39 @@
+# facturations/rendu.py
+"""
+Côté travailleur du rendu PDF des factures (voir facturations.pdf).
+
+Ce module est importé par les processus du pool avant que Django ne soit
+initialisé : il ne doit importer aucun modèle.
+"""
+from django.core.exceptions import ImproperlyConfigured
+
+GABARIT = 'facturations/facture_pdf.html'
+
+# Gabarit compilé, propre à chaque processus travailleur
+_gabarit = None
+
+
+def weasyprint():
+    """Module WeasyPrint (ImproperlyConfigured s'il ou Pango est absent)"""
+    try:
+        import weasyprint
+    except ImportError:
+        raise ImproperlyConfigured("Le rendu PDF des factures nécessite le paquet weasyprint.")
+    except OSError as erreur:
+        # Bibliothèques système (Pango) introuvables au chargement du module
+        raise ImproperlyConfigured(f"WeasyPrint ne peut pas être chargé : {erreur}")
+    return weasyprint
+
+
+def initialiser_travailleur():
+    """Prépare un processus du pool : Django, puis compilation unique du gabarit"""
+    global _gabarit
+    import django
+    django.setup()
+    from django.template.loader import get_template
+    _gabarit = get_template(GABARIT)
+
+
+def rendre(contexte):
+    """PDF (octets) d'une facture à partir de son contexte"""
+    return weasyprint().HTML(string=_gabarit.render(contexte)).write_pdf()
@@ -0,0 +1,163 @@
+# facturations/services.py
+"""
+Construction des factures de séjour au check-out.
+
+Le montant d'une facture est l'hébergement (`prix_par_nuit` × nuits
+occupées, jusqu'au check-out s'il a eu lieu avant le départ prévu) plus
+les consommations resto/bar du client pendant le séjour qui n'ont été ni
+réglées à table ni reportées sur une autre facture. Ces montants sont
+calculés par la base, pour toutes les réservations à facturer, en une seule
+requête agrégée ; les factures et leurs liens vers les commandes sont
+ensuite insérés en un ``bulk_create`` chacun, dans une même transaction.
+"""
+from decimal import Decimal
+
+from django.contrib.postgres.expressions import ArraySubquery
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.db.models import Exists, F, OuterRef, Q, Sum
+from django.utils import timezone
+
+from clients.statistiques import planifier_rafraichissement
+from core.models import ActionLog
+from core.numerotation import allouer_numeros
+from reservations.models import Reservation
+from resto.models import CommandeItem
+from .models import Facture
+
+# Réservations facturées au départ (check-in effectué)
+STATUTS_FACTURABLES = ('en_cours', 'terminee')
+# Commandes qui ne sont pas reportées sur la note de la chambre
+STATUTS_COMMANDE_EXCLUS = ('annulee', 'payee')
+
+
+def depart_facture(date_depart, date_checkout):
+    """
+    Date de fin de la période d'hébergement facturée : le départ prévu, ou le
+    check-out s'il a eu lieu avant (seules les nuits occupées sont dues).
+    """
+    if date_checkout is None:
+        return date_depart
+    return min(date_depart, timezone.localdate(date_checkout))
+
+
+def _consommations_du_sejour():
+    """
+    Montant par commande des consommations à facturer pour la réservation
+    extérieure (``OuterRef``), classé par commande.
+    """
+    deja_facturee = Facture.objects.exclude(statut='annulee').filter(
+        Q(commandes=OuterRef('commande_id')) | Q(commande_resto=OuterRef('commande_id'))
+    )
+    return (
+        CommandeItem.objects
+        .filter(
+            commande__client=OuterRef('client_id'),
+            commande__date_commande__date__gte=OuterRef('date_arrivee'),
+            commande__date_commande__date__lte=OuterRef('date_depart'),
+        )
+        .exclude(commande__statut__in=STATUTS_COMMANDE_EXCLUS)
+        .exclude(Exists(deja_facturee))
+        .order_by('commande_id')
+        .values('commande_id')
+        .annotate(montant=Sum(F('quantite') * F('prix_unitaire')))
+    )
+
+
+def _facturer(reservations, utilisateur=None):
+    """
+    Facture les réservations du QuerySet qui peuvent l'être ; retourne les
+    factures créées.
+
+    Les réservations déjà facturées (facture non annulée) sont ignorées, et
+    celles en cours de facturation par un autre traitement sont sautées
+    (SKIP LOCKED) : une réservation n'est jamais facturée deux fois.
+    """
+    consommations = _consommations_du_sejour()
+    deja_facturee = Facture.objects.filter(reservation=OuterRef('pk')).exclude(statut='annulee')
+
+    with transaction.atomic():
+        lignes = list(
+            reservations
+            .filter(statut__in=STATUTS_FACTURABLES)
+            .exclude(Exists(deja_facturee))
+            .select_for_update(skip_locked=True, of=('self',))
+            .annotate(
+                commandes_ids=ArraySubquery(consommations.values('commande_id')),
+                montants_commandes=ArraySubquery(consommations.values('montant')),
+            )
+            .order_by('date_arrivee', 'pk')
+            .values_list(
+                'pk', 'client_id', 'prix_par_nuit', 'date_arrivee', 'date_depart', 'date_checkout',
+                'commandes_ids', 'montants_commandes',
+            )
+        )
+        if not lignes:
+            return []
+
+        # Plusieurs chambres d'un même client (réservation de groupe) voient
+        # les mêmes commandes : chacune n'est reportée que sur la première
+        attribuees = set()
+        factures, commandes_par_facture = [], []
+        for numero, (pk, client_id, prix, arrivee, depart, checkout, ids, montants) in zip(
+            allouer_numeros('FAC', len(lignes)), lignes
+        ):
+            nuits = max((depart_facture(depart, checkout) - arrivee).days, 0)
+            commandes = {commande: montant for commande, montant in zip(ids, montants) if commande not in attribuees}
+            attribuees.update(commandes)
+            hebergement = prix * nuits
+            restauration = sum(commandes.values(), Decimal('0'))
+            factures.append(Facture(
+                numero_facture=numero,
+                client_id=client_id,
+                reservation_id=pk,
+                montant_total=hebergement + restauration,
+                notes=f"Hébergement : {nuits} nuit(s) × {prix} = {hebergement}\n"
+                      f"Restauration : {len(commandes)} commande(s) = {restauration}",
+            ))
+            commandes_par_facture.append(commandes)
+
+        # Effets de bord habituellement portés par les signaux post_save, en une passe
+        Facture.objects.bulk_create(factures)
+        Facture.commandes.through.objects.bulk_create([
+            Facture.commandes.through(facture_id=facture.pk, commande_id=commande)
+            for facture, commandes in zip(factures, commandes_par_facture)
+            for commande in commandes
+        ])
+        ActionLog.objects.bulk_create([
+            ActionLog(
+                utilisateur=utilisateur,
+                action="Facturation du séjour",
+                details=f"Facture {facture.numero_facture} : {facture.montant_total}",
+                entite='Reservation',
+                entite_id=facture.reservation_id,
+            )
+            for facture in factures
+        ])
+        planifier_rafraichissement(facture.client_id for facture in factures)
+
+    return factures
+
+
+def facturer_reservation(reservation, utilisateur=None):
+    """
+    Crée la facture de séjour d'une réservation (instance ou identifiant).
+
+    Lève ``ValidationError`` si la réservation n'est pas facturable : pas de
+    check-in, déjà facturée, ou en cours de facturation ailleurs.
+    """
+    pk = getattr(reservation, 'pk', reservation)
+    factures = _facturer(Reservation.objects.filter(pk=pk), utilisateur=utilisateur)
+    if not factures:
+        raise ValidationError("Cette réservation n'est pas facturable (pas de check-in, ou déjà facturée).")
+    return factures[0]
+
+
+def facturer_departs(jour=None, utilisateur=None):
+    """
+    Facture en une passe toutes les réservations qui partent le `jour`
+    donné (aujourd'hui par défaut) et ne sont pas encore facturées.
+    Retourne les factures créées.
+    """
+    jour = jour or timezone.localdate()
+    return _facturer(Reservation.objects.filter(date_depart=jour), utilisateur=utilisateur)
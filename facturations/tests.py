@@ -1,3 +1,199 @@
+from datetime import datetime, time, timedelta
+from decimal import Decimal
+
+from django.core.exceptions import ValidationError
+from django.db import transaction
 from django.test import TestCase
+from django.utils import timezone
+
+from accounts.models import User
+from chambres.models import Chambre, TypeChambre
+from clients.models import Client
+from reservations.models import Reservation
+from .forms import PaiementForm
+from .models import ClotureCaisse, Facture, Paiement
+from .rapports import balance_agee, cloturer_caisse, totaux_balance
+from .services import facturer_reservation
+
+
+class FacturationTestCase(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.client_hotel = Client.objects.create(
+            civilite='M', nom='Dupont', prenom='Jean', phone='+243810000000', email='jean@exemple.cd',
+        )
+        cls.caissier = User.objects.create_user(username='caissier', password='x')
+
+    def creer_facture(self, montant_total='100.00', **kwargs):
+        return Facture.objects.create(client=self.client_hotel, montant_total=Decimal(montant_total), **kwargs)
+
+    def creer_paiement(self, facture, montant, **kwargs):
+        return Paiement.objects.create(
+            facture=facture, montant=Decimal(montant), mode_paiement='especes', effectue_par=self.caissier, **kwargs
+        )
+
+    def vieillir(self, objet, jours, champ):
+        """Antidate `champ` de `jours` jours (auto_now_add : seulement par update())"""
+        type(objet).objects.filter(pk=objet.pk).update(**{champ: timezone.now() - timedelta(days=jours)})
+
+
+class MontantPayeTests(FacturationTestCase):
+    """montant_paye et solde suivent les paiements, sans que save() de la facture ne les écrase"""
+
+    def setUp(self):
+        self.facture = self.creer_facture()
+        self.autre = self.creer_facture()
+
+    def montants(self, facture):
+        facture.refresh_from_db()
+        return facture.montant_paye, facture.solde
+
+    def test_creation(self):
+        self.creer_paiement(self.facture, '30.00')
+        self.assertEqual(self.montants(self.facture), (Decimal('30.00'), Decimal('70.00')))
+
+    def test_modification_du_montant(self):
+        paiement = self.creer_paiement(self.facture, '30.00')
+        paiement.montant = Decimal('45.00')
+        paiement.save()
+        self.assertEqual(self.montants(self.facture), (Decimal('45.00'), Decimal('55.00')))
+
+    def test_deplacement_vers_une_autre_facture(self):
+        paiement = self.creer_paiement(self.facture, '30.00')
+        paiement = Paiement.objects.get(pk=paiement.pk)
+        paiement.facture = self.autre
+        paiement.montant = Decimal('40.00')
+        paiement.save()
+        self.assertEqual(self.montants(self.facture), (Decimal('0.00'), Decimal('100.00')))
+        self.assertEqual(self.montants(self.autre), (Decimal('40.00'), Decimal('60.00')))
+
+    def test_suppression(self):
+        self.creer_paiement(self.facture, '30.00')
+        paiement = self.creer_paiement(self.facture, '20.00')
+        paiement.delete()
+        self.assertEqual(self.montants(self.facture), (Decimal('30.00'), Decimal('70.00')))
+
+    def test_save_d_une_facture_perimee(self):
+        perimee = Facture.objects.get(pk=self.facture.pk)
+        self.creer_paiement(self.facture, '30.00')
+        perimee.notes = "Modifiée après le paiement"
+        perimee.save()
+        self.assertEqual(self.montants(self.facture), (Decimal('30.00'), Decimal('70.00')))
+
+
+class FacturationSejourTests(FacturationTestCase):
+    """Hébergement facturé jusqu'au départ prévu, ou jusqu'au check-out s'il a eu lieu avant"""
+
+    def setUp(self):
+        type_chambre = TypeChambre.objects.create(nom='Standard', prix_base=Decimal('100.00'))
+        self.chambre = Chambre.objects.create(numero='101', type_chambre=type_chambre, etage=1)
+        self.arrivee = timezone.localdate() - timedelta(days=1)
+
+    def creer_reservation(self, **kwargs):
+        return Reservation.objects.create(
+            client=self.client_hotel, chambre=self.chambre, statut='terminee', prix_par_nuit=Decimal('100.00'),
+            total=Decimal('300.00'), date_arrivee=self.arrivee, date_depart=self.arrivee + timedelta(days=3), **kwargs
+        )
+
+    def test_sejour_complet(self):
+        facture = facturer_reservation(self.creer_reservation())
+        self.assertEqual(facture.montant_total, Decimal('300.00'))
+
+    def test_depart_anticipe(self):
+        # Check-out le lendemain de l'arrivée, à 10 h : une seule nuit occupée
+        checkout = timezone.make_aware(datetime.combine(self.arrivee + timedelta(days=1), time(10)))
+        facture = facturer_reservation(self.creer_reservation(date_checkout=checkout))
+        self.assertEqual(facture.montant_total, Decimal('100.00'))
+
+    def test_deja_facturee(self):
+        reservation = self.creer_reservation()
+        facturer_reservation(reservation)
+        with self.assertRaises(ValidationError):
+            facturer_reservation(reservation)
+
+
+class BalanceAgeeTests(FacturationTestCase):
+    """Répartition du reste à payer par tranche d'ancienneté"""
+
+    def test_tranches(self):
+        for jours, montant in ((0, '10.00'), (30, '20.00'), (31, '40.00'), (60, '80.00'), (75, '160.00'), (91, '320.00')):
+            self.vieillir(self.creer_facture(montant), jours, 'date_creation')
+        partielle = self.creer_facture('100.00')
+        self.creer_paiement(partielle, '99.00')
+        # Ni les factures soldées ni les annulées ne comptent
+        soldee = self.creer_facture('50.00')
+        self.creer_paiement(soldee, '50.00')
+        self.creer_facture('500.00', statut='annulee')
+
+        lignes = balance_agee()
+        self.assertEqual(len(lignes), 1)
+        ligne = lignes[0]
+        self.assertEqual(ligne.nombre_factures, 7)
+        self.assertEqual(ligne.j0_30, Decimal('31.00'))
+        self.assertEqual(ligne.j31_60, Decimal('120.00'))
+        self.assertEqual(ligne.j61_90, Decimal('160.00'))
+        self.assertEqual(ligne.plus_90, Decimal('320.00'))
+        self.assertEqual(ligne.total, Decimal('631.00'))
+        self.assertEqual(totaux_balance(lignes)['total'], Decimal('631.00'))
+
+    def test_date_de_reference(self):
+        self.vieillir(self.creer_facture('10.00'), 40, 'date_creation')
+        # Factures émises après la date de référence ignorées
+        self.creer_facture('20.00')
+        ligne, = balance_agee(timezone.localdate() - timedelta(days=20))
+        self.assertEqual((ligne.nombre_factures, ligne.j0_30, ligne.j31_60), (1, Decimal('10.00'), Decimal('0')))
+
+
+class ClotureCaisseTests(FacturationTestCase):
+    """Clôture d'une journée terminée et verrouillage de ses paiements"""
+
+    def setUp(self):
+        self.hier = timezone.localdate() - timedelta(days=1)
+        self.facture = self.creer_facture()
+        self.paiement = self.creer_paiement(self.facture, '30.00')
+        self.vieillir(self.paiement, 1, 'date_paiement')
+        self.paiement = Paiement.objects.get(pk=self.paiement.pk)
+
+    def test_journee_non_terminee(self):
+        with self.assertRaises(ValidationError):
+            cloturer_caisse(timezone.localdate())
+        self.assertFalse(ClotureCaisse.objects.exists())
+
+    def test_cloture_de_la_veille(self):
+        rapport = cloturer_caisse(utilisateur=self.caissier)
+        self.assertEqual(rapport.jour, self.hier)
+        self.assertEqual((rapport.nombre_paiements, rapport.montant_total), (1, Decimal('30.00')))
+        self.assertEqual(
+            [(ligne.niveau, ligne.effectue_par, ligne.montant) for ligne in rapport.lignes],
+            [('caissier', 'caissier', Decimal('30.00')), ('mode', '', Decimal('30.00'))],
+        )
+        with self.assertRaises(ValidationError):
+            cloturer_caisse(self.hier)
+
+    def test_paiements_verrouilles(self):
+        cloturer_caisse(self.hier)
+        self.paiement.montant = Decimal('35.00')
+        # atomic() : chaque écriture refusée annule sa propre transaction
+        with self.assertRaises(ValidationError), transaction.atomic():
+            self.paiement.save()
+        with self.assertRaises(ValidationError), transaction.atomic():
+            Paiement.objects.get(pk=self.paiement.pk).delete()
+        # La suppression de la facture atteint le paiement par cascade
+        with self.assertRaises(ValidationError), transaction.atomic():
+            self.facture.delete()
+        formulaire = PaiementForm(
+            {'facture': self.facture.pk, 'montant': '35.00', 'mode_paiement': 'especes', 'reference': ''},
+            instance=Paiement.objects.get(pk=self.paiement.pk),
+        )
+        self.assertFalse(formulaire.is_valid())
+        self.facture.refresh_from_db()
+        self.assertEqual(self.facture.montant_paye, Decimal('30.00'))
 
-# Create your tests here.
+    def test_journee_ouverte_modifiable(self):
+        paiement = self.creer_paiement(self.facture, '20.00')
+        paiement.montant = Decimal('25.00')
+        paiement.save()
+        paiement.delete()
+        self.facture.refresh_from_db()
+        self.assertEqual(self.facture.montant_paye, Decimal('30.00'))
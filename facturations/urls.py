@@ -0,0 +1,12 @@
+# facturations/urls.py
+from django.urls import path
+from . import views
+
+app_name = 'facturation'
+
+# Seuls les points d'entrée sans gabarit HTML sont routés : les gabarits des
+# vues CRUD des factures et paiements n'existent pas encore
+urlpatterns = [
+    path('export/<int:annee>/<int:mois>/', views.ExportFacturesPdfView.as_view(), name='facture_export_pdf'),
+    path('caisse/', views.CaisseView.as_view(), name='caisse'),
+]
@@ -1,66 +1,152 @@
 # facturation/views.py
+from django.contrib.auth.mixins import LoginRequiredMixin
+from django.core.exceptions import ImproperlyConfigured, ValidationError
+from django.http import Http404, JsonResponse, StreamingHttpResponse
+from django.utils.dateparse import parse_date
+from django.views import View
 from django.views.generic import ListView, DetailView, CreateView, UpdateView, DeleteView
 from django.urls import reverse_lazy
 from .models import Facture, Paiement
 from .forms import FactureForm, PaiementForm
+from .pdf import factures_du_mois, flux_zip
+from .rapports import cloturer_caisse, journee_caisse
+from .rendu import weasyprint
+
+
+class SuppressionVerrouilleeMixin:
+    """
+    Suppression refusée par le modèle (paiement d'une journée de caisse
+    clôturée, y compris par cascade) : l'erreur est affichée sur le
+    formulaire de confirmation au lieu de lever une erreur 500.
+    """
+
+    def form_valid(self, form):
+        try:
+            return super().form_valid(form)
+        except ValidationError as erreur:
+            form.add_error(None, erreur)
+            return self.form_invalid(form)
 
 
 # ==================== FACTURE ====================
-class FactureListView(ListView):
+class FactureListView(LoginRequiredMixin, ListView):
     model = Facture
     template_name = 'facturation/facture_list.html'
     context_object_name = 'factures'
     ordering = ['-date_creation']
 
 
-class FactureDetailView(DetailView):
+class FactureDetailView(LoginRequiredMixin, DetailView):
     model = Facture
     template_name = 'facturation/facture_detail.html'
 
 
-class FactureCreateView(CreateView):
+class FactureCreateView(LoginRequiredMixin, CreateView):
     model = Facture
     form_class = FactureForm
     template_name = 'facturation/facture_form.html'
     success_url = reverse_lazy('facturation:facture_list')
 
 
-class FactureUpdateView(UpdateView):
+class FactureUpdateView(LoginRequiredMixin, UpdateView):
     model = Facture
     form_class = FactureForm
     template_name = 'facturation/facture_form.html'
     success_url = reverse_lazy('facturation:facture_list')
 
 
-class FactureDeleteView(DeleteView):
+class FactureDeleteView(LoginRequiredMixin, SuppressionVerrouilleeMixin, DeleteView):
     model = Facture
     template_name = 'facturation/facture_confirm_delete.html'
     success_url = reverse_lazy('facturation:facture_list')
 
 
+class ExportFacturesPdfView(LoginRequiredMixin, View):
+    """Archive ZIP des factures PDF d'un mois, envoyée au fil de son rendu"""
+    raise_exception = True
+
+    def get(self, request, annee, mois):
+        if not 1 <= mois <= 12:
+            raise Http404("Mois invalide")
+        try:
+            # Vérifié avant d'envoyer l'en-tête : une erreur dans le flux tronquerait l'archive
+            weasyprint()
+        except ImproperlyConfigured as erreur:
+            return JsonResponse({'erreur': str(erreur)}, status=503)
+        response = StreamingHttpResponse(flux_zip(factures_du_mois(annee, mois)), content_type='application/zip')
+        response['Content-Disposition'] = f'attachment; filename="factures_{annee}_{mois:02d}.zip"'
+        return response
+
+
+class CaisseView(LoginRequiredMixin, View):
+    """
+    Rapport de caisse d'une journée (``?jour=AAAA-MM-JJ``, aujourd'hui par
+    défaut) ; POST clôture une journée terminée (la veille par défaut).
+    """
+    raise_exception = True
+
+    def _jour(self, request):
+        try:
+            return parse_date(request.GET.get('jour') or '')
+        except ValueError:
+            # Format valide mais date inexistante (2024-02-30)
+            return None
+
+    def get(self, request):
+        jour = self._jour(request)
+        if request.GET.get('jour') and jour is None:
+            return JsonResponse({'erreur': "Paramètre 'jour' (AAAA-MM-JJ) invalide."}, status=400)
+        return JsonResponse(self._serialiser(journee_caisse(jour)))
+
+    def post(self, request):
+        jour = self._jour(request)
+        if request.GET.get('jour') and jour is None:
+            return JsonResponse({'erreur': "Paramètre 'jour' (AAAA-MM-JJ) invalide."}, status=400)
+        try:
+            rapport = cloturer_caisse(jour, utilisateur=request.user)
+        except ValidationError as erreur:
+            return JsonResponse({'erreur': erreur.messages[0]}, status=409)
+        return JsonResponse(self._serialiser(rapport), status=201)
+
+    def _serialiser(self, rapport):
+        return {
+            'jour': rapport.jour,
+            'cloturee': rapport.cloture is not None,
+            'date_cloture': rapport.cloture.date_cloture if rapport.cloture else None,
+            'nombre_paiements': rapport.nombre_paiements,
+            'montant_total': rapport.montant_total,
+            'lignes': [ligne._asdict() for ligne in rapport.lignes],
+        }
+
+
 # ==================== PAIEMENT ====================
-class PaiementListView(ListView):
+class PaiementListView(LoginRequiredMixin, ListView):
     model = Paiement
     template_name = 'facturation/paiement_list.html'
     context_object_name = 'paiements'
     ordering = ['-date_paiement']
 
 
-class PaiementCreateView(CreateView):
+class PaiementCreateView(LoginRequiredMixin, CreateView):
     model = Paiement
     form_class = PaiementForm
     template_name = 'facturation/paiement_form.html'
     success_url = reverse_lazy('facturation:paiement_list')
 
+    def form_valid(self, form):
+        # Caissier du paiement, repris par le rapport de caisse
+        form.instance.effectue_par = self.request.user
+        return super().form_valid(form)
+
 
-class PaiementUpdateView(UpdateView):
+class PaiementUpdateView(LoginRequiredMixin, UpdateView):
     model = Paiement
     form_class = PaiementForm
     template_name = 'facturation/paiement_form.html'
     success_url = reverse_lazy('facturation:paiement_list')
 
 
-class PaiementDeleteView(DeleteView):
+class PaiementDeleteView(LoginRequiredMixin, SuppressionVerrouilleeMixin, DeleteView):
     model = Paiement
     template_name = 'facturation/paiement_confirm_delete.html'
     success_url = reverse_lazy('facturation:paiement_list')
\ No newline at end of file
@@ -43,6 +43,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
     'accounts',
     'chambres',
     'clients',
@@ -99,6 +100,12 @@ DATABASES = {
     }
 }
 
+# Cache partagé entre les processus (ex : CACHE_URL=redis://127.0.0.1:6379/1) ;
+# utilisé notamment pour les instantanés du tableau de bord des chambres
+CACHES = {
+    'default': env.cache('CACHE_URL', default='locmemcache://'),
+}
+
 AUTH_USER_MODEL = 'accounts.User'
 
 # Password validation
@@ -139,6 +146,15 @@ STATIC_URL = 'static/'
 STATICFILES_DIRS = [os.path.join(BASE_DIR, 'static')]
 STATIC_ROOT = os.path.join(BASE_DIR, 'staticfiles')
 
+MEDIA_URL = 'media/'
+MEDIA_ROOT = env('MEDIA_ROOT', default=os.path.join(BASE_DIR, 'media'))
+
+# Les gros fichiers sont hachés pendant la réception (voir core.stockage)
+FILE_UPLOAD_HANDLERS = [
+    'django.core.files.uploadhandler.MemoryFileUploadHandler',
+    'core.stockage.HachageUploadHandler',
+]
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
@@ -147,3 +163,12 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 LOGIN_REDIRECT_URL = '/'
 # EMAIL_BACKEND = 'django.core.mail.backends.smtp.EmailBackend'
 EMAIL_BACKEND = 'django.core.mail.backends.console.EmailBackend'
+
+# Nombre de numéros de documents réservés en mémoire par processus et par préfixe
+NUMEROTATION_TAILLE_BLOC = 50
+
+# Nombre de threads qui calculent les miniatures des images téléversées
+IMAGES_TRAITEMENTS_PARALLELES = 2
+
+# Nombre de processus qui rendent les factures PDF (export mensuel)
+FACTURES_PDF_PARALLELES = 2
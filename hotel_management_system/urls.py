@@ -14,10 +14,20 @@ Including another URLconf
     1. Import the include() function: from django.urls import include, path
     2. Add a URL to urlpatterns:  path('blog/', include('blog.urls'))
 """
+from django.conf import settings
+from django.conf.urls.static import static
 from django.contrib import admin
 from django.urls import path, include
 
 urlpatterns = [
     path('admin/', admin.site.urls),
+    path('chambres/', include('chambres.urls')),
+    path('clients/', include('clients.urls')),
+    path('core/', include('core.urls')),
+    path('factures/', include('facturations.urls')),
+    path('reservations/', include('reservations.urls')),
     path('', include('admin_coreui.urls')),
 ]
+
+if settings.DEBUG:
+    urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
@@ -5,6 +5,8 @@ from django.utils import timezone
 from accounts.models import User
 from chambres.models import TypeChambre, Chambre
 from core.models import Notification, ActionLog
+from core.images import suivre_images
+from core.numerotation import prochain_numero
 
 class CategorieInventaire(models.Model):
     """Catégories de produits d'inventaire"""
@@ -65,6 +67,8 @@ def check_stock_alert(sender, instance, **kwargs):
             type='stock_alert'
         )
 
+suivre_images(Produit, 'image')
+
 class MouvementStock(models.Model):
     """Mouvements d'entrée/sortie de stock"""
     TYPE_CHOICES = [
@@ -124,7 +128,7 @@ class DemandeReapprovisionnement(models.Model):
     
     def save(self, *args, **kwargs):
         if not self.numero_demande:
-            self.numero_demande = f"DEM{timezone.now().strftime('%Y%m%d%H%M%S')}"
+            self.numero_demande = prochain_numero('DEM')
         super().save(*args, **kwargs)
 
 class LigneDemandeReapprovisionnement(models.Model):
@@ -158,7 +162,7 @@ class InventairePhysique(models.Model):
     
     def save(self, *args, **kwargs):
         if not self.numero_inventaire:
-            self.numero_inventaire = f"INV{timezone.now().strftime('%Y%m%d%H%M%S')}"
+            self.numero_inventaire = prochain_numero('INV')
         super().save(*args, **kwargs)
 
 class LigneInventairePhysique(models.Model):
@@ -0,0 +1,192 @@
+# reservations/affectation.py
+"""
+Réaffectation des chambres des réservations futures, type par type.
+
+Les séjours d'un même type forment un graphe d'intervalles : les répartir
+entre les chambres revient à le colorier. Le placement glouton par date
+d'arrivée croissante, en choisissant à chaque fois la chambre qui laisse le
+plus petit trou avant et après le séjour (« best fit »), regroupe les séjours
+dans le moins de chambres possible et laisse de longues plages libres ailleurs,
+celles dont les longs séjours ont besoin.
+
+Les séjours verrouillés (chambre imposée, déjà commencés ou arrivant
+aujourd'hui) restent en place et servent de contraintes fixes.
+"""
+import bisect
+from collections import namedtuple
+
+from django.db import connection, transaction
+from django.db.models import BigIntegerField, Case, When
+from django.utils import timezone
+
+from chambres.models import Chambre, TypeChambre
+from chambres.statuts import changer_statut
+from core.evenements import publier
+from .models import NuitChambre, Reservation
+
+Deplacement = namedtuple('Deplacement', ['reservation_id', 'ancienne_chambre_id', 'nouvelle_chambre_id'])
+
+STATUTS_DEPLACABLES = ('confirmee', 'en_attente')
+
+
+class _Planning:
+    """Séjours d'une chambre, triés par arrivée, sous forme (debut, fin) semi-ouverts"""
+
+    def __init__(self):
+        self.debuts = []
+        self.fins = []
+
+    def ajouter(self, debut, fin):
+        i = bisect.bisect_left(self.debuts, debut)
+        self.debuts.insert(i, debut)
+        self.fins.insert(i, fin)
+
+    def ecarts(self, debut, fin, origine):
+        """
+        Trous laissés avant et après le séjour s'il était placé ici, ou None
+        si la chambre est déjà prise sur une partie de la période.
+        """
+        i = bisect.bisect_right(self.debuts, debut)
+        fin_precedente = self.fins[i - 1] if i > 0 else origine
+        if fin_precedente > debut:
+            return None
+        if i < len(self.debuts) and self.debuts[i] < fin:
+            return None
+        avant = (debut - fin_precedente).days
+        apres = (self.debuts[i] - fin).days if i < len(self.debuts) else 0
+        return avant, apres
+
+
+def calculer_affectations(chambres, fixes, deplacables, origine):
+    """
+    Répartit `deplacables` dans `chambres` autour des séjours `fixes`.
+
+    `fixes` et `deplacables` sont des listes de (reservation_id, chambre_id,
+    date_arrivee, date_depart). Retourne ``{reservation_id: chambre_id}``, ou
+    None si le placement glouton échoue (l'affectation actuelle est alors
+    conservée).
+    """
+    plannings = {chambre_id: _Planning() for chambre_id in chambres}
+    for _, chambre_id, debut, fin in fixes:
+        if chambre_id in plannings:
+            plannings[chambre_id].ajouter(debut, fin)
+
+    affectation = {}
+    # Arrivées croissantes, les plus longs séjours d'abord à arrivée égale
+    for reservation_id, chambre_actuelle, debut, fin in sorted(deplacables, key=lambda r: (r[2], r[2] - r[3])):
+        meilleure, meilleur_score = None, None
+        for chambre_id, planning in plannings.items():
+            ecarts = planning.ecarts(debut, fin, origine)
+            if ecarts is None:
+                continue
+            # Trous les plus petits d'abord ; à égalité, on évite de déplacer le client
+            score = (ecarts[0], ecarts[1], chambre_id != chambre_actuelle)
+            if meilleur_score is None or score < meilleur_score:
+                meilleure, meilleur_score = chambre_id, score
+        if meilleure is None:
+            return None
+        plannings[meilleure].ajouter(debut, fin)
+        affectation[reservation_id] = meilleure
+    return affectation
+
+
+def _appliquer(deplacements):
+    """
+    Écrit tous les déplacements en deux UPDATE, contraintes différées jusqu'au
+    COMMIT, puis met à jour le statut des chambres quittées et rejointes
+    (historique, tableau du ménage et flux d'événements via changer_statut).
+    """
+    with connection.cursor() as cursor:
+        cursor.execute("SET CONSTRAINTS reservations_sans_chevauchement, nuit_chambre_unique DEFERRED")
+
+    nouvelle_chambre = Case(
+        *[When(pk=d.reservation_id, then=d.nouvelle_chambre_id) for d in deplacements],
+        output_field=BigIntegerField(),
+    )
+    ids = [d.reservation_id for d in deplacements]
+    Reservation.objects.filter(pk__in=ids).update(chambre_id=nouvelle_chambre, date_modification=timezone.now())
+    NuitChambre.objects.filter(reservation_id__in=ids).update(
+        chambre_id=Case(
+            *[When(reservation_id=d.reservation_id, then=d.nouvelle_chambre_id) for d in deplacements],
+            output_field=BigIntegerField(),
+        )
+    )
+
+    motif = "Réaffectation automatique"
+    # Une chambre reste réservée si une arrivée confirmée l'attend encore
+    anciennes = {d.ancienne_chambre_id for d in deplacements}
+    encore_attendues = set(
+        Reservation.objects
+        .filter(chambre__in=anciennes, statut='confirmee')
+        .values_list('chambre_id', flat=True)
+    )
+    changer_statut(anciennes - encore_attendues, 'disponible', motif=motif, depuis=['reservee'])
+    nouvelles = (
+        Reservation.objects
+        .filter(pk__in=ids, statut='confirmee')
+        .values_list('chambre_id', flat=True)
+    )
+    changer_statut(set(nouvelles), 'reservee', motif=motif)
+    publier('reservation', {
+        'reservations': ids,
+        'chambres': sorted(anciennes | {d.nouvelle_chambre_id for d in deplacements}),
+        'deplacements': [list(d) for d in deplacements],
+        'motif': motif,
+    })
+
+
+def optimiser_affectations(type_chambre=None, appliquer=True):
+    """
+    Recalcule l'affectation des réservations futures de chaque type de chambre.
+
+    Toutes les écritures ont lieu dans une seule transaction ; les
+    réservations concernées sont verrouillées pendant le calcul. Retourne la
+    liste des `Deplacement` (effectués, ou proposés si `appliquer` est faux).
+    """
+    aujourd_hui = timezone.localdate()
+    types = [type_chambre] if type_chambre is not None else list(TypeChambre.objects.all())
+    deplacements = []
+
+    with transaction.atomic():
+        for type_courant in types:
+            chambres = set(
+                Chambre.objects
+                .filter(type_chambre=type_courant)
+                .exclude(statut='hors_service')
+                .values_list('pk', flat=True)
+            )
+            sejours = list(
+                Reservation.objects
+                .select_for_update(of=('self',))
+                .filter(
+                    chambre__type_chambre=type_courant,
+                    statut__in=Reservation.STATUTS_ACTIFS,
+                    date_depart__gt=aujourd_hui,
+                )
+                .values_list('pk', 'chambre_id', 'date_arrivee', 'date_depart', 'statut', 'chambre_verrouillee')
+            )
+            fixes, deplacables = [], []
+            for pk, chambre_id, arrivee, depart, statut, verrouillee in sejours:
+                fixe = (
+                    verrouillee
+                    or statut not in STATUTS_DEPLACABLES
+                    or arrivee <= aujourd_hui
+                    or chambre_id not in chambres
+                )
+                (fixes if fixe else deplacables).append((pk, chambre_id, arrivee, depart))
+            if not deplacables:
+                continue
+
+            affectation = calculer_affectations(chambres, fixes, deplacables, aujourd_hui)
+            if affectation is None:
+                continue
+            deplacements += [
+                Deplacement(pk, chambre_id, affectation[pk])
+                for pk, chambre_id, _, _ in deplacables
+                if affectation[pk] != chambre_id
+            ]
+
+        if appliquer and deplacements:
+            _appliquer(deplacements)
+
+    return deplacements
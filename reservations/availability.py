@@ -0,0 +1,72 @@
+# reservations/availability.py
+from django.db.models import Count, Exists, OuterRef
+from chambres.models import Chambre, Equipement
+from .models import Reservation
+
+# Statuts de chambre qui empêchent toute nouvelle réservation
+STATUTS_CHAMBRE_INDISPONIBLES = ('hors_service',)
+
+
+def reservations_chevauchantes(date_arrivee, date_depart):
+    """Réservations actives dont le séjour chevauche [date_arrivee, date_depart)"""
+    return Reservation.objects.filter(
+        statut__in=Reservation.STATUTS_ACTIFS,
+        sejour__overlap=(date_arrivee, date_depart),
+    )
+
+
+def filtrer_equipements(chambres, equipements, prefixe='type_chambre__'):
+    """
+    Restreint aux types de chambres disposant de tous les `equipements`
+    (noms ou codes) : un seul prédicat ``@>`` servi par l'index GIN.
+    """
+    codes = sorted(Equipement.normaliser(equipements or []))
+    if not codes:
+        return chambres
+    return chambres.filter(**{f'{prefixe}codes_equipements__contains': codes})
+
+
+def chambres_disponibles(date_arrivee, date_depart, type_chambre=None, exclure_reservation=None, equipements=None):
+    """
+    Chambres libres sur la période [date_arrivee, date_depart).
+
+    Le test de chevauchement est un anti-join ``NOT EXISTS`` résolu par
+    l'index GiST de la contrainte d'exclusion sur (sejour, chambre).
+    `equipements` restreint aux types offrant tous les équipements cités.
+    """
+    occupees = reservations_chevauchantes(date_arrivee, date_depart).filter(chambre=OuterRef('pk'))
+    if exclure_reservation is not None:
+        occupees = occupees.exclude(pk=exclure_reservation)
+
+    chambres = (
+        Chambre.objects
+        .exclude(statut__in=STATUTS_CHAMBRE_INDISPONIBLES)
+        .filter(~Exists(occupees))
+        .select_related('type_chambre')
+    )
+    if type_chambre is not None:
+        chambres = chambres.filter(type_chambre=type_chambre)
+    return filtrer_equipements(chambres, equipements)
+
+
+def disponibilites_par_type(date_arrivee, date_depart, equipements=None):
+    """
+    Nombre de chambres libres par type sur la période, en une seule requête.
+
+    Retourne un dictionnaire ``{type_chambre_id: nombre}``.
+    """
+    lignes = (
+        chambres_disponibles(date_arrivee, date_depart, equipements=equipements)
+        .order_by()
+        .values('type_chambre')
+        .annotate(nombre=Count('id'))
+    )
+    return {ligne['type_chambre']: ligne['nombre'] for ligne in lignes}
+
+
+def chambre_est_disponible(chambre, date_arrivee, date_depart, exclure_reservation=None):
+    """Vérifie qu'une chambre précise est libre sur la période"""
+    occupees = reservations_chevauchantes(date_arrivee, date_depart).filter(chambre=chambre)
+    if exclure_reservation is not None:
+        occupees = occupees.exclude(pk=exclure_reservation)
+    return not occupees.exists()
@@ -1,6 +1,7 @@
 # reservations/forms.py
 from django import forms
 from .models import Reservation
+from .availability import chambre_est_disponible
 
 class ReservationForm(forms.ModelForm):
     class Meta:
@@ -8,7 +9,7 @@ class ReservationForm(forms.ModelForm):
         fields = [
             'client', 'chambre', 'date_arrivee', 'date_depart',
             'nombre_adultes', 'nombre_enfants', 'type_reservation',
-            'prix_par_nuit', 'acompte', 'demandes_speciales', 'notes'
+            'prix_par_nuit', 'acompte', 'chambre_verrouillee', 'demandes_speciales', 'notes'
         ]
         labels = {
             'client': "Client",
@@ -20,6 +21,7 @@ class ReservationForm(forms.ModelForm):
             'type_reservation': "Type de réservation",
             'prix_par_nuit': "Prix par nuit",
             'acompte': "Acompte",
+            'chambre_verrouillee': "Chambre imposée (ne pas réaffecter)",
             'demandes_speciales': "Demandes spéciales",
             'notes': "Notes internes",
         }
@@ -43,6 +45,12 @@ class ReservationForm(forms.ModelForm):
         if arrivee and depart and depart <= arrivee:
             raise forms.ValidationError("La date de départ doit être après la date d'arrivée.")
 
+        # Vérifie que la chambre n'est pas déjà réservée sur la période
+        if chambre and arrivee and depart and not chambre_est_disponible(
+            chambre, arrivee, depart, exclure_reservation=self.instance.pk
+        ):
+            raise forms.ValidationError("Cette chambre est déjà réservée sur cette période.")
+
         # Vérifie la capacité de la chambre
         if chambre:
             total_personnes = adultes + enfants
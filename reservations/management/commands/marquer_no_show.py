@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+from django.utils.dateparse import parse_date
+from reservations.services import marquer_no_shows
+
+
+class Command(BaseCommand):
+    help = "Marque en no-show les réservations confirmées dont la date d'arrivée est dépassée"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--avant', type=parse_date, help="Date limite d'arrivée (AAAA-MM-JJ), aujourd'hui par défaut")
+        parser.add_argument('--taille-lot', type=int, default=500, help="Nombre de réservations traitées par transaction")
+
+    def handle(self, *args, **options):
+        nombre = marquer_no_shows(date_limite=options['avant'], taille_lot=options['taille_lot'])
+        self.stdout.write(self.style.SUCCESS(f"{nombre} réservation(s) marquée(s) en no-show."))
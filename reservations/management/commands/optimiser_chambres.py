@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand
+from core.models import ActionLog
+from reservations.affectation import optimiser_affectations
+
+
+class Command(BaseCommand):
+    help = "Réaffecte les chambres des réservations futures pour limiter les trous dans le planning"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--simulation', action='store_true', help="Affiche les déplacements sans les appliquer")
+
+    def handle(self, *args, **options):
+        simulation = options['simulation']
+        deplacements = optimiser_affectations(appliquer=not simulation)
+
+        for deplacement in deplacements:
+            self.stdout.write(
+                f"Réservation {deplacement.reservation_id} : chambre "
+                f"{deplacement.ancienne_chambre_id} -> {deplacement.nouvelle_chambre_id}"
+            )
+        if deplacements and not simulation:
+            ActionLog.objects.create(
+                action="Optimisation des chambres",
+                details=f"{len(deplacements)} réservation(s) réaffectée(s)",
+                entite='Reservation',
+            )
+        verbe = "proposé(s)" if simulation else "effectué(s)"
+        self.stdout.write(self.style.SUCCESS(f"{len(deplacements)} déplacement(s) {verbe}."))
@@ -0,0 +1,10 @@
+from django.core.management.base import BaseCommand
+from reservations.planning import reconstruire_nuits
+
+
+class Command(BaseCommand):
+    help = "Reconstruit entièrement l'occupation nuit par nuit des chambres à partir des réservations"
+
+    def handle(self, *args, **options):
+        nombre = reconstruire_nuits()
+        self.stdout.write(self.style.SUCCESS(f"{nombre} nuits reconstruites."))
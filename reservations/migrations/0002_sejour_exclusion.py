@@ -0,0 +1,32 @@
+# Generated by Django 5.2.5 on 2026-10-18 18:25
+
+import django.contrib.postgres.constraints
+from django.contrib.postgres.operations import BtreeGistExtension
+import django.contrib.postgres.fields.ranges
+import reservations.models
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chambres', '0001_initial'),
+        ('clients', '0001_initial'),
+        ('reservations', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        # Nécessaire pour l'égalité sur `chambre` dans un index GiST
+        BtreeGistExtension(),
+        migrations.AddField(
+            model_name='reservation',
+            name='sejour',
+            field=models.GeneratedField(db_persist=True, expression=reservations.models.DateRange('date_arrivee', 'date_depart'), output_field=django.contrib.postgres.fields.ranges.DateRangeField()),
+        ),
+        migrations.AddConstraint(
+            model_name='reservation',
+            constraint=django.contrib.postgres.constraints.ExclusionConstraint(condition=models.Q(('statut__in', ('en_attente', 'confirmee', 'en_cours'))), expressions=[('sejour', '&&'), ('chambre', '=')], name='reservations_sans_chevauchement', violation_error_message='Cette chambre est déjà réservée sur cette période.'),
+        ),
+    ]
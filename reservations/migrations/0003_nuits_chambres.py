@@ -0,0 +1,33 @@
+# Generated by Django 5.2.5 on 2026-10-18 18:29
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chambres', '0001_initial'),
+        ('reservations', '0002_sejour_exclusion'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='NuitChambre',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('nuit', models.DateField()),
+                ('statut', models.CharField(choices=[('en_attente', 'En attente'), ('confirmee', 'Confirmée'), ('en_cours', 'En cours (check-in effectué)'), ('terminee', 'Terminée (check-out effectué)'), ('annulee', 'Annulée'), ('no_show', 'No-show (Absent)')], max_length=20)),
+                ('chambre', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='nuits', to='chambres.chambre')),
+                ('reservation', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='nuits', to='reservations.reservation')),
+            ],
+            options={
+                'verbose_name': 'Nuit de chambre',
+                'verbose_name_plural': 'Nuits de chambres',
+                'db_table': 'nuits_chambres',
+                'ordering': ['chambre', 'nuit'],
+                'indexes': [models.Index(fields=['nuit', 'statut'], name='nuits_nuit_statut_idx'), models.Index(fields=['reservation', 'nuit'], name='nuits_reservation_idx')],
+                'constraints': [models.UniqueConstraint(fields=('chambre', 'nuit'), name='nuit_chambre_unique')],
+            },
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.5 on 2026-10-18 18:30
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chambres', '0001_initial'),
+        ('clients', '0001_initial'),
+        ('reservations', '0003_nuits_chambres'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='reservation',
+            index=models.Index(fields=['-date_creation', '-id'], name='reservations_creation_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='reservation',
+            index=models.Index(fields=['statut', '-date_creation', '-id'], name='reservations_statut_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='reservation',
+            index=models.Index(fields=['chambre', '-date_creation', '-id'], name='reservations_chambre_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='reservation',
+            index=models.Index(fields=['date_arrivee'], name='reservations_arrivee_idx'),
+        ),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 5.2.5 on 2026-10-18 18:32
+
+import django.contrib.postgres.constraints
+import django.db.models.constraints
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chambres', '0002_regles_tarifaires'),
+        ('clients', '0001_initial'),
+        ('reservations', '0004_index_liste'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveConstraint(
+            model_name='nuitchambre',
+            name='nuit_chambre_unique',
+        ),
+        migrations.RemoveConstraint(
+            model_name='reservation',
+            name='reservations_sans_chevauchement',
+        ),
+        migrations.AddField(
+            model_name='reservation',
+            name='chambre_verrouillee',
+            field=models.BooleanField(default=False, help_text="La chambre ne sera pas réaffectée par l'optimisation automatique"),
+        ),
+        migrations.AddConstraint(
+            model_name='nuitchambre',
+            constraint=models.UniqueConstraint(deferrable=django.db.models.constraints.Deferrable['IMMEDIATE'], fields=('chambre', 'nuit'), name='nuit_chambre_unique'),
+        ),
+        migrations.AddConstraint(
+            model_name='reservation',
+            constraint=django.contrib.postgres.constraints.ExclusionConstraint(condition=models.Q(('statut__in', ('en_attente', 'confirmee', 'en_cours'))), deferrable=django.db.models.constraints.Deferrable['IMMEDIATE'], expressions=[('sejour', '&&'), ('chambre', '=')], name='reservations_sans_chevauchement', violation_error_message='Cette chambre est déjà réservée sur cette période.'),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.5 on 2026-10-18 18:33
+
+import django.contrib.postgres.indexes
+import django.db.models.functions.text
+from django.conf import settings
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chambres', '0002_regles_tarifaires'),
+        ('clients', '0002_index_recherche'),
+        ('reservations', '0005_chambre_verrouillee'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='reservation',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper('numero_reservation'), name='gin_trgm_ops'), name='reservations_numero_trgm'),
+        ),
+    ]
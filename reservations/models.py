@@ -1,10 +1,35 @@
+from django.contrib.postgres.constraints import ExclusionConstraint
+from django.contrib.postgres.fields import DateRangeField, RangeOperators
+from django.contrib.postgres.indexes import GinIndex, OpClass
 from django.db import models
+from django.db.models import Deferrable
+from django.db.models.functions import Upper
 from django.db.models.signals import post_save
 from django.dispatch import receiver
 from django.utils import timezone
 from clients.models import Client
 from chambres.models import Chambre
+from chambres.statuts import changer_statut
 from accounts.models import User
+from clients.statistiques import suivre_statistiques
+from core.evenements import publier
+from core.numerotation import prochain_numero
+
+
+class DateRange(models.Func):
+    """Construit un ``daterange`` PostgreSQL semi-ouvert ``[debut, fin)``"""
+    function = 'daterange'
+    output_field = DateRangeField()
+
+    def __init__(self, debut, fin, bornes='[)', **extra):
+        super().__init__(debut, fin, models.Value(bornes), **extra)
+
+
+# Statuts qui bloquent la chambre sur la période du séjour
+STATUTS_RESERVATION_ACTIFS = ('en_attente', 'confirmee', 'en_cours')
+# Statuts dont les nuits figurent au planning (séjours à venir, en cours et passés)
+STATUTS_RESERVATION_OCCUPATION = STATUTS_RESERVATION_ACTIFS + ('terminee',)
+
 
 class Reservation(models.Model):
     """Réservations de chambres"""
@@ -17,6 +42,9 @@ class Reservation(models.Model):
         ('no_show', 'No-show (Absent)'),
     ]
     
+    STATUTS_ACTIFS = STATUTS_RESERVATION_ACTIFS
+    STATUTS_OCCUPATION = STATUTS_RESERVATION_OCCUPATION
+    
     TYPE_CHOICES = [
         ('directe', 'Réservation directe'),
         ('en_ligne', 'Réservation en ligne'),
@@ -32,6 +60,11 @@ class Reservation(models.Model):
     date_depart = models.DateField()
     date_checkin = models.DateTimeField(null=True, blank=True)
     date_checkout = models.DateTimeField(null=True, blank=True)
+    sejour = models.GeneratedField(
+        expression=DateRange('date_arrivee', 'date_depart'),
+        output_field=DateRangeField(),
+        db_persist=True,
+    )
     
     nombre_adultes = models.IntegerField(default=1)
     nombre_enfants = models.IntegerField(default=0)
@@ -43,6 +76,8 @@ class Reservation(models.Model):
     total = models.DecimalField(max_digits=10, decimal_places=2)
     acompte = models.DecimalField(max_digits=10, decimal_places=2, default=0)
     
+    chambre_verrouillee = models.BooleanField(default=False, help_text="La chambre ne sera pas réaffectée par l'optimisation automatique")
+    
     demandes_speciales = models.TextField(blank=True)
     notes = models.TextField(blank=True)
     
@@ -55,13 +90,36 @@ class Reservation(models.Model):
         ordering = ['-date_creation']
         verbose_name = 'Réservation'
         verbose_name_plural = 'Réservations'
+        indexes = [
+            # Pagination par clé de la liste et ses filtres usuels
+            models.Index(fields=['-date_creation', '-id'], name='reservations_creation_idx'),
+            models.Index(fields=['statut', '-date_creation', '-id'], name='reservations_statut_idx'),
+            models.Index(fields=['chambre', '-date_creation', '-id'], name='reservations_chambre_idx'),
+            models.Index(fields=['date_arrivee'], name='reservations_arrivee_idx'),
+            # Recherche par numéro (icontains) pour la réception
+            GinIndex(OpClass(Upper('numero_reservation'), name='gin_trgm_ops'), name='reservations_numero_trgm'),
+        ]
+        constraints = [
+            # Une chambre ne peut pas porter deux séjours actifs qui se chevauchent
+            ExclusionConstraint(
+                name='reservations_sans_chevauchement',
+                expressions=[
+                    ('sejour', RangeOperators.OVERLAPS),
+                    ('chambre', RangeOperators.EQUAL),
+                ],
+                condition=models.Q(statut__in=STATUTS_RESERVATION_ACTIFS),
+                violation_error_message="Cette chambre est déjà réservée sur cette période.",
+                # Différable pour permettre les échanges de chambres en une transaction
+                deferrable=Deferrable.IMMEDIATE,
+            ),
+        ]
     
     def __str__(self):
         return f"Réservation {self.numero_reservation} - {self.client.nom_complet}"
     
     def save(self, *args, **kwargs):
         if not self.numero_reservation:
-            self.numero_reservation = f"RES{timezone.now().strftime('%Y%m%d%H%M%S')}"
+            self.numero_reservation = prochain_numero('RES')
         super().save(*args, **kwargs)
     
     @property
@@ -70,28 +128,83 @@ class Reservation(models.Model):
     
     def perform_check_in(self):
         """Gère le check-in"""
-        if self.statut == 'confirmee':
-            self.statut = 'en_cours'
-            self.date_checkin = timezone.now()
-            self.chambre.statut = 'occupee'
-            self.chambre.save()
-            self.save()
+        from .services import check_in_groupe  # Import différé (services importe ce module)
+        if self.statut == 'confirmee' and check_in_groupe([self.pk])[0].succes:
+            self.refresh_from_db(fields=['statut', 'date_checkin', 'date_modification'])
+            self.chambre.refresh_from_db(fields=['statut'])
     
     def perform_check_out(self):
         """Gère le check-out"""
-        if self.statut == 'en_cours':
-            self.statut = 'terminee'
-            self.date_checkout = timezone.now()
-            self.chambre.statut = 'sale'
-            self.chambre.save()
-            self.save()
+        from .services import check_out_groupe  # Import différé (services importe ce module)
+        if self.statut == 'en_cours' and check_out_groupe([self.pk])[0].succes:
+            self.refresh_from_db(fields=['statut', 'date_checkout', 'date_modification'])
+            self.chambre.refresh_from_db(fields=['statut'])
+
+
+class NuitChambre(models.Model):
+    """
+    Occupation matérialisée d'une chambre, une ligne par nuit.
+
+    Maintenue incrémentalement à partir des réservations (voir
+    reservations.planning) ; peut être reconstruite avec la commande
+    ``reconstruire_nuits_chambres``.
+    """
+    chambre = models.ForeignKey(Chambre, on_delete=models.CASCADE, related_name='nuits')
+    nuit = models.DateField()
+    reservation = models.ForeignKey(Reservation, on_delete=models.CASCADE, related_name='nuits')
+    statut = models.CharField(max_length=20, choices=Reservation.STATUT_CHOICES)
+    
+    class Meta:
+        db_table = 'nuits_chambres'
+        ordering = ['chambre', 'nuit']
+        verbose_name = 'Nuit de chambre'
+        verbose_name_plural = 'Nuits de chambres'
+        constraints = [
+            models.UniqueConstraint(fields=['chambre', 'nuit'], name='nuit_chambre_unique',
+                                    deferrable=Deferrable.IMMEDIATE),
+        ]
+        indexes = [
+            models.Index(fields=['nuit', 'statut'], name='nuits_nuit_statut_idx'),
+            models.Index(fields=['reservation', 'nuit'], name='nuits_reservation_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.chambre_id} - {self.nuit} ({self.statut})"
+
+# Statut de chambre visé selon le statut de la réservation
+STATUT_CHAMBRE_PAR_RESERVATION = {
+    'confirmee': 'reservee',
+    'annulee': 'disponible',
+    'no_show': 'disponible',
+    'terminee': 'sale',
+}
+
+
+suivre_statistiques(Reservation)
 
 @receiver(post_save, sender=Reservation)
 def update_chambre_status(sender, instance, **kwargs):
     """Met à jour le statut de la chambre en fonction de la réservation"""
-    if instance.statut == 'confirmee':
-        instance.chambre.statut = 'reservee'
-        instance.chambre.save()
-    elif instance.statut in ['annulee', 'no_show', 'terminee']:
-        instance.chambre.statut = 'disponible' if instance.chambre.statut != 'en_maintenance' else instance.chambre.statut
-        instance.chambre.save()
\ No newline at end of file
+    statut_chambre = STATUT_CHAMBRE_PAR_RESERVATION.get(instance.statut)
+    if statut_chambre:
+        changer_statut([instance.chambre_id], statut_chambre, motif=f"Réservation {instance.numero_reservation}",
+                       utilisateur=instance.created_by)
+
+
+@receiver(post_save, sender=Reservation)
+def update_nuits_chambre(sender, instance, **kwargs):
+    """Répercute la réservation sur l'occupation nuit par nuit"""
+    from .planning import synchroniser_nuits  # Import différé (planning importe ce module)
+    synchroniser_nuits(instance)
+
+
+@receiver(post_save, sender=Reservation)
+def publier_reservation(sender, instance, created, **kwargs):
+    """Annonce les nouvelles réservations aux écrans connectés"""
+    if created:
+        publier('reservation', {
+            'reservations': [instance.pk],
+            'chambres': [instance.chambre_id],
+            'date_arrivee': instance.date_arrivee,
+            'statut': instance.statut,
+        })
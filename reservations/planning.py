@@ -0,0 +1,158 @@
+# reservations/planning.py
+"""
+Occupation des chambres nuit par nuit (table ``nuits_chambres``).
+
+Chaque réservation occupant une chambre y possède une ligne par nuit. La
+grille du planning et les taux d'occupation se lisent alors par un simple
+parcours d'index sur la plage de dates, sans redérouler les séjours en Python.
+"""
+import datetime
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Count
+from django.utils import timezone
+
+from .models import NuitChambre, Reservation
+
+
+def _jours(debut, fin):
+    """Nuits de l'intervalle semi-ouvert [debut, fin)"""
+    return [debut + datetime.timedelta(days=i) for i in range((fin - debut).days)]
+
+
+def nuits_attendues(reservation):
+    """Nuits que la réservation doit occuper compte tenu de son statut"""
+    if reservation.statut not in Reservation.STATUTS_OCCUPATION:
+        return []
+    fin = reservation.date_depart
+    if reservation.statut == 'terminee':
+        # Un départ anticipé libère les nuits restantes ; sans date de
+        # check-out (statut saisi à la main), le départ est aujourd'hui
+        fin = min(fin, timezone.localdate(reservation.date_checkout or timezone.now()))
+    return _jours(reservation.date_arrivee, fin)
+
+
+def synchroniser_nuits(reservation):
+    """
+    Met à jour les nuits d'une réservation en n'écrivant que la différence :
+    au plus un DELETE, un UPDATE et un INSERT.
+    """
+    attendues = set(nuits_attendues(reservation))
+    existantes = {
+        nuit: (chambre_id, statut)
+        for nuit, chambre_id, statut in NuitChambre.objects
+        .filter(reservation=reservation)
+        .values_list('nuit', 'chambre_id', 'statut')
+    }
+
+    a_supprimer = [
+        nuit for nuit, (chambre_id, _) in existantes.items()
+        if nuit not in attendues or chambre_id != reservation.chambre_id
+    ]
+    conservees = existantes.keys() - set(a_supprimer)
+    a_creer = sorted(attendues - conservees)
+    a_mettre_a_jour = [nuit for nuit in conservees if existantes[nuit][1] != reservation.statut]
+
+    with transaction.atomic():
+        if a_supprimer:
+            NuitChambre.objects.filter(reservation=reservation, nuit__in=a_supprimer).delete()
+        if a_mettre_a_jour:
+            NuitChambre.objects.filter(reservation=reservation, nuit__in=a_mettre_a_jour).update(
+                statut=reservation.statut
+            )
+        if a_creer:
+            NuitChambre.objects.bulk_create([
+                NuitChambre(
+                    chambre_id=reservation.chambre_id,
+                    nuit=nuit,
+                    reservation_id=reservation.pk,
+                    statut=reservation.statut,
+                )
+                for nuit in a_creer
+            ])
+
+
+def creer_nuits(reservations):
+    """Insère en un seul INSERT les nuits de réservations nouvellement créées"""
+    NuitChambre.objects.bulk_create([
+        NuitChambre(
+            chambre_id=reservation.chambre_id,
+            nuit=nuit,
+            reservation_id=reservation.pk,
+            statut=reservation.statut,
+        )
+        for reservation in reservations
+        for nuit in nuits_attendues(reservation)
+    ])
+
+
+def appliquer_statut_nuits(reservation_ids, statut, liberer_a_partir_de=None):
+    """
+    Variante ensembliste pour les traitements par lots : change le statut des
+    nuits d'un ensemble de réservations et, si demandé, libère les nuits à
+    partir d'une date (départ anticipé, no-show, annulation).
+    """
+    nuits = NuitChambre.objects.filter(reservation_id__in=reservation_ids)
+    if liberer_a_partir_de is not None:
+        nuits.filter(nuit__gte=liberer_a_partir_de).delete()
+    if statut in Reservation.STATUTS_OCCUPATION:
+        nuits.update(statut=statut)
+    else:
+        nuits.delete()
+
+
+def grille_occupation(date_debut, nombre_nuits=30):
+    """
+    Grille chambres x nuits pour le planning de la réception.
+
+    Retourne ``{chambre_id: {nuit: (reservation_id, statut)}}`` ; les nuits
+    libres sont absentes.
+    """
+    date_fin = date_debut + datetime.timedelta(days=nombre_nuits)
+    grille = {}
+    lignes = (
+        NuitChambre.objects
+        .filter(nuit__gte=date_debut, nuit__lt=date_fin)
+        .values_list('chambre_id', 'nuit', 'reservation_id', 'statut')
+    )
+    for chambre_id, nuit, reservation_id, statut in lignes:
+        grille.setdefault(chambre_id, {})[nuit] = (reservation_id, statut)
+    return grille
+
+
+def occupation_par_nuit(date_debut, date_fin, type_chambre=None):
+    """Nombre de chambres occupées pour chaque nuit de [date_debut, date_fin)"""
+    nuits = NuitChambre.objects.filter(nuit__gte=date_debut, nuit__lt=date_fin)
+    if type_chambre is not None:
+        nuits = nuits.filter(chambre__type_chambre=type_chambre)
+    lignes = nuits.order_by().values('nuit').annotate(nombre=Count('id'))
+    return {ligne['nuit']: ligne['nombre'] for ligne in lignes}
+
+
+def reconstruire_nuits():
+    """
+    Reconstruit toute la table à partir des réservations, en une seule
+    instruction INSERT ... SELECT sur generate_series. Retourne le nombre
+    de nuits créées.
+    """
+    sql = f"""
+        INSERT INTO {NuitChambre._meta.db_table} (chambre_id, nuit, reservation_id, statut)
+        SELECT r.chambre_id, jour::date, r.id, r.statut
+        FROM {Reservation._meta.db_table} r
+        CROSS JOIN LATERAL generate_series(
+            r.date_arrivee::timestamp,
+            CASE
+                WHEN r.statut = 'terminee'
+                THEN LEAST(r.date_depart, (COALESCE(r.date_checkout, NOW()) AT TIME ZONE %s)::date)
+                ELSE r.date_depart
+            END::timestamp - interval '1 day',
+            interval '1 day'
+        ) AS jour
+        WHERE r.statut = ANY(%s)
+    """
+    with transaction.atomic():
+        NuitChambre.objects.all().delete()
+        with connection.cursor() as cursor:
+            cursor.execute(sql, [settings.TIME_ZONE, list(Reservation.STATUTS_OCCUPATION)])
+            return cursor.rowcount
@@ -0,0 +1,60 @@
+# reservations/recherche.py
+from django.contrib.postgres.search import TrigramSimilarity
+from django.db.models import Q, Value
+from django.db.models.functions import Concat, Greatest
+from clients.models import Client
+from .models import Reservation
+
+LONGUEUR_MINIMALE = 3
+# Nombre maximal de clients candidats examinés : borne le coût de la jointure.
+# Les plus proches du terme sont retenus, dans un ordre stable.
+CLIENTS_CANDIDATS_MAX = 200
+
+
+def _similarite_client(terme, prefixe=''):
+    """Similarité trigramme entre le terme et le nom, le prénom ou le téléphone du client"""
+    return Greatest(
+        TrigramSimilarity(f'{prefixe}nom', terme),
+        TrigramSimilarity(f'{prefixe}prenom', terme),
+        TrigramSimilarity(f'{prefixe}phone', terme),
+        TrigramSimilarity(Concat(f'{prefixe}prenom', Value(' '), f'{prefixe}nom'), terme),
+    )
+
+
+def rechercher_reservations(terme, limite=20):
+    """
+    Recherche de réservations par numéro, nom, prénom ou téléphone du client.
+
+    Chaque mot du terme doit apparaître dans l'un de ces champs ; les
+    recherches ``icontains`` sont servies par les index trigrammes GIN. Les
+    résultats sont classés par similarité trigramme décroissante avec le terme
+    complet, puis par date d'arrivée la plus récente.
+    """
+    terme = ' '.join(terme.split())
+    if len(terme) < LONGUEUR_MINIMALE:
+        return Reservation.objects.none()
+
+    clients = Client.objects.all()
+    for mot in terme.split():
+        clients = clients.filter(Q(nom__icontains=mot) | Q(prenom__icontains=mot) | Q(phone__icontains=mot))
+    clients = (
+        clients
+        .annotate(pertinence=_similarite_client(terme))
+        .order_by('-pertinence', 'pk')
+        .values('pk')[:CLIENTS_CANDIDATS_MAX]
+    )
+
+    # UNION plutôt que OR : chaque branche reste servie par son propre index
+    par_numero = Reservation.objects.filter(numero_reservation__icontains=terme).order_by().values('pk')
+    par_client = Reservation.objects.filter(client__in=clients).order_by().values('pk')
+
+    return (
+        Reservation.objects
+        .filter(pk__in=par_numero.union(par_client))
+        .select_related('client', 'chambre')
+        .annotate(pertinence=Greatest(
+            TrigramSimilarity('numero_reservation', terme),
+            _similarite_client(terme, prefixe='client__'),
+        ))
+        .order_by('-pertinence', '-date_arrivee')[:limite]
+    )
@@ -0,0 +1,230 @@
+# reservations/services.py
+from collections import namedtuple
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.db.models import Exists, OuterRef
+from django.utils import timezone
+from chambres.models import Chambre, TypeChambre
+from chambres.statuts import changer_statut
+from chambres.tarification import coter_sejour
+from clients.statistiques import planifier_rafraichissement
+from core.evenements import publier
+from core.models import ActionLog
+from core.numerotation import allouer_numeros
+from .availability import chambres_disponibles
+from .models import Reservation
+from .planning import appliquer_statut_nuits, creer_nuits
+
+ResultatMouvement = namedtuple('ResultatMouvement', ['reservation_id', 'succes', 'message'])
+
+
+def _ids(reservations):
+    """Accepte indifféremment des instances ou des identifiants"""
+    return [getattr(reservation, 'pk', reservation) for reservation in reservations]
+
+
+def _deplacer_groupe(reservations, statut_requis, nouveau_statut, champ_date, statut_chambre, libelle,
+                     liberer_nuits=False):
+    """
+    Fait passer un lot de réservations (et leurs chambres) d'un statut à l'autre.
+
+    Le nombre de requêtes est constant quelle que soit la taille du groupe :
+    un SELECT ... FOR UPDATE, un UPDATE conditionnel des chambres (voir
+    chambres.statuts), un UPDATE des réservations et la mise à jour des nuits
+    du planning. Les réservations qui ne sont pas dans `statut_requis`, ou
+    dont la chambre refuse la transition (check-in dans une chambre sale...),
+    sont laissées inchangées et signalées dans le résultat.
+    """
+    ids = _ids(reservations)
+    maintenant = timezone.now()
+    chambres_refusees = {}
+
+    with transaction.atomic():
+        lignes = {
+            pk: (statut, chambre_id, client_id)
+            for pk, statut, chambre_id, client_id in Reservation.objects
+            .select_for_update()
+            .filter(pk__in=ids)
+            .values_list('pk', 'statut', 'chambre_id', 'client_id')
+        }
+        candidates = {pk: chambre_id for pk, (statut, chambre_id, _) in lignes.items() if statut == statut_requis}
+
+        # Les chambres d'abord : seules les réservations dont la chambre a
+        # accepté la transition changent de statut
+        modifiees = changer_statut(candidates.values(), statut_chambre, motif=libelle) if candidates else {}
+        eligibles = {pk: chambre_id for pk, chambre_id in candidates.items() if chambre_id in modifiees}
+        refusees = set(candidates.values()) - modifiees.keys()
+        if refusees:
+            chambres_refusees = dict(Chambre.objects.filter(pk__in=refusees).values_list('pk', 'statut'))
+
+        if eligibles:
+            Reservation.objects.filter(pk__in=eligibles).update(
+                statut=nouveau_statut,
+                date_modification=maintenant,
+                **{champ_date: maintenant},
+            )
+            appliquer_statut_nuits(
+                list(eligibles),
+                nouveau_statut,
+                liberer_a_partir_de=timezone.localdate(maintenant) if liberer_nuits else None,
+            )
+            planifier_rafraichissement(lignes[pk][2] for pk in eligibles)
+
+    resultats = []
+    for pk in ids:
+        if pk in eligibles:
+            resultats.append(ResultatMouvement(pk, True, f"{libelle} effectué"))
+        elif pk in candidates:
+            statut = dict(Chambre.STATUT_CHOICES).get(chambres_refusees.get(candidates[pk]), "inconnu")
+            resultats.append(ResultatMouvement(pk, False, f"{libelle} impossible : chambre « {statut} »"))
+        elif pk in lignes:
+            statut = dict(Reservation.STATUT_CHOICES)[lignes[pk][0]]
+            resultats.append(ResultatMouvement(pk, False, f"{libelle} impossible : réservation « {statut} »"))
+        else:
+            resultats.append(ResultatMouvement(pk, False, "Réservation introuvable"))
+    return resultats
+
+
+def check_in_groupe(reservations):
+    """Check-in d'un groupe de réservations confirmées"""
+    return _deplacer_groupe(reservations, 'confirmee', 'en_cours', 'date_checkin', 'occupee', "Check-in")
+
+
+def check_out_groupe(reservations):
+    """Check-out d'un groupe de réservations en cours"""
+    return _deplacer_groupe(reservations, 'en_cours', 'terminee', 'date_checkout', 'sale', "Check-out",
+                            liberer_nuits=True)
+
+
+def reserver_bloc(client, date_arrivee, date_depart, demandes, statut='confirmee', created_by=None, **champs):
+    """
+    Réservation de groupe (mariage, séminaire...) pour un même client.
+
+    `demandes` associe un type de chambre (instance ou identifiant) au nombre
+    de chambres voulues. Les chambres sont prises parmi les disponibilités
+    de la période, toutes les réservations sont insérées en un seul
+    ``bulk_create`` avec des numéros pré-alloués, puis les nuits du planning
+    et le statut des chambres sont mis à jour en une passe chacun.
+
+    Les prix viennent du moteur tarifaire (chambres.tarification).
+
+    Lève ``ValidationError`` si un type n'a pas assez de chambres libres ;
+    dans ce cas rien n'est créé.
+    """
+    if date_depart <= date_arrivee:
+        raise ValidationError("La date de départ doit être après la date d'arrivée.")
+
+    demandes = {getattr(type_chambre, 'pk', type_chambre): nombre for type_chambre, nombre in demandes.items()}
+    types = TypeChambre.objects.in_bulk(list(demandes))
+    devis = coter_sejour(date_arrivee, date_depart, types.values())
+
+    with transaction.atomic():
+        # SKIP LOCKED : deux réservations de groupe simultanées ne se disputent pas les mêmes chambres
+        candidates = (
+            chambres_disponibles(date_arrivee, date_depart)
+            .filter(type_chambre__in=list(demandes))
+            .order_by('type_chambre', 'etage', 'numero')
+            .select_for_update(skip_locked=True, of=('self',))
+        )
+        par_type = {}
+        for chambre in candidates:
+            par_type.setdefault(chambre.type_chambre_id, []).append(chambre)
+
+        manquants = [
+            f"{types[type_id].nom if type_id in types else type_id} "
+            f"({len(par_type.get(type_id, []))}/{nombre} disponibles)"
+            for type_id, nombre in demandes.items()
+            if len(par_type.get(type_id, [])) < nombre
+        ]
+        if manquants:
+            raise ValidationError("Chambres insuffisantes : " + ", ".join(manquants))
+
+        chambres = [chambre for type_id, nombre in demandes.items() for chambre in par_type[type_id][:nombre]]
+        numeros = allouer_numeros('RES', len(chambres))
+        reservations = Reservation.objects.bulk_create([
+            Reservation(
+                numero_reservation=numero,
+                client=client,
+                chambre=chambre,
+                date_arrivee=date_arrivee,
+                date_depart=date_depart,
+                statut=statut,
+                prix_par_nuit=devis[chambre.type_chambre_id].prix_moyen,
+                total=devis[chambre.type_chambre_id].total,
+                created_by=created_by,
+                **champs,
+            )
+            for numero, chambre in zip(numeros, chambres)
+        ])
+
+        # Effets de bord habituellement portés par les signaux post_save, en une passe
+        creer_nuits(reservations)
+        if statut == 'confirmee':
+            changer_statut(chambres, 'reservee', motif="Réservation de groupe", utilisateur=created_by)
+        publier('reservation', {
+            'reservations': [reservation.pk for reservation in reservations],
+            'chambres': [chambre.pk for chambre in chambres],
+            'date_arrivee': date_arrivee,
+            'statut': statut,
+        })
+
+    return reservations
+
+
+def marquer_no_shows(date_limite=None, taille_lot=500, utilisateur=None):
+    """
+    Passe en « no_show » les réservations confirmées dont l'arrivée est
+    antérieure à `date_limite` (aujourd'hui par défaut), libère leurs chambres
+    et journalise chaque changement.
+
+    Le travail est découpé en lots de `taille_lot`, chacun dans sa propre
+    courte transaction avec des UPDATE ensemblistes : un long arriéré ne
+    bloque jamais la table longtemps. Les lignes déjà verrouillées par un
+    autre traitement sont sautées (SKIP LOCKED) et reprises au passage suivant.
+    Retourne le nombre de réservations traitées.
+    """
+    date_limite = date_limite or timezone.localdate()
+    total = 0
+
+    while True:
+        with transaction.atomic():
+            lignes = list(
+                Reservation.objects
+                .select_for_update(skip_locked=True)
+                .filter(statut='confirmee', date_arrivee__lt=date_limite)
+                .order_by('pk')
+                .values_list('pk', 'chambre_id', 'client_id')[:taille_lot]
+            )
+            if not lignes:
+                break
+            lot = {pk: chambre_id for pk, chambre_id, _ in lignes}
+
+            Reservation.objects.filter(pk__in=lot).update(statut='no_show', date_modification=timezone.now())
+            appliquer_statut_nuits(list(lot), 'no_show')
+
+            # Une chambre reste réservée si une autre arrivée confirmée l'attend encore
+            attendue = Reservation.objects.filter(
+                chambre=OuterRef('pk'), statut='confirmee', date_arrivee__gte=date_limite
+            )
+            a_liberer = (
+                Chambre.objects
+                .filter(pk__in=set(lot.values()))
+                .exclude(Exists(attendue))
+                .values_list('pk', flat=True)
+            )
+            changer_statut(a_liberer, 'disponible', motif="No-show", utilisateur=utilisateur, depuis=['reservee'])
+
+            ActionLog.objects.bulk_create([
+                ActionLog(
+                    utilisateur=utilisateur,
+                    action="No-show",
+                    details="Réservation non honorée, chambre libérée",
+                    entite='Reservation',
+                    entite_id=pk,
+                )
+                for pk in lot
+            ])
+            planifier_rafraichissement(client_id for _, _, client_id in lignes)
+        total += len(lot)
+
+    return total
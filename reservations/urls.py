@@ -0,0 +1,15 @@
+# reservations/urls.py
+from django.urls import path
+from . import views
+
+app_name = 'reservations'
+
+urlpatterns = [
+    path('', views.ReservationListView.as_view(), name='list'),
+    path('<int:pk>/', views.ReservationDetailView.as_view(), name='detail'),
+    path('nouvelle/', views.ReservationCreateView.as_view(), name='create'),
+    path('<int:pk>/modifier/', views.ReservationUpdateView.as_view(), name='update'),
+    path('<int:pk>/supprimer/', views.ReservationDeleteView.as_view(), name='delete'),
+    path('devis/', views.DevisSejourView.as_view(), name='devis'),
+    path('recherche/', views.ReservationRechercheView.as_view(), name='recherche'),
+]
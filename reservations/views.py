@@ -1,37 +1,136 @@
 # reservations/views.py
+from django.contrib.auth.mixins import LoginRequiredMixin
+from django.http import JsonResponse
+from django.views import View
 from django.views.generic import ListView, DetailView, CreateView, UpdateView, DeleteView
 from django.urls import reverse_lazy
+from django.utils.dateparse import parse_date
+from chambres.models import TypeChambre
+from chambres.tarification import coter_sejour
+from core.pagination import KeysetPaginationMixin
+from .availability import disponibilites_par_type, filtrer_equipements
+from .recherche import rechercher_reservations
 from .models import Reservation
 from .forms import ReservationForm
 
 
-class ReservationListView(ListView):
+def _date(valeur):
+    """Date AAAA-MM-JJ d'un paramètre de requête ; None si absente ou invalide (2024-02-30 compris)"""
+    try:
+        return parse_date(valeur or '')
+    except ValueError:
+        return None
+
+
+class ReservationListView(LoginRequiredMixin, KeysetPaginationMixin, ListView):
     model = Reservation
     template_name = 'reservations/list.html'
     context_object_name = 'reservations'
-    ordering = ['-date_creation']
+    page_size = 50
+
+    def get_queryset(self):
+        queryset = Reservation.objects.select_related('client', 'chambre__type_chambre')
+
+        # Filtres optionnels : ?statut=...&chambre=...&du=AAAA-MM-JJ&au=AAAA-MM-JJ
+        statut = self.request.GET.get('statut')
+        if statut:
+            queryset = queryset.filter(statut=statut)
+        chambre = self.request.GET.get('chambre')
+        if chambre and chambre.isdigit():
+            queryset = queryset.filter(chambre_id=chambre)
+        du = _date(self.request.GET.get('du'))
+        if du:
+            queryset = queryset.filter(date_arrivee__gte=du)
+        au = _date(self.request.GET.get('au'))
+        if au:
+            queryset = queryset.filter(date_arrivee__lte=au)
+        return queryset
 
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['filtres'] = {
+            cle: self.request.GET.get(cle, '') for cle in ('statut', 'chambre', 'du', 'au')
+        }
+        return context
 
-class ReservationDetailView(DetailView):
+
+class ReservationDetailView(LoginRequiredMixin, DetailView):
     model = Reservation
     template_name = 'reservations/detail.html'
 
 
-class ReservationCreateView(CreateView):
+class ReservationCreateView(LoginRequiredMixin, CreateView):
     model = Reservation
     form_class = ReservationForm
     template_name = 'reservations/form.html'
     success_url = reverse_lazy('reservations:list')
 
 
-class ReservationUpdateView(UpdateView):
+class ReservationUpdateView(LoginRequiredMixin, UpdateView):
     model = Reservation
     form_class = ReservationForm
     template_name = 'reservations/form.html'
     success_url = reverse_lazy('reservations:list')
 
 
-class ReservationDeleteView(DeleteView):
+class ReservationDeleteView(LoginRequiredMixin, DeleteView):
     model = Reservation
     template_name = 'reservations/confirm_delete.html'
-    success_url = reverse_lazy('reservations:list')
\ No newline at end of file
+    success_url = reverse_lazy('reservations:list')
+
+class DevisSejourView(LoginRequiredMixin, View):
+    """
+    Prix par nuit et disponibilités de chaque type de chambre pour un séjour.
+
+    ``?equipements=WiFi,Climatisation`` ne retient que les types qui les offrent tous.
+    """
+    raise_exception = True
+
+    def get(self, request):
+        arrivee = _date(request.GET.get('arrivee'))
+        depart = _date(request.GET.get('depart'))
+        if not arrivee or not depart or depart <= arrivee:
+            return JsonResponse({'erreur': "Paramètres 'arrivee' et 'depart' (AAAA-MM-JJ) invalides."}, status=400)
+
+        equipements = [nom for nom in request.GET.get('equipements', '').split(',') if nom.strip()]
+        disponibles = disponibilites_par_type(arrivee, depart, equipements=equipements)
+        types = filtrer_equipements(TypeChambre.objects.all(), equipements, prefixe='')
+        return JsonResponse({
+            'arrivee': arrivee,
+            'depart': depart,
+            'types': [
+                {
+                    'id': type_id,
+                    'nom': devis.type_chambre.nom,
+                    'disponibles': disponibles.get(type_id, 0),
+                    'total': devis.total,
+                    'prix_moyen': devis.prix_moyen,
+                    'prix_nuits': {nuit.isoformat(): prix for nuit, prix in zip(devis.nuits, devis.prix_nuits)},
+                }
+                for type_id, devis in coter_sejour(arrivee, depart, types).items()
+            ],
+        })
+
+
+class ReservationRechercheView(LoginRequiredMixin, View):
+    """Recherche rapide (saisie semi-automatique) par numéro, nom ou téléphone"""
+    raise_exception = True
+
+    def get(self, request):
+        reservations = rechercher_reservations(request.GET.get('q', ''))
+        return JsonResponse({
+            'resultats': [
+                {
+                    'id': reservation.pk,
+                    'numero': reservation.numero_reservation,
+                    'client': reservation.client.nom_complet,
+                    'phone': reservation.client.phone,
+                    'chambre': reservation.chambre.numero,
+                    'date_arrivee': reservation.date_arrivee,
+                    'date_depart': reservation.date_depart,
+                    'statut': reservation.get_statut_display(),
+                    'pertinence': round(reservation.pertinence, 3),
+                }
+                for reservation in reservations
+            ],
+        })
@@ -1,7 +1,12 @@
 from django.db import models
+from django.db.models.signals import post_init, post_save
+from django.dispatch import receiver
 from django.utils import timezone
 from clients.models import Client
 from accounts.models import User
+from core.evenements import publier
+from core.images import suivre_images
+from core.numerotation import prochain_numero
 
 class CategorieMenu(models.Model):
     """Catégories de menu"""
@@ -45,6 +50,8 @@ class ProduitMenu(models.Model):
     def __str__(self):
         return self.nom
 
+suivre_images(ProduitMenu, 'image')
+
 class Table(models.Model):
     """Tables du restaurant/bar"""
     STATUT_CHOICES = [
@@ -91,12 +98,32 @@ class Commande(models.Model):
     
     def save(self, *args, **kwargs):
         if not self.numero_commande:
-            self.numero_commande = f"CMD{timezone.now().strftime('%Y%m%d%H%M%S')}"
+            self.numero_commande = prochain_numero('CMD')
         super().save(*args, **kwargs)
     
     def __str__(self):
         return f"Commande {self.numero_commande} - {self.get_type_service_display()}"
 
+@receiver(post_init, sender=Commande)
+def memoriser_statut_commande(sender, instance, **kwargs):
+    """Conserve le statut chargé pour détecter ses changements"""
+    # __dict__ : ne pas provoquer de requête pour un champ différé
+    instance._statut_initial = instance.__dict__.get('statut')
+
+@receiver(post_save, sender=Commande)
+def publier_statut_commande(sender, instance, created, **kwargs):
+    """Annonce les nouvelles commandes et leurs changements de statut (cuisine, bar, caisse)"""
+    if created or instance.statut != instance._statut_initial:
+        publier('commande', {
+            'commande': instance.pk,
+            'numero': instance.numero_commande,
+            'statut': instance.statut,
+            'ancien_statut': None if created else instance._statut_initial,
+            'type_service': instance.type_service,
+            'table': instance.table_id,
+        })
+    instance._statut_initial = instance.statut
+
 class CommandeItem(models.Model):
     """Items d'une commande"""
     commande = models.ForeignKey(Commande, on_delete=models.CASCADE, related_name='items')
@@ -0,0 +1,24 @@
+# Generated by Django 5.2.5 on 2026-10-18 18:48
+
+import core.stockage
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('staff', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='employe',
+            name='contrat',
+            field=models.FileField(blank=True, null=True, storage=core.stockage.get_stockage_documents, upload_to='contrats/'),
+        ),
+        migrations.AlterField(
+            model_name='employe',
+            name='cv',
+            field=models.FileField(blank=True, null=True, storage=core.stockage.get_stockage_documents, upload_to='cv_employes/'),
+        ),
+    ]
@@ -1,4 +1,6 @@
 from django.db import models
+from core.images import suivre_images
+from core.stockage import get_stockage_documents, suivre_documents
 
 class Employe(models.Model):
     """Informations détaillées des employés"""
@@ -28,8 +30,8 @@ class Employe(models.Model):
     date_embauche = models.DateField()
     salaire = models.DecimalField(max_digits=10, decimal_places=2)
     
-    cv = models.FileField(upload_to='cv_employes/', blank=True, null=True)
-    contrat = models.FileField(upload_to='contrats/', blank=True, null=True)
+    cv = models.FileField(upload_to='cv_employes/', storage=get_stockage_documents, blank=True, null=True)
+    contrat = models.FileField(upload_to='contrats/', storage=get_stockage_documents, blank=True, null=True)
     photo = models.ImageField(upload_to='photos_employes/', blank=True, null=True)
     
     contact_urgence_nom = models.CharField(max_length=100, blank=True)
@@ -47,6 +49,9 @@ class Employe(models.Model):
     def __str__(self):
         return f"{self.prenom} {self.nom} - {self.poste}"
 
+suivre_images(Employe, 'photo')
+suivre_documents(Employe, 'cv', 'contrat')
+
 class Planning(models.Model):
     """Planning de travail des employés"""
     PERIODE_CHOICES = [